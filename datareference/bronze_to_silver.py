@@ -44,6 +44,9 @@
 TRANSFORMATION_TRACKING_TABLE = 'transformation_tracking'
 TRANSFORMATION_TRACKING_SCHEMA = 'public'
 
+# Canal NOTIFY écouté par llmgamemaster pour invalider ses caches de référence
+REFERENCE_CHANNEL = 'reference_changed'
+
 logger.info(f"Configuration - BRONZE: {BRONZE_DB_HOST}:{BRONZE_DB_PORT}/{BRONZE_DB_NAME}")
 logger.info(f"Configuration - SILVER: {SILVER_DB_HOST}:{SILVER_DB_PORT}/{SILVER_DB_NAME}")
 
@@ -485,6 +488,37 @@ def create_fusion_table(bronze_conn, silver_conn, schema, table_prefix, fusion_t
             except Exception as idx_err:
                 logger.warning(f"⚠️ Erreur lors de la création de l'index: {str(idx_err)}")
             
+            # Index trigrammes sur name : les recherches ILIKE '%nom%' du LLM
+            # (monstres, sorts...) deviennent des parcours d'index
+            if 'name' in all_columns:
+                try:
+                    logger.info(f"Création d'index trigrammes sur name pour {schema}.{fusion_table_name}")
+                    silver_cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                    silver_cur.execute(f"CREATE INDEX idx_{fusion_table_name}_name_trgm ON {schema}.{fusion_table_name} USING gin (name gin_trgm_ops)")
+                    logger.info(f"Index trigrammes créé sur name")
+                except Exception as idx_err:
+                    logger.warning(f"⚠️ Erreur lors de la création de l'index trigrammes: {str(idx_err)}")
+            
+            # Toute modification ultérieure de la table notifie les caches de llmgamemaster
+            try:
+                silver_cur.execute(f"""
+                    CREATE OR REPLACE FUNCTION public.notify_reference_changed() RETURNS trigger AS $$
+                    BEGIN
+                        PERFORM pg_notify('{REFERENCE_CHANNEL}', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME);
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql
+                """)
+                silver_cur.execute(f"""
+                    CREATE TRIGGER trg_{fusion_table_name}_notify
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {schema}.{fusion_table_name}
+                    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_reference_changed()
+                """)
+                # La table vient d'être reconstruite : notification immédiate
+                silver_cur.execute("SELECT pg_notify(%s, %s)", (REFERENCE_CHANNEL, f"{schema}.{fusion_table_name}"))
+            except Exception as notify_err:
+                logger.warning(f"⚠️ Erreur lors de la création du trigger de notification: {str(notify_err)}")
+            
             # Obtenir le nombre total de lignes fusionnées
             silver_cur.execute(f"SELECT COUNT(*) FROM {schema}.{fusion_table_name}")
             total_rows = silver_cur.fetchone()[0]
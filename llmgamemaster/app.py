@@ -3,6 +3,7 @@
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
+import asyncio
 import logging
 import time
 import os
@@ -14,7 +15,7 @@
 import openai  # Using older version 0.28.0
 import aiohttp
 
-from utils import setup_logging, format_campaign_data, format_message_history
+from utils import setup_logging, format_campaign_data, format_message_history, RateLimiter
 from llm_service import LLMService, format_character_data
 from db_service import DBService
 from element_manager import ElementManager
@@ -53,7 +54,7 @@
 # Add CORS middleware with security
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=CORS_ORIGINS,  # Sécurisé : origines spécifiques seulement
+    allow_origins=CORS_ORIGINS,  # Sécurisé : origines spécifiques seulement (frozenset)
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],  # Méthodes spécifiques
     allow_headers=["Authorization", "Content-Type", "Accept"],  # Headers spécifiques
@@ -107,9 +108,6 @@ async def get_optional_current_user(request: Request):
         return {"id": "anonymous", "email": "anonymous@local", "username": "anonymous"}
     return await get_optional_user(request)
 
-# Force reconnect to ensure clean connections
-db_service.force_reconnect()
-
 llm_service = LLMService()
 element_manager = ElementManager(db_service)
 
@@ -151,33 +149,6 @@ class EndSessionRequest(BaseModel):
     sessionId: int
 
 # Rate limiting
-class RateLimiter:
-    def __init__(self, requests_limit: int, window_seconds: int):
-        self.requests_limit = requests_limit
-        self.window_seconds = window_seconds
-        self.requests: Dict[str, List[float]] = {}
-    
-    def is_allowed(self, client_id: str) -> bool:
-        now = time.time()
-        
-        # Initialize client's request history if not present
-        if client_id not in self.requests:
-            self.requests[client_id] = []
-        
-        # Remove requests older than the window
-        self.requests[client_id] = [
-            req_time for req_time in self.requests[client_id]
-            if now - req_time < self.window_seconds
-        ]
-        
-        # Check if client has exceeded the limit
-        if len(self.requests[client_id]) >= self.requests_limit:
-            return False
-        
-        # Add the current request
-        self.requests[client_id].append(now)
-        return True
-
 rate_limiter = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
 
 # Middleware for rate limiting
@@ -202,6 +173,36 @@ def cleanup_connections():
     """Close database connections"""
     db_service.close_connections()
 
+@app.on_event("startup")
+def preload_db_catalog():
+    """Load the Silver column catalog once so reference searches need no metadata query"""
+    try:
+        db_service.load_catalog()
+    except Exception as e:
+        # Chargé à la demande à la première recherche si la base Silver n'est pas prête
+        logger.warning(f"Could not preload Silver column catalog: {e}")
+
+@app.on_event("startup")
+def ensure_character_quest_index():
+    """Create the unique CharacterQuests index the quest acceptance upserts rely on"""
+    try:
+        db_service.ensure_character_quest_index()
+    except Exception as e:
+        # accept_quest revient au contrôle d'existence tant que l'index manque
+        logger.warning(f"Could not ensure CharacterQuests unique index: {e}")
+
+@app.on_event("shutdown")
+def shutdown_db_service():
+    """Flush queued database writes and close the connection pools"""
+    db_service.close_connections()
+    db_service.close_pools()
+
+@app.on_event("shutdown")
+async def shutdown_image_storage():
+    """Close the HTTP session shared by the generated image downloads"""
+    from image_storage_service import image_storage_service
+    await image_storage_service.close()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -215,37 +216,21 @@ async def db_status():
     silver_conn_status = "Not connected"
     
     try:
-        # Check game database connection
-        if db_service.game_conn and not db_service.game_conn.closed:
-            cursor = db_service.game_conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            game_conn_status = "Connected"
-        else:
-            try:
-                db_service.get_game_db_connection()
-                cursor = db_service.game_conn.cursor()
+        # Check game database connection (pooled)
+        try:
+            with db_service.game_connection() as conn, conn.cursor() as cursor:
                 cursor.execute("SELECT 1")
-                cursor.close()
-                game_conn_status = "Connected (new connection)"
-            except Exception as e:
-                game_conn_status = f"Error: {str(e)}"
+            game_conn_status = "Connected"
+        except Exception as e:
+            game_conn_status = f"Error: {str(e)}"
         
-        # Check silver database connection
-        if db_service.silver_conn and not db_service.silver_conn.closed:
-            cursor = db_service.silver_conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            silver_conn_status = "Connected"
-        else:
-            try:
-                db_service.get_silver_db_connection()
-                cursor = db_service.silver_conn.cursor()
+        # Check silver database connection (pooled)
+        try:
+            with db_service.silver_connection() as conn, conn.cursor() as cursor:
                 cursor.execute("SELECT 1")
-                cursor.close()
-                silver_conn_status = "Connected (new connection)"
-            except Exception as e:
-                silver_conn_status = f"Error: {str(e)}"
+            silver_conn_status = "Connected"
+        except Exception as e:
+            silver_conn_status = f"Error: {str(e)}"
         
     except Exception as e:
         return {
@@ -375,19 +360,17 @@ async def generate_narrative(request: dict, background_tasks: BackgroundTasks):
                 detail="Either 'prompt' or 'campaign_id' must be provided"
             )
         
-        # Get campaign data
-        campaign = db_service.get_campaign_data(campaign_id)
+        # Get campaign data, characters and message history in one round trip
+        bundle = await asyncio.to_thread(db_service.get_campaign_bundle, campaign_id)
+        campaign = bundle["campaign"] if bundle else None
         if not campaign:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Campaign with ID {campaign_id} not found"
             )
         
-        # Get characters
-        characters = db_service.get_campaign_characters(campaign_id)
-        
-        # Get message history
-        message_history = db_service.get_campaign_messages(campaign_id)
+        characters = bundle["characters"]
+        message_history = bundle["messages"]
         
         # Format data for LLM
         formatted_campaign = format_campaign_data(campaign)
@@ -433,7 +416,7 @@ async def start_campaign(
     """Generate a starting narrative for a new campaign with pre-generated elements"""
     try:
         # Get campaign data
-        campaign = db_service.get_campaign_data(request.campaignId)
+        campaign = await asyncio.to_thread(db_service.get_campaign_data, request.campaignId)
         if not campaign:
             logger.error(f"Campaign with ID {request.campaignId} not found")
             return {
@@ -442,15 +425,15 @@ async def start_campaign(
             }
         
         # Get characters
-        characters = db_service.get_campaign_characters(request.campaignId)
+        characters = await asyncio.to_thread(db_service.get_campaign_characters, request.campaignId)
         
         # Format data for LLM
         formatted_campaign = format_campaign_data(campaign)
         formatted_characters = [format_character_data(char) for char in characters]
         
         # Helper function to get NPCs present in a location
-        def get_present_npcs_for_location(campaign_id, location_name):
-            npcs = db_service.get_campaign_npcs(campaign_id)
+        async def get_present_npcs_for_location(campaign_id, location_name):
+            npcs = await asyncio.to_thread(db_service.get_campaign_npcs, campaign_id)
             return [npc for npc in npcs if npc.get('CurrentLocation') == location_name]
         
         # PHASE 1: Pre-generate campaign elements (hidden from user)
@@ -466,21 +449,24 @@ def get_present_npcs_for_location(campaign_id, location_name):
         # Create the starting elements in database first
         try:
             if starting_elements.get('location'):
-                location_result = element_manager._create_or_update_location(
+                location_result = await asyncio.to_thread(
+                    element_manager._create_or_update_location,
                     request.campaignId, 
                     starting_elements['location']
                 )
                 logger.info(f"[PreGen] Created starting location: {location_result}")
             
             if starting_elements.get('npc'):
-                npc_result = element_manager._create_or_update_npc(
+                npc_result = await asyncio.to_thread(
+                    element_manager._create_or_update_npc,
                     request.campaignId, 
                     starting_elements['npc']
                 )
                 logger.info(f"[PreGen] Created starting NPC: {npc_result}")
                 
             if starting_elements.get('quest'):
-                quest_result = element_manager._create_or_update_quest(
+                quest_result = await asyncio.to_thread(
+                    element_manager._create_or_update_quest,
                     request.campaignId, 
                     starting_elements['quest']
                 )
@@ -493,7 +479,7 @@ def get_present_npcs_for_location(campaign_id, location_name):
         try:
             starting_location_name = starting_elements['location']['name']
             # Update character location in database to match starting location
-            db_service.update_character_location(request.campaignId, request.characterId, starting_location_name)
+            await asyncio.to_thread(db_service.update_character_location, request.campaignId, request.characterId, starting_location_name)
             logger.info(f"[PreGen] Updated character {request.characterId} location to {starting_location_name}")
         except Exception as e:
             logger.error(f"[PreGen] Error updating character location: {e}")
@@ -506,16 +492,16 @@ def get_present_npcs_for_location(campaign_id, location_name):
             logger.info(f"[PreGen] Using updated starting location: {starting_location_name}")
             
             # Verify the character location was updated (for logging purposes)
-            character_location = db_service.get_character_location(request.campaignId, request.characterId)
+            character_location = await asyncio.to_thread(db_service.get_character_location, request.campaignId, request.characterId)
             if character_location and character_location != starting_location_name:
                 logger.warning(f"[PreGen] DB location mismatch: Expected '{starting_location_name}', found '{character_location}'. Using expected location.")
             
             # Get NPCs present in the character's location
-            present_npcs = get_present_npcs_for_location(request.campaignId, starting_location_name)
+            present_npcs = await get_present_npcs_for_location(request.campaignId, starting_location_name)
             logger.info(f"[PreGen] Found {len(present_npcs)} NPCs in {starting_location_name}")
             
             # Get the location details for the introduction
-            locations = db_service.get_campaign_locations(request.campaignId)
+            locations = await asyncio.to_thread(db_service.get_campaign_locations, request.campaignId)
             actual_location = None
             for location in locations:
                 if location.get('Name') == starting_location_name:
@@ -557,7 +543,7 @@ def get_present_npcs_for_location(campaign_id, location_name):
             logger.error(f"[PreGen] Error getting actual character location: {e}")
             # Fallback to original starting elements
             actual_starting_elements = starting_elements
-            present_npcs = get_present_npcs_for_location(request.campaignId, starting_elements['location']['name'])
+            present_npcs = await get_present_npcs_for_location(request.campaignId, starting_elements['location']['name'])
 
         # PHASE 4: Generate campaign introduction based on actual character location
         introduction = llm_service.generate_campaign_intro(
@@ -639,7 +625,7 @@ async def generate_starting_elements(campaign, characters, player_name):
             return await generate_starting_elements_fallback(campaign, characters, player_name)
         
         # Get all quests and find the main quest
-        quests = db_service.get_campaign_quests(campaign_id)
+        quests = await asyncio.to_thread(db_service.get_campaign_quests, campaign_id)
         main_quest = None
         for quest in quests:
             if quest.get('Type') == 'Main':
@@ -652,7 +638,7 @@ async def generate_starting_elements(campaign, characters, player_name):
         
         # Get the quest giver NPC
         quest_giver_name = main_quest.get('QuestGiver')
-        npcs = db_service.get_campaign_npcs(campaign_id)
+        npcs = await asyncio.to_thread(db_service.get_campaign_npcs, campaign_id)
         quest_giver_npc = None
         
         for npc in npcs:
@@ -666,7 +652,7 @@ async def generate_starting_elements(campaign, characters, player_name):
         
         # Get the location where the quest giver is located
         quest_location_name = quest_giver_npc.get('CurrentLocation')
-        locations = db_service.get_campaign_locations(campaign_id)
+        locations = await asyncio.to_thread(db_service.get_campaign_locations, campaign_id)
         quest_location = None
         
         for location in locations:
@@ -858,8 +844,9 @@ async def send_message(
                     detail=f"You don't have access to campaign {request.campaignId}"
                 )
         
-        # Get campaign data
-        campaign = db_service.get_campaign_data(request.campaignId)
+        # Get campaign data, characters, message history and NPCs in one round trip
+        bundle = await asyncio.to_thread(db_service.get_campaign_bundle, request.campaignId)
+        campaign = bundle["campaign"] if bundle else None
         logger.info(f"[DB] Campaign data for id {request.campaignId}: {campaign}")
         if not campaign:
             logger.error(f"Campaign with ID {request.campaignId} not found")
@@ -868,10 +855,10 @@ async def send_message(
                 "message": f"Campaign with ID {request.campaignId} not found"
             }
         # Get characters
-        characters = db_service.get_campaign_characters(request.campaignId)
+        characters = bundle["characters"]
         logger.info(f"[DB] Characters for campaign {request.campaignId}: {characters}")
         # Get message history
-        message_history = db_service.get_campaign_messages(request.campaignId)
+        message_history = bundle["messages"]
         logger.info(f"[DB] Message history for campaign {request.campaignId}: {message_history}")
         # Find the character who is sending the message
         character = None
@@ -896,13 +883,15 @@ async def send_message(
         # Get character's current location first
         character_location = None
         if character:
-            character_location = character.get("CurrentLocation") or db_service.get_character_location(request.campaignId, request.characterId)
+            character_location = character.get("CurrentLocation")
+            if not character_location:
+                character_location = await asyncio.to_thread(db_service.get_character_location, request.campaignId, request.characterId)
         
         logger.info(f"[LOCATION] Character {request.characterId} is in: {character_location}")
         
         # Get existing campaign elements for context - FILTERED by current location
-        all_campaign_npcs = db_service.get_campaign_npcs(request.campaignId)
-        all_campaign_locations = db_service.get_campaign_locations(request.campaignId)
+        all_campaign_npcs = bundle["npcs"]
+        all_campaign_locations = await asyncio.to_thread(db_service.get_campaign_locations, request.campaignId)
         
         # Filter NPCs: only those in the character's current location
         if character_location:
@@ -924,7 +913,7 @@ async def send_message(
         logger.info(f"[LOCATION] Using {len(campaign_locations)} accessible locations (out of {len(all_campaign_locations)} total)")
         
         # Get only relevant quests (main quest and quests the player has discovered)
-        all_quests = db_service.get_campaign_quests(request.campaignId)
+        all_quests = await asyncio.to_thread(db_service.get_campaign_quests, request.campaignId)
         campaign_quests = []
         
         # Always include the main quest
@@ -1044,7 +1033,7 @@ async def end_session(request: EndSessionRequest, background_tasks: BackgroundTa
     """Generate a summary for the session"""
     try:
         # Get campaign data
-        campaign = db_service.get_campaign_data(request.campaignId)
+        campaign = await asyncio.to_thread(db_service.get_campaign_data, request.campaignId)
         if not campaign:
             logger.error(f"Campaign with ID {request.campaignId} not found")
             return {
@@ -1053,7 +1042,7 @@ async def end_session(request: EndSessionRequest, background_tasks: BackgroundTa
             }
         
         # Get message history
-        message_history = db_service.get_campaign_messages(request.campaignId, limit=50)
+        message_history = await asyncio.to_thread(db_service.get_campaign_messages, request.campaignId, limit=50)
         
         # Format data for LLM
         formatted_campaign = format_campaign_data(campaign)
@@ -1165,9 +1154,8 @@ async def get_campaign_elements(
                     detail=f"You don't have access to campaign {campaign_id}"
                 )
         
-        npcs = db_service.get_campaign_npcs(campaign_id)
-        locations = db_service.get_campaign_locations(campaign_id)
-        quests = db_service.get_campaign_quests(campaign_id)
+        elements = await asyncio.to_thread(db_service.get_campaign_elements, campaign_id)
+        npcs, locations, quests = elements["npcs"], elements["locations"], elements["quests"]
         
         background_tasks.add_task(cleanup_connections)
         return {
@@ -1188,7 +1176,7 @@ async def get_campaign_elements(
 async def get_campaign_npcs(campaign_id: int, background_tasks: BackgroundTasks):
     """Get all NPCs for a campaign"""
     try:
-        npcs = db_service.get_campaign_npcs(campaign_id)
+        npcs = await asyncio.to_thread(db_service.get_campaign_npcs, campaign_id)
         background_tasks.add_task(cleanup_connections)
         return {
             "success": True,
@@ -1206,7 +1194,7 @@ async def get_campaign_npcs(campaign_id: int, background_tasks: BackgroundTasks)
 async def get_campaign_locations(campaign_id: int, background_tasks: BackgroundTasks):
     """Get all locations for a campaign"""
     try:
-        locations = db_service.get_campaign_locations(campaign_id)
+        locations = await asyncio.to_thread(db_service.get_campaign_locations, campaign_id)
         background_tasks.add_task(cleanup_connections)
         return {
             "success": True,
@@ -1224,7 +1212,7 @@ async def get_campaign_locations(campaign_id: int, background_tasks: BackgroundT
 async def get_campaign_quests(campaign_id: int, background_tasks: BackgroundTasks):
     """Get all quests for a campaign"""
     try:
-        quests = db_service.get_campaign_quests(campaign_id)
+        quests = await asyncio.to_thread(db_service.get_campaign_quests, campaign_id)
         background_tasks.add_task(cleanup_connections)
         return {
             "success": True,
@@ -1244,14 +1232,14 @@ async def get_character_quests(campaign_id: int, background_tasks: BackgroundTas
     try:
         # Si character_id n'est pas fourni, on récupère tous les personnages de la campagne
         if character_id is None:
-            characters = db_service.get_campaign_characters(campaign_id)
-            all_character_quests = []
+            characters = await asyncio.to_thread(db_service.get_campaign_characters, campaign_id)
+            character_ids = [character.get("Id") for character in characters if character.get("Id")]
             
-            for character in characters:
-                char_id = character.get("Id")
-                if char_id:
-                    char_quests = db_service.get_character_quests(campaign_id, char_id)
-                    all_character_quests.extend(char_quests)
+            # Une seule requête pour tout le groupe, restituée dans l'ordre des personnages
+            quests_by_character = await asyncio.to_thread(db_service.get_character_quests_bulk, campaign_id, character_ids)
+            all_character_quests = []
+            for char_id in character_ids:
+                all_character_quests.extend(quests_by_character.get(char_id, []))
             
             background_tasks.add_task(cleanup_connections)
             return {
@@ -1260,7 +1248,7 @@ async def get_character_quests(campaign_id: int, background_tasks: BackgroundTas
             }
         else:
             # Récupérer les quêtes pour un personnage spécifique
-            character_quests = db_service.get_character_quests(campaign_id, character_id)
+            character_quests = await asyncio.to_thread(db_service.get_character_quests, campaign_id, character_id)
             background_tasks.add_task(cleanup_connections)
             return {
                 "success": True,
@@ -1293,12 +1281,12 @@ async def generate_character_content(request: dict, background_tasks: Background
         logger.info(f"Generating content for character {character_name} (ID: {character_id}) in campaign {campaign_id}")
         
         # Get campaign data for context
-        campaign = db_service.get_campaign_data(campaign_id)
+        campaign = await asyncio.to_thread(db_service.get_campaign_data, campaign_id)
         if not campaign:
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get character data
-        characters = db_service.get_campaign_characters(campaign_id)
+        characters = await asyncio.to_thread(db_service.get_campaign_characters, campaign_id)
         character = None
         for char in characters:
             if char.get("Id") == character_id:
@@ -1366,7 +1354,8 @@ async def generate_character_content(request: dict, background_tasks: Background
             portrait_url = None
         
         # Update character in database
-        update_result = db_service.update_character_content(
+        update_result = await asyncio.to_thread(
+            db_service.update_character_content,
             character_id=character_id,
             description=description,
             portrait_url=portrait_url  # Will be None if generation failed
@@ -1376,7 +1365,7 @@ async def generate_character_content(request: dict, background_tasks: Background
             logger.info(f"✅ Successfully updated character {character_name} with generated content")
             
             # Update character generation status to Completed
-            db_service.update_character_generation_status(campaign_id, "Completed")
+            await asyncio.to_thread(db_service.update_character_generation_status, campaign_id, "Completed")
             logger.info(f"✅ Updated character generation status to Completed for campaign {campaign_id}")
             
             return {
@@ -1390,7 +1379,7 @@ async def generate_character_content(request: dict, background_tasks: Background
             logger.error(f"❌ Failed to update character {character_name} in database")
             
             # Update character generation status to Failed
-            db_service.update_character_generation_status(campaign_id, "Failed", "Failed to update character in database")
+            await asyncio.to_thread(db_service.update_character_generation_status, campaign_id, "Failed", "Failed to update character in database")
             
             return {
                 "success": False,
@@ -1404,7 +1393,7 @@ async def generate_character_content(request: dict, background_tasks: Background
         
         # Update character generation status to Failed
         try:
-            db_service.update_character_generation_status(campaign_id, "Failed", str(e))
+            await asyncio.to_thread(db_service.update_character_generation_status, campaign_id, "Failed", str(e))
             logger.info(f"✅ Updated character generation status to Failed for campaign {campaign_id}")
         except Exception as update_error:
             logger.error(f"❌ Failed to update character generation status: {str(update_error)}")
@@ -1522,19 +1511,19 @@ async def generate_missing_images_task(campaign_id: int):
         logger.info(f"🔄 Starting background image generation for campaign {campaign_id}")
         
         # Update status to ImagesInProgress before starting
-        db_service.update_campaign_content_status(campaign_id, "ImagesInProgress")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "ImagesInProgress")
         
         results = await element_manager.generate_missing_images_for_campaign(campaign_id)
         
         # Update status to ImagesCompleted when all images are done
-        db_service.update_campaign_content_status(campaign_id, "ImagesCompleted")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "ImagesCompleted")
         
         logger.info(f"✅ Background image generation completed for campaign {campaign_id}: {results}")
         logger.info(f"✅ Campaign {campaign_id} is now ready to play!")
         
     except Exception as e:
         logger.error(f"❌ Error in background image generation for campaign {campaign_id}: {str(e)}")
-        db_service.update_campaign_content_status(campaign_id, "Failed", str(e))
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "Failed", str(e))
 
 @app.post("/api/gamemaster/campaign/{campaign_id}/generate_content")
 async def generate_campaign_content(campaign_id: int, background_tasks: BackgroundTasks):
@@ -1560,7 +1549,7 @@ async def get_campaign_content_status(campaign_id: int):
     """Get the status of campaign content generation"""
     try:
         # Get campaign from database
-        campaign = db_service.get_campaign_data(campaign_id)
+        campaign = await asyncio.to_thread(db_service.get_campaign_data, campaign_id)
         if not campaign:
             return {"success": False, "message": "Campaign not found"}
         
@@ -1586,14 +1575,14 @@ async def generate_campaign_content_task(campaign_id: int):
         logger.info(f"🚀 Starting comprehensive content generation for campaign {campaign_id}")
         
         # Get campaign data
-        campaign = db_service.get_campaign_data(campaign_id)
+        campaign = await asyncio.to_thread(db_service.get_campaign_data, campaign_id)
         if not campaign:
             logger.error(f"Campaign {campaign_id} not found")
-            db_service.update_campaign_content_status(campaign_id, "Failed", "Campaign not found")
+            await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "Failed", "Campaign not found")
             return
         
         # Update status to in progress
-        db_service.update_campaign_content_status(campaign_id, "InProgress")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "InProgress")
         
         start_time = time.time()
         
@@ -1607,7 +1596,8 @@ async def generate_campaign_content_task(campaign_id: int):
             main_town_name = f"{campaign['Name']} Town"
             town_desc = f"The main settlement in the {campaign['Name']} region. A bustling town where adventurers gather to begin their quests."
             
-            town_location = db_service.create_campaign_location(
+            town_location = await asyncio.to_thread(
+                db_service.create_campaign_location,
                 campaign_id, 
                 main_town_name, 
                 "Town",
@@ -1664,32 +1654,31 @@ async def generate_campaign_content_task(campaign_id: int):
                         {"name": "Lost Ruins", "type": "Ruins", "desc": "Ancient structures holding forgotten knowledge.", "discovered": False}
                     ]
                 
+                # Toutes les sous-locations en un seul INSERT multi-VALUES
                 created_sub_locations = []
-                for sub_loc in sub_locations:
-                    try:
-                        location_result = db_service.create_campaign_location(
-                            campaign_id,
-                            sub_loc["name"],
-                            sub_loc["type"],
-                            description=sub_loc["desc"],
-                            short_description=sub_loc["desc"][:100],
-                            is_discovered=sub_loc["discovered"],
-                            is_accessible=True,
-                            parent_location_id=main_town_id,
-                            climate="Temperate",
-                            terrain="Plains" if sub_loc["type"] in ["Inn", "Market", "Temple"] else "Wilderness",
-                            population="Small"
-                        )
-                        if location_result:
-                            created_sub_locations.append({
-                                "id": location_result["Id"],
-                                "name": sub_loc["name"],
-                                "type": sub_loc["type"]
-                            })
-                            locations_created += 1
-                            logger.info(f"✅ Created sub-location: {sub_loc['name']}")
-                    except Exception as e:
-                        logger.error(f"Error creating sub-location {sub_loc['name']}: {e}")
+                location_results = await asyncio.to_thread(db_service.create_campaign_locations_bulk, campaign_id, [
+                    {
+                        'name': sub_loc["name"],
+                        'type': sub_loc["type"],
+                        'description': sub_loc["desc"],
+                        'short_description': sub_loc["desc"][:100],
+                        'is_discovered': sub_loc["discovered"],
+                        'is_accessible': True,
+                        'parent_location_id': main_town_id,
+                        'climate': "Temperate",
+                        'terrain': "Plains" if sub_loc["type"] in ["Inn", "Market", "Temple"] else "Wilderness",
+                        'population': "Small"
+                    }
+                    for sub_loc in sub_locations
+                ]) or []
+                for sub_loc, location_result in zip(sub_locations, location_results):
+                    created_sub_locations.append({
+                        "id": location_result["Id"],
+                        "name": sub_loc["name"],
+                        "type": sub_loc["type"]
+                    })
+                    locations_created += 1
+                    logger.info(f"✅ Created sub-location: {sub_loc['name']}")
                 
                 # ✅ NOUVEAU : NPCs dynamiques selon le thème et les locations générées
                 logger.info(f"🎨 Generating NPCs based on campaign theme and created locations")
@@ -1775,7 +1764,8 @@ async def generate_campaign_content_task(campaign_id: int):
                             'current_location': npc_data["location"],
                             'status': 'Active'
                         }
-                        npc_result = db_service.create_campaign_npc(
+                        npc_result = await asyncio.to_thread(
+                            db_service.create_campaign_npc,
                             campaign_id,
                             npc_data["name"],
                             npc_data["type"],
@@ -1829,34 +1819,31 @@ async def generate_campaign_content_task(campaign_id: int):
                 
                 logger.info(f"✅ Generated {len(quest_templates)} theme-appropriate quests")
                 
-                for quest_data in quest_templates:
-                    try:
-                        quest_kwargs = {
-                            'title': quest_data["title"],
-                            'description': quest_data["desc"],
-                            'short_description': quest_data["desc"][:100],
-                            'type': quest_data["type"],
-                            'status': 'Available',
-                            'reward': 'Gold and Experience',
-                            'requirements': 'None',
-                            'required_level': 1,
-                            'quest_giver': quest_data["giver"],
-                            'difficulty': quest_data["difficulty"]
-                        }
-                        
-                        quest_result = db_service.create_campaign_quest(campaign_id, **quest_kwargs)
-                        if quest_result:
-                            quests_created += 1
-                            logger.info(f"✅ Created quest: {quest_data['title']} from {quest_data['giver']}")
-                    except Exception as e:
-                        logger.error(f"Error creating quest {quest_data['title']}: {e}")
+                quest_results = await asyncio.to_thread(db_service.create_campaign_quests_bulk, campaign_id, [
+                    {
+                        'title': quest_data["title"],
+                        'description': quest_data["desc"],
+                        'short_description': quest_data["desc"][:100],
+                        'type': quest_data["type"],
+                        'status': 'Available',
+                        'reward': 'Gold and Experience',
+                        'requirements': 'None',
+                        'required_level': 1,
+                        'quest_giver': quest_data["giver"],
+                        'difficulty': quest_data["difficulty"]
+                    }
+                    for quest_data in quest_templates
+                ]) or []
+                for quest_data, _ in zip(quest_templates, quest_results):
+                    quests_created += 1
+                    logger.info(f"✅ Created quest: {quest_data['title']} from {quest_data['giver']}")
                 
                 # 5. Set starting location for characters
                 try:
-                    characters = db_service.get_campaign_characters(campaign_id)
+                    characters = await asyncio.to_thread(db_service.get_campaign_characters, campaign_id)
                     for character in characters:
                         # Use the function from db_service that handles character location updates
-                        success = db_service.update_character_location(campaign_id, character["CharacterId"], "The Golden Dragon Inn")
+                        success = await asyncio.to_thread(db_service.update_character_location, campaign_id, character["CharacterId"], "The Golden Dragon Inn")
                         if success:
                             logger.info(f"✅ Set starting location for character {character['CharacterId']}")
                         else:
@@ -1882,7 +1869,7 @@ async def generate_campaign_content_task(campaign_id: int):
         await log_performance_metrics(campaign_id, performance_data)
         
         # Update content generation status to completed
-        db_service.update_campaign_content_status(campaign_id, "Completed")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "Completed")
         
         logger.info(f"✅ Comprehensive content generation completed for campaign {campaign_id} in {total_time:.2f}s")
         logger.info(f"📊 Created: {locations_created} locations, {npcs_created} NPCs, {quests_created} quests")
@@ -1897,13 +1884,13 @@ async def generate_campaign_content_task(campaign_id: int):
         
     except Exception as e:
         logger.error(f"Error generating campaign content for {campaign_id}: {str(e)}")
-        db_service.update_campaign_content_status(campaign_id, "Failed", str(e))
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "Failed", str(e))
 
 async def generate_images_background(campaign_id: int):
     """Generate images in background without blocking main completion"""
     try:
         # Set image generation status
-        db_service.update_campaign_content_status(campaign_id, "ImagesInProgress")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "ImagesInProgress")
         
         # Generate missing images
         results = await element_manager.generate_missing_images_for_campaign(campaign_id)
@@ -1911,13 +1898,13 @@ async def generate_images_background(campaign_id: int):
         logger.info(f"🎨 Background image generation completed: {results}")
         
         # Update final status to ImagesCompleted (always, even if some images failed)
-        db_service.update_campaign_content_status(campaign_id, "ImagesCompleted")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "ImagesCompleted")
         
     except Exception as e:
         logger.error(f"Error in background image generation: {e}")
         # Always set to ImagesCompleted to prevent infinite polling in frontend
         # Images can be generated later manually
-        db_service.update_campaign_content_status(campaign_id, "ImagesCompleted")
+        await asyncio.to_thread(db_service.update_campaign_content_status, campaign_id, "ImagesCompleted")
 
 async def log_performance_metrics(campaign_id: int, results: Dict[str, Any]):
     """Log performance metrics for monitoring and optimization"""
@@ -1962,7 +1949,7 @@ async def auto_assign_character_locations(campaign_id: int):
         logger.info(f"🎯 Checking character locations for campaign {campaign_id} (no automatic assignment)")
         
         # Get campaign characters
-        characters = db_service.get_campaign_characters(campaign_id)
+        characters = await asyncio.to_thread(db_service.get_campaign_characters, campaign_id)
         if not characters:
             logger.info(f"No characters found for campaign {campaign_id}")
             return
@@ -1990,12 +1977,13 @@ async def initialize_campaign_game_state(campaign_id: int):
         await auto_assign_character_locations(campaign_id)
         
         # Initialize discovered locations (main town is always discovered)
-        locations = db_service.get_campaign_locations(campaign_id)
+        locations = await asyncio.to_thread(db_service.get_campaign_locations, campaign_id)
         main_town = next((loc for loc in locations if loc.get("Type") == "Town"), None)
         
         if main_town:
             # Ensure main town is discovered and accessible
-            db_service.update_location(
+            await asyncio.to_thread(
+                db_service.update_location,
                 main_town["Id"], 
                 is_discovered=True, 
                 is_accessible=True
@@ -2003,10 +1991,10 @@ async def initialize_campaign_game_state(campaign_id: int):
             logger.info(f"✅ Main town {main_town['Name']} marked as discovered")
         
         # Initialize quest states (all start as "Available" but not yet "Discovered")
-        quests = db_service.get_campaign_quests(campaign_id)
+        quests = await asyncio.to_thread(db_service.get_campaign_quests, campaign_id)
         for quest in quests:
             if quest.get("Status") != "Available":
-                db_service.update_quest(quest["Id"], status="Available")
+                await asyncio.to_thread(db_service.update_quest, quest["Id"], status="Available")
         
         logger.info(f"🎮 Game state initialization completed for campaign {campaign_id}")
         
@@ -2018,14 +2006,14 @@ async def handle_quest_discovery(campaign_id: int, npc_name: str, location_name:
     """Handle quest discovery when player interacts with quest-giving NPC"""
     try:
         # Find quests given by this NPC
-        quests = db_service.get_campaign_quests(campaign_id)
+        quests = await asyncio.to_thread(db_service.get_campaign_quests, campaign_id)
         npc_quests = [q for q in quests if q.get("QuestGiver") == npc_name]
         
         discovered_quests = []
         for quest in npc_quests:
             if quest.get("Status") == "Available":
                 # Mark quest as discovered
-                db_service.update_quest(quest["Id"], status="Discovered")
+                await asyncio.to_thread(db_service.update_quest, quest["Id"], status="Discovered")
                 discovered_quests.append(quest)
                 logger.info(f"🔍 Quest '{quest['Title']}' discovered from {npc_name}")
         
@@ -2088,7 +2076,7 @@ async def generate_element_image(campaign_id: int, element_type: str, element_id
         
         if element_type == 'npc':
             # Get NPC data
-            npcs = db_service.get_campaign_npcs(campaign_id)
+            npcs = await asyncio.to_thread(db_service.get_campaign_npcs, campaign_id)
             npc = next((n for n in npcs if n['Id'] == element_id), None)
             
             if not npc:
@@ -2106,7 +2094,7 @@ async def generate_element_image(campaign_id: int, element_type: str, element_id
             npc_data['id'] = element_id  # Ajouter l'ID pour le stockage
             portrait_path = await element_manager._generate_npc_portrait(npc_data, campaign_id)
             if portrait_path:
-                db_service.update_npc(element_id, portrait_url=portrait_path)
+                await asyncio.to_thread(db_service.update_npc, element_id, portrait_url=portrait_path)
                 logger.info(f"✅ Portrait generated and stored for NPC {npc['Name']}: {portrait_path}")
                 return {
                     "success": True,
@@ -2120,7 +2108,7 @@ async def generate_element_image(campaign_id: int, element_type: str, element_id
         
         elif element_type == 'location':
             # Get location data
-            locations = db_service.get_campaign_locations(campaign_id)
+            locations = await asyncio.to_thread(db_service.get_campaign_locations, campaign_id)
             location = next((l for l in locations if l['Id'] == element_id), None)
             
             if not location:
@@ -2136,7 +2124,7 @@ async def generate_element_image(campaign_id: int, element_type: str, element_id
             location_data['id'] = element_id  # Ajouter l'ID pour le stockage
             image_path = await element_manager._generate_location_image(location_data, campaign_id)
             if image_path:
-                db_service.update_location(element_id, image_url=image_path)
+                await asyncio.to_thread(db_service.update_location, element_id, image_url=image_path)
                 logger.info(f"✅ Image generated and stored for location {location['Name']}: {image_path}")
                 return {
                     "success": True,
@@ -2215,18 +2203,17 @@ async def log_ai_metric(request: AIMetricRequest):
     """Log AI metric for monitoring"""
     try:
         # Log to database
-        cursor = db_service.game_conn.cursor()
-        cursor.execute("""
-            INSERT INTO "AIMetrics" (
-                "MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", 
-                "CampaignId", "UserId", "Timestamp", "Metadata"
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            request.metric_name, request.metric_value, request.metric_unit,
-            request.model_name, request.provider, request.campaign_id,
-            request.user_id, datetime.now(), json.dumps(request.metadata) if request.metadata else None
-        ))
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO "AIMetrics" (
+                    "MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", 
+                    "CampaignId", "UserId", "Timestamp", "Metadata"
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                request.metric_name, request.metric_value, request.metric_unit,
+                request.model_name, request.provider, request.campaign_id,
+                request.user_id, datetime.now(), json.dumps(request.metadata) if request.metadata else None
+            ))
         
         logger.info(f"Logged AI metric: {request.metric_name} = {request.metric_value}")
         return {"status": "success", "message": "Metric logged successfully"}
@@ -2239,20 +2226,19 @@ async def log_ai_log(request: AILogRequest):
     """Log AI operation log for monitoring"""
     try:
         # Log to database
-        cursor = db_service.game_conn.cursor()
-        cursor.execute("""
-            INSERT INTO "AILogs" (
-                "LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider",
-                "CampaignId", "UserId", "RequestId", "ResponseTime", "TokensUsed",
-                "Cost", "Timestamp", "StackTrace", "Metadata"
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            request.level, request.message, request.category, request.model_name,
-            request.provider, request.campaign_id, request.user_id, request.request_id,
-            request.response_time, request.tokens_used, request.cost, datetime.now(),
-            request.stack_trace, json.dumps(request.metadata) if request.metadata else None
-        ))
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO "AILogs" (
+                    "LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider",
+                    "CampaignId", "UserId", "RequestId", "ResponseTime", "TokensUsed",
+                    "Cost", "Timestamp", "StackTrace", "Metadata"
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                request.level, request.message, request.category, request.model_name,
+                request.provider, request.campaign_id, request.user_id, request.request_id,
+                request.response_time, request.tokens_used, request.cost, datetime.now(),
+                request.stack_trace, json.dumps(request.metadata) if request.metadata else None
+            ))
         
         # Also log to application logs
         log_level = getattr(logging, request.level.upper(), logging.INFO)
@@ -2268,18 +2254,17 @@ async def create_ai_alert(request: AIAlertRequest):
     """Create AI alert for monitoring"""
     try:
         # Log to database
-        cursor = db_service.game_conn.cursor()
-        cursor.execute("""
-            INSERT INTO "AIAlerts" (
-                "AlertType", "AlertLevel", "AlertMessage", "AlertTitle",
-                "CampaignId", "UserId", "CreatedAt", "Metadata"
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            request.alert_type, request.level, request.message, request.title,
-            request.campaign_id, request.user_id, datetime.now(),
-            json.dumps(request.metadata) if request.metadata else None
-        ))
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO "AIAlerts" (
+                    "AlertType", "AlertLevel", "AlertMessage", "AlertTitle",
+                    "CampaignId", "UserId", "CreatedAt", "Metadata"
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                request.alert_type, request.level, request.message, request.title,
+                request.campaign_id, request.user_id, datetime.now(),
+                json.dumps(request.metadata) if request.metadata else None
+            ))
         
         logger.warning(f"AI Alert [{request.level}]: {request.message}")
         return {"status": "success", "message": "Alert created successfully"}
@@ -2292,18 +2277,17 @@ async def log_ai_cost(request: AICostRequest):
     """Log AI cost for monitoring"""
     try:
         # Log to database
-        cursor = db_service.game_conn.cursor()
-        cursor.execute("""
-            INSERT INTO "AICosts" (
-                "Provider", "ModelName", "OperationType", "TokensUsed",
-                "CostPerToken", "TotalCost", "CampaignId", "UserId", "Date", "CreatedAt"
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            request.provider, request.model_name, request.operation_type,
-            request.tokens_used, request.cost_per_token, request.total_cost,
-            request.campaign_id, request.user_id, datetime.now().date(), datetime.now()
-        ))
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO "AICosts" (
+                    "Provider", "ModelName", "OperationType", "TokensUsed",
+                    "CostPerToken", "TotalCost", "CampaignId", "UserId", "Date", "CreatedAt"
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                request.provider, request.model_name, request.operation_type,
+                request.tokens_used, request.cost_per_token, request.total_cost,
+                request.campaign_id, request.user_id, datetime.now().date(), datetime.now()
+            ))
         
         logger.info(f"Logged AI cost: {request.provider}/{request.model_name} = ${request.total_cost}")
         return {"status": "success", "message": "Cost logged successfully"}
@@ -2318,51 +2302,49 @@ async def update_model_performance(request: AIModelPerformanceRequest):
         today = datetime.now().date()
         
         # Check if performance record exists for today
-        cursor = db_service.game_conn.cursor()
-        cursor.execute("""
-            SELECT "Id", "AverageResponseTime", "SuccessRate", "ErrorRate", 
-                   "TotalRequests", "TotalErrors"
-            FROM "AIModelPerformance"
-            WHERE "ModelName" = %s AND "Provider" = %s AND "Date" = %s
-        """, (request.model_name, request.provider, today))
-        
-        result = cursor.fetchone()
-        
-        if result:
-            # Update existing record
-            perf_id, avg_response, success_rate, error_rate, total_requests, total_errors = result
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT "Id", "AverageResponseTime", "SuccessRate", "ErrorRate", 
+                       "TotalRequests", "TotalErrors"
+                FROM "AIModelPerformance"
+                WHERE "ModelName" = %s AND "Provider" = %s AND "Date" = %s
+            """, (request.model_name, request.provider, today))
             
-            total_requests += 1
-            total_errors += 0 if request.is_success else 1
+            result = cursor.fetchone()
             
-            # Calculate new averages
-            new_avg_response = (avg_response * (total_requests - 1) + request.response_time) / total_requests
-            new_success_rate = ((total_requests - total_errors) * 100.0) / total_requests
-            new_error_rate = (total_errors * 100.0) / total_requests
+            if result:
+                # Update existing record
+                perf_id, avg_response, success_rate, error_rate, total_requests, total_errors = result
             
-            cursor.execute("""
-                UPDATE "AIModelPerformance"
-                SET "AverageResponseTime" = %s, "SuccessRate" = %s, "ErrorRate" = %s,
-                    "TotalRequests" = %s, "TotalErrors" = %s, "UpdatedAt" = %s
-                WHERE "Id" = %s
-            """, (new_avg_response, new_success_rate, new_error_rate,
-                  total_requests, total_errors, datetime.now(), perf_id))
-        else:
-            # Create new record
-            success_rate = 100.0 if request.is_success else 0.0
-            error_rate = 0.0 if request.is_success else 100.0
-            total_requests = 1
-            total_errors = 0 if request.is_success else 1
+                total_requests += 1
+                total_errors += 0 if request.is_success else 1
             
-            cursor.execute("""
-                INSERT INTO "AIModelPerformance" (
-                    "ModelName", "Provider", "AverageResponseTime", "SuccessRate", "ErrorRate",
-                    "TotalRequests", "TotalErrors", "Date", "CreatedAt"
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (request.model_name, request.provider, request.response_time,
-                  success_rate, error_rate, total_requests, total_errors, today, datetime.now()))
-        
-        cursor.close()
+                # Calculate new averages
+                new_avg_response = (avg_response * (total_requests - 1) + request.response_time) / total_requests
+                new_success_rate = ((total_requests - total_errors) * 100.0) / total_requests
+                new_error_rate = (total_errors * 100.0) / total_requests
+            
+                cursor.execute("""
+                    UPDATE "AIModelPerformance"
+                    SET "AverageResponseTime" = %s, "SuccessRate" = %s, "ErrorRate" = %s,
+                        "TotalRequests" = %s, "TotalErrors" = %s, "UpdatedAt" = %s
+                    WHERE "Id" = %s
+                """, (new_avg_response, new_success_rate, new_error_rate,
+                      total_requests, total_errors, datetime.now(), perf_id))
+            else:
+                # Create new record
+                success_rate = 100.0 if request.is_success else 0.0
+                error_rate = 0.0 if request.is_success else 100.0
+                total_requests = 1
+                total_errors = 0 if request.is_success else 1
+            
+                cursor.execute("""
+                    INSERT INTO "AIModelPerformance" (
+                        "ModelName", "Provider", "AverageResponseTime", "SuccessRate", "ErrorRate",
+                        "TotalRequests", "TotalErrors", "Date", "CreatedAt"
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (request.model_name, request.provider, request.response_time,
+                      success_rate, error_rate, total_requests, total_errors, today, datetime.now()))
         
         logger.info(f"Updated model performance: {request.model_name} ({request.provider})")
         return {"status": "success", "message": "Performance updated successfully"}
@@ -2374,61 +2356,58 @@ async def update_model_performance(request: AIModelPerformanceRequest):
 async def get_monitoring_dashboard():
     """Get monitoring dashboard data"""
     try:
-        cursor = db_service.game_conn.cursor()
-        
-        # Get recent metrics (last 7 days)
-        week_ago = datetime.now() - timedelta(days=7)
-        cursor.execute("""
-            SELECT "MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "Timestamp"
-            FROM "AIMetrics"
-            WHERE "Timestamp" >= %s
-            ORDER BY "Timestamp" DESC
-            LIMIT 50
-        """, (week_ago,))
-        recent_metrics = cursor.fetchall()
-        
-        # Get recent logs (last 7 days)
-        cursor.execute("""
-            SELECT "LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider", "Timestamp"
-            FROM "AILogs"
-            WHERE "Timestamp" >= %s
-            ORDER BY "Timestamp" DESC
-            LIMIT 100
-        """, (week_ago,))
-        recent_logs = cursor.fetchall()
-        
-        # Get active alerts
-        cursor.execute("""
-            SELECT "AlertType", "AlertLevel", "AlertMessage", "CreatedAt"
-            FROM "AIAlerts"
-            WHERE "IsResolved" = false
-            ORDER BY "CreatedAt" DESC
-            LIMIT 20
-        """)
-        active_alerts = cursor.fetchall()
-        
-        # Get daily costs (last 30 days)
-        month_ago = datetime.now() - timedelta(days=30)
-        cursor.execute("""
-            SELECT "Date", SUM("TotalCost") as total_cost, SUM("TokensUsed") as total_tokens
-            FROM "AICosts"
-            WHERE "Date" >= %s
-            GROUP BY "Date"
-            ORDER BY "Date"
-        """, (month_ago.date(),))
-        daily_costs = cursor.fetchall()
-        
-        # Get model performance (last 7 days)
-        cursor.execute("""
-            SELECT "ModelName", "Provider", "AverageResponseTime", "SuccessRate", "ErrorRate", "Date"
-            FROM "AIModelPerformance"
-            WHERE "Date" >= %s
-            ORDER BY "Date" DESC
-            LIMIT 10
-        """, (week_ago.date(),))
-        model_performance = cursor.fetchall()
-        
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            # Get recent metrics (last 7 days)
+            week_ago = datetime.now() - timedelta(days=7)
+            cursor.execute("""
+                SELECT "MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "Timestamp"
+                FROM "AIMetrics"
+                WHERE "Timestamp" >= %s
+                ORDER BY "Timestamp" DESC
+                LIMIT 50
+            """, (week_ago,))
+            recent_metrics = cursor.fetchall()
+            
+            # Get recent logs (last 7 days)
+            cursor.execute("""
+                SELECT "LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider", "Timestamp"
+                FROM "AILogs"
+                WHERE "Timestamp" >= %s
+                ORDER BY "Timestamp" DESC
+                LIMIT 100
+            """, (week_ago,))
+            recent_logs = cursor.fetchall()
+            
+            # Get active alerts
+            cursor.execute("""
+                SELECT "AlertType", "AlertLevel", "AlertMessage", "CreatedAt"
+                FROM "AIAlerts"
+                WHERE "IsResolved" = false
+                ORDER BY "CreatedAt" DESC
+                LIMIT 20
+            """)
+            active_alerts = cursor.fetchall()
+            
+            # Get daily costs (last 30 days)
+            month_ago = datetime.now() - timedelta(days=30)
+            cursor.execute("""
+                SELECT "Date", SUM("TotalCost") as total_cost, SUM("TokensUsed") as total_tokens
+                FROM "AICosts"
+                WHERE "Date" >= %s
+                GROUP BY "Date"
+                ORDER BY "Date"
+            """, (month_ago.date(),))
+            daily_costs = cursor.fetchall()
+            
+            # Get model performance (last 7 days)
+            cursor.execute("""
+                SELECT "ModelName", "Provider", "AverageResponseTime", "SuccessRate", "ErrorRate", "Date"
+                FROM "AIModelPerformance"
+                WHERE "Date" >= %s
+                ORDER BY "Date" DESC
+                LIMIT 10
+            """, (week_ago.date(),))
+            model_performance = cursor.fetchall()
         
         return {
             "status": "success",
@@ -2449,36 +2428,34 @@ async def get_metrics(from_date: Optional[str] = None, to_date: Optional[str] =
                      metric_name: Optional[str] = None, model_name: Optional[str] = None):
     """Get AI metrics with filters"""
     try:
-        cursor = db_service.game_conn.cursor()
-        
-        query = """
-            SELECT "MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "Timestamp"
-            FROM "AIMetrics"
-            WHERE 1=1
-        """
-        params = []
-        
-        if from_date:
-            query += " AND \"Timestamp\" >= %s"
-            params.append(datetime.fromisoformat(from_date))
-        
-        if to_date:
-            query += " AND \"Timestamp\" <= %s"
-            params.append(datetime.fromisoformat(to_date))
-        
-        if metric_name:
-            query += " AND \"MetricName\" = %s"
-            params.append(metric_name)
-        
-        if model_name:
-            query += " AND \"ModelName\" = %s"
-            params.append(model_name)
-        
-        query += " ORDER BY \"Timestamp\" DESC"
-        
-        cursor.execute(query, params)
-        metrics = cursor.fetchall()
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            query = """
+                SELECT "MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "Timestamp"
+                FROM "AIMetrics"
+                WHERE 1=1
+            """
+            params = []
+            
+            if from_date:
+                query += " AND \"Timestamp\" >= %s"
+                params.append(datetime.fromisoformat(from_date))
+            
+            if to_date:
+                query += " AND \"Timestamp\" <= %s"
+                params.append(datetime.fromisoformat(to_date))
+            
+            if metric_name:
+                query += " AND \"MetricName\" = %s"
+                params.append(metric_name)
+            
+            if model_name:
+                query += " AND \"ModelName\" = %s"
+                params.append(model_name)
+            
+            query += " ORDER BY \"Timestamp\" DESC"
+            
+            cursor.execute(query, params)
+            metrics = cursor.fetchall()
         
         return {"status": "success", "data": metrics}
     except Exception as e:
@@ -2490,36 +2467,34 @@ async def get_logs(from_date: Optional[str] = None, to_date: Optional[str] = Non
                   level: Optional[str] = None, category: Optional[str] = None):
     """Get AI logs with filters"""
     try:
-        cursor = db_service.game_conn.cursor()
-        
-        query = """
-            SELECT "LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider", "Timestamp"
-            FROM "AILogs"
-            WHERE 1=1
-        """
-        params = []
-        
-        if from_date:
-            query += " AND \"Timestamp\" >= %s"
-            params.append(datetime.fromisoformat(from_date))
-        
-        if to_date:
-            query += " AND \"Timestamp\" <= %s"
-            params.append(datetime.fromisoformat(to_date))
-        
-        if level:
-            query += " AND \"LogLevel\" = %s"
-            params.append(level)
-        
-        if category:
-            query += " AND \"LogCategory\" = %s"
-            params.append(category)
-        
-        query += " ORDER BY \"Timestamp\" DESC"
-        
-        cursor.execute(query, params)
-        logs = cursor.fetchall()
-        cursor.close()
+        with db_service.game_connection() as conn, conn.cursor() as cursor:
+            query = """
+                SELECT "LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider", "Timestamp"
+                FROM "AILogs"
+                WHERE 1=1
+            """
+            params = []
+            
+            if from_date:
+                query += " AND \"Timestamp\" >= %s"
+                params.append(datetime.fromisoformat(from_date))
+            
+            if to_date:
+                query += " AND \"Timestamp\" <= %s"
+                params.append(datetime.fromisoformat(to_date))
+            
+            if level:
+                query += " AND \"LogLevel\" = %s"
+                params.append(level)
+            
+            if category:
+                query += " AND \"LogCategory\" = %s"
+                params.append(category)
+            
+            query += " ORDER BY \"Timestamp\" DESC"
+            
+            cursor.execute(query, params)
+            logs = cursor.fetchall()
         
         return {"status": "success", "data": logs}
     except Exception as e:
@@ -2569,11 +2544,8 @@ async def monitoring_middleware(request: Request, call_next):
     # Log metrics for AI endpoints
     if request.url.path.startswith("/api/gamemaster") or request.url.path.startswith("/generate"):
         try:
-            # Check if database connection is still open before logging
-            if db_service.game_conn and not db_service.game_conn.closed:
-                # Log comprehensive metrics
-                cursor = db_service.game_conn.cursor()
-                
+            # Log comprehensive metrics on a pooled connection
+            with db_service.game_connection() as conn, conn.cursor() as cursor:
                 # Log response time metric with context
                 cursor.execute("""
                     INSERT INTO "AIMetrics" ("MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "CampaignId", "UserId", "Timestamp", "Metadata")
@@ -2605,21 +2577,6 @@ async def monitoring_middleware(request: Request, call_next):
                     response_time, datetime.now(),
                     json.dumps({"status_code": response.status_code, "success": is_success})
                 ))
-                
-                cursor.close()
-            else:
-                # Connection is closed, try to reconnect
-                try:
-                    db_service.get_game_db_connection()
-                    if db_service.game_conn and not db_service.game_conn.closed:
-                        cursor = db_service.game_conn.cursor()
-                        cursor.execute("""
-                            INSERT INTO "AIMetrics" ("MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "Timestamp")
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, ("response_time", response_time, "ms", model_name, current_llm_provider, datetime.now()))
-                        cursor.close()
-                except Exception as reconnect_error:
-                    logger.debug(f"Could not reconnect for metrics logging: {reconnect_error}")
         except Exception as e:
             logger.debug(f"Metrics logging skipped: {e}")
     
@@ -2638,7 +2595,7 @@ async def update_character_location(campaign_id: int, character_id: int, request
             raise HTTPException(status_code=400, detail="Location is required")
         
         # Update character location in database
-        success = db_service.update_character_location(campaign_id, character_id, new_location)
+        success = await asyncio.to_thread(db_service.update_character_location, campaign_id, character_id, new_location)
         
         if success:
             logger.info(f"🗺️ Updated character {character_id} location to {new_location}")
@@ -2666,7 +2623,7 @@ async def update_character_location(campaign_id: int, character_id: int, request
 async def get_character_location(campaign_id: int, character_id: int, background_tasks: BackgroundTasks):
     """Get character's current location"""
     try:
-        characters = db_service.get_campaign_characters(campaign_id)
+        characters = await asyncio.to_thread(db_service.get_campaign_characters, campaign_id)
         character = next((c for c in characters if c.get("Id") == character_id), None)
         
         if not character:
@@ -2705,7 +2662,7 @@ async def sync_all_character_locations(campaign_id: int, request: dict, backgrou
         for character_id, location in character_locations.items():
             try:
                 character_id_int = int(character_id)
-                success = db_service.update_character_location(campaign_id, character_id_int, location)
+                success = await asyncio.to_thread(db_service.update_character_location, campaign_id, character_id_int, location)
                 if success:
                     updated_count += 1
                     logger.info(f"🔄 Synced character {character_id_int} location to {location}")
@@ -2737,7 +2694,7 @@ async def sync_all_character_locations(campaign_id: int, request: dict, backgrou
 async def get_characters_by_location(campaign_id: int, background_tasks: BackgroundTasks):
     """Get characters grouped by their current locations"""
     try:
-        characters = db_service.get_campaign_characters(campaign_id)
+        characters = await asyncio.to_thread(db_service.get_campaign_characters, campaign_id)
         locations_data = {}
         
         for character in characters:
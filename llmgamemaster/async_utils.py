@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import time
 from typing import List, Dict, Any, Callable, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -6,6 +7,17 @@
 
 logger = logging.getLogger(__name__)
 
+async def db_call(func: Callable, *args, **kwargs) -> Any:
+    """
+    Exécute un appel bloquant à la base dans l'exécuteur par défaut de la boucle
+    (comme asyncio.to_thread, sans copier le contexte à chaque appel : DBService n'en dépend pas)
+    """
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        func = functools.partial(func, *args, **kwargs)
+        args = ()
+    return await loop.run_in_executor(None, func, *args)
+
 class ContentGenerationOptimizer:
     """Optimiseur pour la génération de contenu avec gestion intelligente du parallélisme"""
     
@@ -13,6 +25,8 @@ def __init__(self, max_workers: int = 4, batch_size: int = 3):
         self.max_workers = max_workers
         self.batch_size = batch_size
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Tâches d'images en arrière-plan : la référence les protège du ramasse-miettes jusqu'à leur fin
+        self._background_tasks = set()
         
     async def generate_content_parallel(self, 
                                       campaign: Dict[str, Any], 
@@ -78,7 +92,9 @@ async def generate_content_parallel(self,
             # PHASE 4: Génération des images en arrière-plan (non-bloquant)
             if "images" in content_types:
                 logger.info("🎨 Starting background image generation")
-                asyncio.create_task(self._generate_images_background(campaign["Id"], results))
+                task = asyncio.create_task(self._generate_images_background(campaign["Id"], results))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
                 
             # Calcul des métriques de performance
             total_time = time.time() - start_time
@@ -252,48 +268,44 @@ async def _generate_images_background(self,
                                         campaign_id: int, 
                                         content_results: Dict[str, Any]) -> None:
         """Génère les images en arrière-plan de manière non-bloquante"""
-        from app import db_service, element_manager
+        from app import db_service
         
         try:
             logger.info(f"🎨 Starting background image generation for campaign {campaign_id}")
             
-            # Mettre à jour le statut
-            db_service.update_campaign_content_status(campaign_id, "ImagesInProgress")
-            
-            # Créer les tâches d'images en parallèle
-            image_tasks = []
-            
-            # Images des NPCs
-            for npc in content_results.get("npcs", []):
-                if not npc.get('portrait_url'):
-                    task = asyncio.create_task(self._generate_npc_image(npc))
-                    image_tasks.append(task)
+            # Mettre à jour le statut (écritures en base hors de la boucle, comme les images)
+            await db_call(db_service.update_campaign_content_status, campaign_id, "ImagesInProgress")
             
-            # Images des locations
-            for location in content_results.get("locations", []):
-                if not location.get('image_url'):
-                    task = asyncio.create_task(self._generate_location_image(location))
-                    image_tasks.append(task)
+            # Images des NPCs et des locations
+            image_jobs = [
+                self._generate_npc_image(campaign_id, npc)
+                for npc in content_results.get("npcs", []) if not npc.get('portrait_url')
+            ]
+            image_jobs += [
+                self._generate_location_image(campaign_id, location)
+                for location in content_results.get("locations", []) if not location.get('image_url')
+            ]
             
-            # Exécuter par batches pour ne pas surcharger l'API
-            for batch in self._batch_tasks(image_tasks, 2):  # Batches plus petits pour les images
-                await asyncio.gather(*batch, return_exceptions=True)
-                await asyncio.sleep(1)  # Pause entre les batches pour respecter les rate limits
+            # Toutes les images sont lancées ensemble : le sémaphore de l'element_manager
+            # borne les appels simultanés à l'API, chaque place libérée est reprise aussitôt
+            await asyncio.gather(*image_jobs, return_exceptions=True)
             
             # Mettre à jour le statut final
-            db_service.update_campaign_content_status(campaign_id, "ImagesCompleted")
+            await db_call(db_service.update_campaign_content_status, campaign_id, "ImagesCompleted")
             logger.info(f"✅ Background image generation completed for campaign {campaign_id}")
             
         except Exception as e:
             logger.error(f"❌ Error in background image generation: {str(e)}")
-            db_service.update_campaign_content_status(campaign_id, "Failed", str(e))
+            await db_call(db_service.update_campaign_content_status, campaign_id, "Failed", str(e))
     
-    async def _generate_npc_image(self, npc: Dict[str, Any]) -> Optional[str]:
+    async def _generate_npc_image(self, campaign_id: int, npc: Dict[str, Any]) -> Optional[str]:
         """Génère une image pour un NPC"""
         try:
             from app import element_manager, db_service
+            from element_manager import NPC_KIND
             
             npc_data = {
+                'id': npc['id'],
                 'name': npc['name'],
                 'race': npc.get('race', 'Unknown'),
                 'class': npc.get('class', 'Unknown'),
@@ -301,9 +313,9 @@ async def _generate_npc_image(self, npc: Dict[str, Any]) -> Optional[str]:
                 'type': npc.get('type', 'Humanoid')
             }
             
-            portrait_url = element_manager._generate_npc_portrait(npc_data)
+            portrait_url = await element_manager._generate_missing_image(NPC_KIND, npc_data, campaign_id)
             if portrait_url:
-                db_service.update_npc(npc['id'], portrait_url=portrait_url)
+                await db_call(db_service.update_npc, npc['id'], portrait_url=portrait_url)
                 logger.info(f"✅ Portrait generated for NPC {npc['name']}")
                 return portrait_url
             else:
@@ -314,20 +326,22 @@ async def _generate_npc_image(self, npc: Dict[str, Any]) -> Optional[str]:
             logger.error(f"❌ Error generating portrait for NPC {npc.get('name')}: {str(e)}")
             return None
     
-    async def _generate_location_image(self, location: Dict[str, Any]) -> Optional[str]:
+    async def _generate_location_image(self, campaign_id: int, location: Dict[str, Any]) -> Optional[str]:
         """Génère une image pour une location"""
         try:
             from app import element_manager, db_service
+            from element_manager import LOCATION_KIND
             
             location_data = {
+                'id': location['id'],
                 'name': location['name'],
                 'type': location.get('type', 'Location'),
                 'description': location.get('description', '')
             }
             
-            image_url = element_manager._generate_location_image(location_data)
+            image_url = await element_manager._generate_missing_image(LOCATION_KIND, location_data, campaign_id)
             if image_url:
-                db_service.update_location(location['id'], image_url=image_url)
+                await db_call(db_service.update_location, location['id'], image_url=image_url)
                 logger.info(f"✅ Image generated for location {location['name']}")
                 return image_url
             else:
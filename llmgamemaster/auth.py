@@ -2,19 +2,18 @@
 Système d'authentification JWT pour l'API LLM GameMaster
 """
 import jwt
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
-from config import (
-    GAME_DB_HOST, GAME_DB_PORT, GAME_DB_NAME, GAME_DB_USER, GAME_DB_PASSWORD,
-    AUTH_DB_HOST, AUTH_DB_PORT, AUTH_DB_NAME, AUTH_DB_USER, AUTH_DB_PASSWORD,
-    JWT_SECRET_KEY, JWT_ALGORITHM, JWT_EXPIRATION_HOURS
-)
+from config import settings
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +22,69 @@
 # Bearer token security scheme
 security = HTTPBearer()
 
+# Cache des tokens déjà vérifiés (clé = empreinte du token) pour éviter
+# de re-décoder et re-vérifier la signature HMAC à chaque requête
+TOKEN_CACHE_TTL_SECONDS = 30
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+
+# Connexion persistante à la base d'authentification (AspNetUsers)
+_auth_conn = None
+
+# Requêtes préparées côté serveur à chaque (re)connexion : PostgreSQL
+# conserve le plan, les appels suivants ne font plus que l'EXECUTE.
+# La recherche se fait sur NormalizedEmail (email en majuscules, normalisé
+# par ASP.NET Identity) qui dispose déjà de l'index EmailIndex
+LOGIN_LOOKUP_STATEMENT = "auth_login_lookup"
+AUTH_PREPARED_STATEMENTS = (
+    f'''
+    PREPARE {LOGIN_LOOKUP_STATEMENT} (text) AS
+    SELECT "Id", "UserName", "Email", "PasswordHash", "EmailConfirmed",
+           ("LockoutEnd" IS NULL OR "LockoutEnd" <= now()) AS "NotLocked"
+    FROM "AspNetUsers"
+    WHERE "NormalizedEmail" = $1
+    ''',
+)
+
+
+def get_auth_db_connection():
+    """
+    Retourne la connexion persistante à la base d'authentification,
+    en la recréant (et en re-préparant les requêtes) si elle est fermée
+    """
+    global _auth_conn
+    if _auth_conn is None or _auth_conn.closed:
+        _auth_conn = psycopg2.connect(
+            host=settings.auth_db_host,
+            port=settings.auth_db_port,
+            database=settings.auth_db_name,
+            user=settings.auth_db_user,  # Utilisateur admin - SEULEMENT pour authentification
+            password=settings.auth_db_password,
+            cursor_factory=RealDictCursor
+        )
+        _auth_conn.autocommit = True
+        with _auth_conn.cursor() as cursor:
+            for statement in AUTH_PREPARED_STATEMENTS:
+                cursor.execute(statement)
+        # Le PID backend permet de repérer dans pg_stat_activity une fuite de connexions
+        logger.info(
+            f"Connected to Auth database at {settings.auth_db_host}:{settings.auth_db_port}/{settings.auth_db_name} "
+            f"(backend pid {_auth_conn.get_backend_pid()})"
+        )
+    return _auth_conn
+
+
+# Clé HS256 encodée une seule fois et paramètres de décodage constants, passés
+# tels quels à PyJWT (qui garde ses contrôles : exp, nbf, iat, aud, leeway)
+_SIGNING_KEY_BYTES = settings.jwt_secret_key.encode("utf-8")
+_JWT_ALGORITHMS = [settings.jwt_algorithm]
+_JWT_DECODE_OPTIONS = {"require": ["exp"]}
+
+
+def _token_cache_key(token: str) -> str:
+    """Empreinte compacte d'un token pour l'indexer dans le cache"""
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
+
 class JWTAuth:
     """Gestionnaire d'authentification JWT"""
     
@@ -30,18 +92,22 @@ class JWTAuth:
     def create_access_token(user_data: Dict[str, Any]) -> str:
         """
         Crée un token JWT pour un utilisateur
+        
+        Seules les clés id, email et username sont reprises dans les claims,
+        les autres clés de user_data sont ignorées.
         """
         try:
+            now = datetime.now(timezone.utc)
             payload = {
                 "user_id": user_data.get("id"),
                 "email": user_data.get("email"),
                 "username": user_data.get("username", ""),
-                "exp": datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS),
-                "iat": datetime.utcnow(),
+                "exp": now + timedelta(hours=settings.jwt_expiration_hours),
+                "iat": now,
                 "type": "access"
             }
             
-            token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+            token = jwt.encode(payload, _SIGNING_KEY_BYTES, algorithm=settings.jwt_algorithm)
             logger.info(f"JWT token created for user {user_data.get('email')}")
             return token
             
@@ -56,18 +122,28 @@ def create_access_token(user_data: Dict[str, Any]) -> str:
     def verify_token(token: str) -> Dict[str, Any]:
         """
         Vérifie et décode un token JWT
+        
+        Les tokens valides sont mis en cache quelques secondes pour éviter
+        de refaire le décodage et la vérification de signature à chaque appel.
         """
-        try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            
-            # Vérifier que le token n'est pas expiré
-            if datetime.utcnow() > datetime.fromtimestamp(payload["exp"]):
+        cache_key = _token_cache_key(token)
+        cached_payload = _token_cache.get(cache_key)
+        if cached_payload is not None:
+            if cached_payload["exp"] <= time.time():
+                _token_cache.pop(cache_key, None)
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Token expired"
                 )
+            return dict(cached_payload)
+        
+        try:
+            payload = jwt.decode(
+                token, _SIGNING_KEY_BYTES, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS
+            )
             
-            return payload
+            _token_cache[cache_key] = payload
+            return dict(payload)
             
         except jwt.ExpiredSignatureError:
             raise HTTPException(
@@ -87,14 +163,8 @@ def get_user_from_db(user_id: str) -> Optional[Dict[str, Any]]:
         Récupère les informations utilisateur depuis la base de données
         """
         try:
-            conn = psycopg2.connect(
-                host=AUTH_DB_HOST,
-                port=AUTH_DB_PORT,
-                database=AUTH_DB_NAME,
-                user=AUTH_DB_USER,  # Utilisateur admin - SEULEMENT pour authentification
-                password=AUTH_DB_PASSWORD,
-                cursor_factory=RealDictCursor
-            )
+            # Connexion persistante partagée avec /auth/login (jamais fermée ici)
+            conn = get_auth_db_connection()
             
             with conn.cursor() as cursor:
                 cursor.execute(
@@ -102,16 +172,14 @@ def get_user_from_db(user_id: str) -> Optional[Dict[str, Any]]:
                     (user_id,)
                 )
                 user = cursor.fetchone()
-                
-                if user:
-                    return {
-                        "id": user["Id"],
-                        "email": user["Email"],
-                        "username": user["UserName"],
-                        "email_confirmed": user["EmailConfirmed"]
-                    }
-                    
-            conn.close()
+            
+            if user:
+                return {
+                    "id": user["Id"],
+                    "email": user["Email"],
+                    "username": user["UserName"],
+                    "email_confirmed": user["EmailConfirmed"]
+                }
             return None
             
         except Exception as e:
@@ -119,13 +187,14 @@ def get_user_from_db(user_id: str) -> Optional[Dict[str, Any]]:
             return None
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+def authenticate_token(token: str) -> Dict[str, Any]:
     """
-    Dependency pour récupérer l'utilisateur actuel depuis le token JWT
+    Vérifie un token JWT et retourne l'utilisateur correspondant
+    Lève une HTTPException 401 si le token ou l'utilisateur est invalide
     """
     try:
         # Vérifier le token
-        payload = JWTAuth.verify_token(credentials.credentials)
+        payload = JWTAuth.verify_token(token)
         user_id = payload.get("user_id")
         
         if not user_id:
@@ -160,6 +229,26 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
 
 
+def authenticate_authorization_header(authorization: Optional[str]) -> Dict[str, Any]:
+    """
+    Variante de get_current_user travaillant directement sur l'en-tête
+    Authorization, pour les routes dont la seule tâche est de vérifier le token
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return authenticate_token(authorization[len("Bearer "):])
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    """
+    Dependency pour récupérer l'utilisateur actuel depuis le token JWT
+    """
+    return authenticate_token(credentials.credentials)
+
+
 async def get_optional_user(request: Request) -> Optional[Dict[str, Any]]:
     """
     Dependency optionnelle pour récupérer l'utilisateur si authentifié
@@ -191,40 +280,38 @@ async def validate_campaign_access(user: Dict[str, Any], campaign_id: int) -> bo
     """
     try:
         conn = psycopg2.connect(
-            host=GAME_DB_HOST,
-            port=GAME_DB_PORT,
-            database=GAME_DB_NAME,
-            user=GAME_DB_USER,
-            password=GAME_DB_PASSWORD,
+            host=settings.game_db_host,
+            port=settings.game_db_port,
+            database=settings.game_db_name,
+            user=settings.game_db_user,
+            password=settings.game_db_password,
             cursor_factory=RealDictCursor
         )
         
-        with conn.cursor() as cursor:
-            # Vérifier si l'utilisateur est le créateur de la campagne
-            cursor.execute(
-                'SELECT "Id" FROM "Campaigns" WHERE "Id" = %s AND "UserId" = %s',
-                (campaign_id, user["id"])
-            )
-            
-            if cursor.fetchone():
-                conn.close()
-                return True
-            
-            # Vérifier si l'utilisateur est un joueur dans la campagne
-            cursor.execute(
-                '''
-                SELECT c."Id" FROM "Characters" c 
-                WHERE c."CampaignId" = %s AND c."UserId" = %s
-                ''',
-                (campaign_id, user["id"])
-            )
-            
-            if cursor.fetchone():
-                conn.close()
-                return True
-        
-        conn.close()
-        return False
+        try:
+            with conn.cursor() as cursor:
+                # Vérifier si l'utilisateur est le créateur de la campagne
+                cursor.execute(
+                    'SELECT "Id" FROM "Campaigns" WHERE "Id" = %s AND "UserId" = %s',
+                    (campaign_id, user["id"])
+                )
+                
+                if cursor.fetchone():
+                    return True
+                
+                # Vérifier si l'utilisateur est un joueur dans la campagne
+                cursor.execute(
+                    '''
+                    SELECT c."Id" FROM "Characters" c 
+                    WHERE c."CampaignId" = %s AND c."UserId" = %s
+                    ''',
+                    (campaign_id, user["id"])
+                )
+                
+                return cursor.fetchone() is not None
+        finally:
+            # Fermer la connexion sur tous les chemins (succès, refus, exception)
+            conn.close()
         
     except Exception as e:
         logger.error(f"Error validating campaign access: {str(e)}")
@@ -1,100 +1,109 @@
 """
 Routes d'authentification pour l'API LLM GameMaster
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from pydantic import BaseModel
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, status, Header, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, StringConstraints
+from typing import Annotated, Dict, Any, Optional
+import asyncio
 import logging
+import os
+import base64
+import binascii
+import hashlib
+import hmac
 import bcrypt
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from auth import JWTAuth, get_current_user
-from config import (
-    GAME_DB_HOST, GAME_DB_PORT, GAME_DB_NAME, GAME_DB_USER, GAME_DB_PASSWORD,
-    AUTH_DB_HOST, AUTH_DB_PORT, AUTH_DB_NAME, AUTH_DB_USER, AUTH_DB_PASSWORD
+from concurrent.futures import ThreadPoolExecutor
+from auth import (
+    JWTAuth, authenticate_authorization_header, get_auth_db_connection, LOGIN_LOOKUP_STATEMENT
 )
+from config import settings
+from utils import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Limiteur dédié au login, par couple IP + email : les tentatives abusives
+# sont rejetées avant la requête SQL et la vérification du mot de passe
+# (seuil propre, bien plus bas que celui du middleware global par IP)
+login_rate_limiter = RateLimiter(settings.login_rate_limit_requests, settings.login_rate_limit_window)
+login_rate_limit_rejections = 0
+
+# Pool dédié au hachage des mots de passe : bcrypt et pbkdf2_hmac libèrent le GIL,
+# les vérifications s'exécutent donc en parallèle sans bloquer la boucle asyncio
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="password-hash"
+)
+
 # Router pour les routes d'authentification
-auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
+# (réponses sérialisées avec orjson : /verify-token et /refresh-token sont très sollicitées)
+auth_router = APIRouter(prefix="/auth", tags=["Authentication"], default_response_class=ORJSONResponse)
 
 class LoginRequest(BaseModel):
-    email: str
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
+    # Seul l'email est nettoyé : les espaces d'un mot de passe sont significatifs
+    email: Annotated[str, StringConstraints(strip_whitespace=True)]
     password: str
 
 class LoginResponse(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     access_token: str
     token_type: str = "bearer"
     user: Dict[str, Any]
-    expires_in: int = 86400  # 24 heures en secondes
+    expires_in: int = settings.jwt_expiration_seconds
 
 class PasswordChangeRequest(BaseModel):
     current_password: str
     new_password: str
 
 @auth_router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, http_request: Request):
     """
     Authentification utilisateur et génération du token JWT
     """
-    try:
-        # Connexion à la base de données
-        conn = psycopg2.connect(
-            host=AUTH_DB_HOST,
-            port=AUTH_DB_PORT,
-            database=AUTH_DB_NAME,
-            user=AUTH_DB_USER,  # Utilisateur admin - SEULEMENT pour authentification AspNetUsers
-            password=AUTH_DB_PASSWORD,
-            cursor_factory=RealDictCursor
+    global login_rate_limit_rejections
+    
+    client_host = http_request.client.host if http_request.client else "unknown"
+    if not login_rate_limiter.is_allowed(f"{client_host}:{request.email.lower()}"):
+        login_rate_limit_rejections += 1
+        logger.warning(
+            f"Login rate limit exceeded for {client_host} / {request.email} "
+            f"({login_rate_limit_rejections} rejections so far)"
         )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later."
+        )
+    
+    try:
+        # Connexion persistante à la base d'authentification
+        conn = get_auth_db_connection()
         
         with conn.cursor() as cursor:
-            # Récupérer l'utilisateur par email
-            cursor.execute(
-                '''
-                SELECT "Id", "UserName", "Email", "PasswordHash", "EmailConfirmed", "LockoutEnd"
-                FROM "AspNetUsers" 
-                WHERE "Email" = %s
-                ''',
-                (request.email,)
-            )
+            # Récupérer l'utilisateur par email normalisé comme ASP.NET Identity
+            # (UpperInvariantLookupNormalizer), via la requête préparée
+            cursor.execute(f"EXECUTE {LOGIN_LOOKUP_STATEMENT} (%s)", (request.email.upper(),))
             
             user = cursor.fetchone()
             
-            if not user:
-                logger.warning(f"Login attempt for non-existent email: {request.email}")
+            # Compte inexistant, verrouillé, non confirmé ou sans mot de passe :
+            # même réponse pour ne pas révéler l'existence du compte
+            if (not user or not user["NotLocked"] or not user["EmailConfirmed"]
+                    or not user["PasswordHash"]):
+                logger.warning(f"Login rejected before password check for email: {request.email}")
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid email or password"
                 )
             
-            # Vérifier si le compte est verrouillé
-            if user["LockoutEnd"] and user["LockoutEnd"] > datetime.utcnow():
-                raise HTTPException(
-                    status_code=status.HTTP_423_LOCKED,
-                    detail="Account is locked. Please try again later."
-                )
-            
-            # Vérifier si l'email est confirmé
-            if not user["EmailConfirmed"]:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Email not confirmed. Please check your email and confirm your account."
-                )
-            
-            # Vérifier le mot de passe
             password_hash = user["PasswordHash"]
-            if not password_hash:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid email or password"
-                )
             
-            # Note: ASP.NET Core Identity utilise un format de hash spécifique
-            # Pour une vraie implémentation, il faudrait utiliser la même logique de hash
-            # Ici, on suppose une vérification simplifiée
-            password_valid = verify_aspnet_password(request.password, password_hash)
+            # Vérifier le mot de passe (bcrypt ou PBKDF2 ASP.NET Core Identity)
+            password_valid = await asyncio.get_running_loop().run_in_executor(
+                password_hash_executor, verify_aspnet_password, request.password, password_hash
+            )
             
             if not password_valid:
                 logger.warning(f"Invalid password for user: {request.email}")
@@ -103,11 +112,13 @@ async def login(request: LoginRequest):
                     detail="Invalid email or password"
                 )
             
-            # Créer les données utilisateur pour le token
+            # Données utilisateur partagées entre les claims du token et la réponse
+            # (create_access_token ignore les clés supplémentaires)
             user_data = {
                 "id": user["Id"],
                 "email": user["Email"],
-                "username": user["UserName"]
+                "username": user["UserName"],
+                "email_confirmed": user["EmailConfirmed"]
             }
             
             # Générer le token JWT
@@ -116,17 +127,7 @@ async def login(request: LoginRequest):
             logger.info(f"Successful login for user: {request.email}")
             
             # Retourner la réponse
-            return LoginResponse(
-                access_token=access_token,
-                user={
-                    "id": user["Id"],
-                    "email": user["Email"],
-                    "username": user["UserName"],
-                    "email_confirmed": user["EmailConfirmed"]
-                }
-            )
-        
-        conn.close()
+            return LoginResponse(access_token=access_token, user=user_data)
         
     except HTTPException:
         raise
@@ -138,10 +139,14 @@ async def login(request: LoginRequest):
         )
 
 @auth_router.post("/verify-token")
-async def verify_token(current_user: Dict[str, Any] = Depends(get_current_user)):
+async def verify_token(authorization: Optional[str] = Header(None)):
     """
     Vérifier la validité du token actuel
+    
+    L'en-tête Authorization est lu directement (sans passer par la dependency
+    get_current_user) : vérifier le token est l'unique travail de cette route.
     """
+    current_user = authenticate_authorization_header(authorization)
     return {
         "valid": True,
         "user": {
@@ -152,10 +157,12 @@ async def verify_token(current_user: Dict[str, Any] = Depends(get_current_user))
     }
 
 @auth_router.post("/refresh-token")
-async def refresh_token(current_user: Dict[str, Any] = Depends(get_current_user)):
+async def refresh_token(authorization: Optional[str] = Header(None)):
     """
     Rafraîchir le token JWT
     """
+    current_user = authenticate_authorization_header(authorization)
+    
     try:
         # Générer un nouveau token
         new_token = JWTAuth.create_access_token(current_user)
@@ -163,7 +170,7 @@ async def refresh_token(current_user: Dict[str, Any] = Depends(get_current_user)
         return {
             "access_token": new_token,
             "token_type": "bearer",
-            "expires_in": 86400
+            "expires_in": settings.jwt_expiration_seconds
         }
         
     except Exception as e:
@@ -174,35 +181,91 @@ async def refresh_token(current_user: Dict[str, Any] = Depends(get_current_user)
         )
 
 
+# Préfixes des hash bcrypt reconnus et taille maximale utile d'un mot de passe
+# (bcrypt tronque silencieusement au-delà de 72 octets)
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+BCRYPT_HASH_LENGTH = 60
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Formats de hash ASP.NET Core Identity (PasswordHasher)
+# V2 : 0x00 | sel (16 octets) | sous-clé (32 octets), PBKDF2-HMAC-SHA1, 1000 itérations
+# V3 : 0x01 | prf | itérations | taille du sel | sel | sous-clé (entiers big-endian)
+ASPNET_IDENTITY_V2_MARKER = 0x00
+ASPNET_IDENTITY_V3_MARKER = 0x01
+ASPNET_IDENTITY_V2_ITERATIONS = 1000
+ASPNET_IDENTITY_V2_SALT_SIZE = 16
+ASPNET_IDENTITY_V3_HEADER_SIZE = 13
+ASPNET_IDENTITY_PRF = {0: 'sha1', 1: 'sha256', 2: 'sha512'}
+# Taille minimale d'une sous-clé : en dessous la comparaison n'a pas de sens
+ASPNET_IDENTITY_MIN_SUBKEY_SIZE = 16
+
+
+def verify_aspnet_identity_hash(pw_bytes: bytes, password_hash: str) -> bool:
+    """
+    Vérifie un mot de passe contre un hash ASP.NET Core Identity V2/V3 (PBKDF2)
+    """
+    try:
+        raw = base64.b64decode(password_hash, validate=True)
+    except (binascii.Error, ValueError):
+        return False
+    
+    if not raw:
+        return False
+    
+    if raw[0] == ASPNET_IDENTITY_V3_MARKER:
+        if len(raw) < ASPNET_IDENTITY_V3_HEADER_SIZE:
+            return False
+        prf = int.from_bytes(raw[1:5], 'big')
+        iterations = int.from_bytes(raw[5:9], 'big')
+        salt_len = int.from_bytes(raw[9:13], 'big')
+        digest_name = ASPNET_IDENTITY_PRF.get(prf)
+        salt_end = ASPNET_IDENTITY_V3_HEADER_SIZE + salt_len
+        if digest_name is None or iterations < 1:
+            return False
+        salt = raw[ASPNET_IDENTITY_V3_HEADER_SIZE:salt_end]
+        subkey = raw[salt_end:]
+    elif raw[0] == ASPNET_IDENTITY_V2_MARKER:
+        digest_name = 'sha1'
+        iterations = ASPNET_IDENTITY_V2_ITERATIONS
+        salt_end = 1 + ASPNET_IDENTITY_V2_SALT_SIZE
+        salt = raw[1:salt_end]
+        subkey = raw[salt_end:]
+    else:
+        return False
+    
+    if len(subkey) < ASPNET_IDENTITY_MIN_SUBKEY_SIZE:
+        return False
+    
+    # Comparaison en temps constant sur des octets de même longueur (dklen = len(subkey))
+    derived = hashlib.pbkdf2_hmac(digest_name, pw_bytes, salt, iterations, dklen=len(subkey))
+    return hmac.compare_digest(derived, subkey)
+
+
 def verify_aspnet_password(password: str, password_hash: str) -> bool:
     """
     Vérifie un mot de passe contre un hash ASP.NET Core Identity
     
-    Note: Cette implémentation est simplifiée. 
-    ASP.NET Core Identity utilise un format spécifique avec des versions.
-    Pour une implémentation complète, il faudrait implémenter le même algorithme.
+    Les hash natifs ASP.NET Core Identity (PBKDF2) et bcrypt sont supportés.
+    Les entrées manifestement invalides sont rejetées par un contrôle de format
+    peu coûteux avant tout calcul bcrypt. Un format de hash inconnu est refusé.
     """
+    if not password or not password_hash:
+        return False
+    
     try:
-        # ASP.NET Core Identity utilise généralement PBKDF2 avec SHA256
-        # Format: {version}{salt}{hash}
-        
-        # Pour cette démo, on suppose que le hash est au format bcrypt
-        # Dans un vrai projet, il faudrait adapter à ASP.NET Core Identity
+        pw_bytes = password.encode('utf-8')
         
         # Si le hash commence par $2, c'est probablement bcrypt
-        if password_hash.startswith('$2'):
-            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        if len(password_hash) == BCRYPT_HASH_LENGTH and password_hash[:4] in BCRYPT_PREFIXES:
+            return bcrypt.checkpw(pw_bytes[:BCRYPT_MAX_PASSWORD_BYTES], password_hash.encode('ascii'))
         
-        # Sinon, pour ASP.NET Core Identity, il faudrait implémenter le décodage
-        # approprié. Pour cette démo, on suppose une correspondance simple
-        # ATTENTION: Ceci n'est PAS sécurisé pour la production !
-        return len(password) > 0 and len(password_hash) > 0
+        if password_hash[0] == '$':
+            # Format non reconnu : ne jamais accepter le mot de passe
+            return False
+        
+        # Sinon, hash ASP.NET Core Identity encodé en base64
+        return verify_aspnet_identity_hash(pw_bytes, password_hash)
         
     except Exception as e:
         logger.error(f"Password verification error: {str(e)}")
         return False
-
-
-# Import nécessaire pour get_current_user
-from auth import get_current_user
-from datetime import datetime
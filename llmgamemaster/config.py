@@ -1,73 +1,198 @@
 import os
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Database configurations
-SILVER_DB_HOST = os.getenv("SILVER_DB_HOST", "datareference_silver_postgres")
-SILVER_DB_PORT = os.getenv("SILVER_DB_PORT", "5432")
-SILVER_DB_NAME = os.getenv("SILVER_DB_NAME", "silver_db")
-DB_READ_USER = os.getenv("DB_READ_USER")
-DB_READ_PASSWORD = os.getenv("DB_READ_PASSWORD")
-
-# Database configurations
-# Configuration pour les opérations normales (gamemaster user - accès limité)
-GAME_DB_HOST = os.getenv("APP_DB_HOST", "webapp_postgres")
-GAME_DB_PORT = os.getenv("APP_DB_PORT", "5432")
-GAME_DB_NAME = os.getenv("APP_DB_NAME", "app_db")
-GAME_DB_USER = os.getenv("GAME_DB_USER")
-GAME_DB_PASSWORD = os.getenv("GAME_DB_PASSWORD")
-
-# Configuration pour l'authentification JWT SEULEMENT (superuser - accès complet)
-AUTH_DB_HOST = os.getenv("APP_DB_HOST", "webapp_postgres")  
-AUTH_DB_PORT = os.getenv("APP_DB_PORT", "5432")
-AUTH_DB_NAME = os.getenv("APP_DB_NAME", "app_db")
-AUTH_DB_USER = os.getenv("AUTH_DB_USER")  # Superuser pour authentification
-AUTH_DB_PASSWORD = os.getenv("AUTH_DB_PASSWORD")  # SEULEMENT pour JWT
-
-# OpenAI configuration
-OPENAI_API_KEY = os.getenv("OPEN_AI_KEY", "")
-OPENAI_MODEL = os.getenv("OPEN_AI_MODEL", "gpt-4")
-# Maximum tokens limit for GPT-4o is 16384 but we use the value from ENV_INFOS (13000)
-OPENAI_MAX_TOKENS = int(os.getenv("OPEN_AI_MAX_TOKEN", "13000"))
-
-# Anthropic configuration
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
-ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20240620")
-ANTHROPIC_MAX_TOKENS = int(os.getenv("ANTHROPIC_MAX_TOKEN", "20000"))
-
-# Preferred LLM provider (openai or anthropic)
-# This can be set in several ways:
-# 1. Environment variable: LLM_PROVIDER=anthropic
-# 2. .env file in the application directory
-# 3. Docker run -e LLM_PROVIDER=anthropic
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
-
-# API configurations
-API_HOST = "0.0.0.0"
-API_PORT = int(os.getenv("LLM_GAMEMASTER_EXTERNAL_PORT", "5001"))
-
-# Logging configuration
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-LOG_FILE = "logs/llm_gamemaster.log"
-
-# Prompt templates directory
-TEMPLATES_DIR = "templates"
-
-# Campaign context window size (number of messages to include)
-CAMPAIGN_CONTEXT_WINDOW = int(os.getenv("CAMPAIGN_CONTEXT_WINDOW", "20"))
-
-# API Rate limiting
-RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "60"))  # requests per minute
-RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # window in seconds
-
-# JWT Configuration
-JWT_SECRET_KEY = os.getenv("JWT_SECRET", os.getenv("LLM_JWT_SECRET_KEY", "test_jwt_secret_key_for_ci_cd"))
-JWT_ALGORITHM = "HS256"
-JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
-
-# Security settings
-# CORS : Autoriser uniquement les requêtes depuis l'application webapp
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost,http://localhost:80,https://localhost,https://localhost:443,http://127.0.0.1,https://127.0.0.1").split(",")
-ENABLE_AUTH = os.getenv("ENABLE_AUTH", "false").lower() == "true"  # Compatible avec webapp LLM_ENABLE_AUTH 
\ No newline at end of file
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Configuration figée lue une seule fois depuis l'environnement au démarrage"""
+    # Database configurations
+    silver_db_host: str
+    silver_db_port: int
+    silver_db_name: str
+    db_read_user: Optional[str]
+    db_read_password: Optional[str]
+
+    # Configuration pour les opérations normales (gamemaster user - accès limité)
+    game_db_host: str
+    game_db_port: int
+    game_db_name: str
+    game_db_user: Optional[str]
+    game_db_password: Optional[str]
+
+    # Configuration pour l'authentification JWT SEULEMENT (superuser - accès complet)
+    auth_db_host: str
+    auth_db_port: int
+    auth_db_name: str
+    auth_db_user: Optional[str]
+    auth_db_password: Optional[str]
+
+    # OpenAI configuration
+    openai_api_key: str
+    openai_model: str
+    openai_max_tokens: int
+
+    # Anthropic configuration
+    anthropic_api_key: str
+    anthropic_model: str
+    anthropic_max_tokens: int
+
+    llm_provider: str
+
+    # API configurations
+    api_host: str
+    api_port: int
+
+    # Logging configuration
+    log_level: str
+    log_file: str
+
+    templates_dir: str
+    campaign_context_window: int
+
+    # API Rate limiting
+    rate_limit_requests: int
+    rate_limit_window: int
+    login_rate_limit_requests: int
+    login_rate_limit_window: int
+
+    # JWT Configuration
+    jwt_secret_key: str
+    jwt_algorithm: str
+    jwt_expiration_hours: int
+    jwt_expiration_seconds: int
+
+    # Security settings
+    cors_origins: FrozenSet[str]
+    enable_auth: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Construit la configuration en centralisant la conversion des types"""
+        app_db_host = os.getenv("APP_DB_HOST", "webapp_postgres")
+        app_db_port = int(os.getenv("APP_DB_PORT", "5432"))
+        app_db_name = os.getenv("APP_DB_NAME", "app_db")
+        jwt_expiration_hours = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
+        cors_origins = os.getenv("CORS_ORIGINS", "http://localhost,http://localhost:80,https://localhost,https://localhost:443,http://127.0.0.1,https://127.0.0.1")
+
+        return cls(
+            silver_db_host=os.getenv("SILVER_DB_HOST", "datareference_silver_postgres"),
+            silver_db_port=int(os.getenv("SILVER_DB_PORT", "5432")),
+            silver_db_name=os.getenv("SILVER_DB_NAME", "silver_db"),
+            db_read_user=os.getenv("DB_READ_USER"),
+            db_read_password=os.getenv("DB_READ_PASSWORD"),
+
+            game_db_host=app_db_host,
+            game_db_port=app_db_port,
+            game_db_name=app_db_name,
+            game_db_user=os.getenv("GAME_DB_USER"),
+            game_db_password=os.getenv("GAME_DB_PASSWORD"),
+
+            auth_db_host=app_db_host,
+            auth_db_port=app_db_port,
+            auth_db_name=app_db_name,
+            auth_db_user=os.getenv("AUTH_DB_USER"),  # Superuser pour authentification
+            auth_db_password=os.getenv("AUTH_DB_PASSWORD"),  # SEULEMENT pour JWT
+
+            openai_api_key=os.getenv("OPEN_AI_KEY", ""),
+            openai_model=os.getenv("OPEN_AI_MODEL", "gpt-4"),
+            # Maximum tokens limit for GPT-4o is 16384 but we use the value from ENV_INFOS (13000)
+            openai_max_tokens=int(os.getenv("OPEN_AI_MAX_TOKEN", "13000")),
+
+            anthropic_api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+            anthropic_model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20240620"),
+            anthropic_max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKEN", "20000")),
+
+            # Preferred LLM provider (openai or anthropic)
+            # This can be set in several ways:
+            # 1. Environment variable: LLM_PROVIDER=anthropic
+            # 2. .env file in the application directory
+            # 3. Docker run -e LLM_PROVIDER=anthropic
+            llm_provider=os.getenv("LLM_PROVIDER", "openai"),
+
+            api_host="0.0.0.0",
+            api_port=int(os.getenv("LLM_GAMEMASTER_EXTERNAL_PORT", "5001")),
+
+            log_level=os.getenv("LOG_LEVEL", "INFO"),
+            log_file="logs/llm_gamemaster.log",
+
+            # Prompt templates directory
+            templates_dir="templates",
+            # Campaign context window size (number of messages to include)
+            campaign_context_window=int(os.getenv("CAMPAIGN_CONTEXT_WINDOW", "20")),
+
+            rate_limit_requests=int(os.getenv("RATE_LIMIT_REQUESTS", "60")),  # requests per minute
+            rate_limit_window=int(os.getenv("RATE_LIMIT_WINDOW", "60")),  # window in seconds
+            # Login limité séparément, bien en dessous du plafond global par IP
+            login_rate_limit_requests=int(os.getenv("LOGIN_RATE_LIMIT_REQUESTS", "5")),  # attempts per window
+            login_rate_limit_window=int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "300")),  # window in seconds
+
+            jwt_secret_key=os.getenv("JWT_SECRET", os.getenv("LLM_JWT_SECRET_KEY", "test_jwt_secret_key_for_ci_cd")),
+            jwt_algorithm="HS256",
+            jwt_expiration_hours=jwt_expiration_hours,
+            jwt_expiration_seconds=jwt_expiration_hours * 3600,
+
+            # CORS : Autoriser uniquement les requêtes depuis l'application webapp
+            # (frozenset : test d'appartenance en O(1), espaces parasites retirés)
+            cors_origins=frozenset(origin.strip() for origin in cors_origins.split(",") if origin.strip()),
+            enable_auth=os.getenv("ENABLE_AUTH", "false").lower() == "true",  # Compatible avec webapp LLM_ENABLE_AUTH
+        )
+
+
+settings = Settings.from_env()
+
+# Noms historiques conservés pour les modules qui importent encore les constantes
+SILVER_DB_HOST = settings.silver_db_host
+SILVER_DB_PORT = settings.silver_db_port
+SILVER_DB_NAME = settings.silver_db_name
+DB_READ_USER = settings.db_read_user
+DB_READ_PASSWORD = settings.db_read_password
+
+GAME_DB_HOST = settings.game_db_host
+GAME_DB_PORT = settings.game_db_port
+GAME_DB_NAME = settings.game_db_name
+GAME_DB_USER = settings.game_db_user
+GAME_DB_PASSWORD = settings.game_db_password
+
+AUTH_DB_HOST = settings.auth_db_host
+AUTH_DB_PORT = settings.auth_db_port
+AUTH_DB_NAME = settings.auth_db_name
+AUTH_DB_USER = settings.auth_db_user
+AUTH_DB_PASSWORD = settings.auth_db_password
+
+OPENAI_API_KEY = settings.openai_api_key
+OPENAI_MODEL = settings.openai_model
+OPENAI_MAX_TOKENS = settings.openai_max_tokens
+
+ANTHROPIC_API_KEY = settings.anthropic_api_key
+ANTHROPIC_MODEL = settings.anthropic_model
+ANTHROPIC_MAX_TOKENS = settings.anthropic_max_tokens
+
+LLM_PROVIDER = settings.llm_provider
+
+API_HOST = settings.api_host
+API_PORT = settings.api_port
+
+LOG_LEVEL = settings.log_level
+LOG_FILE = settings.log_file
+
+TEMPLATES_DIR = settings.templates_dir
+
+CAMPAIGN_CONTEXT_WINDOW = settings.campaign_context_window
+
+RATE_LIMIT_REQUESTS = settings.rate_limit_requests
+RATE_LIMIT_WINDOW = settings.rate_limit_window
+LOGIN_RATE_LIMIT_REQUESTS = settings.login_rate_limit_requests
+LOGIN_RATE_LIMIT_WINDOW = settings.login_rate_limit_window
+
+JWT_SECRET_KEY = settings.jwt_secret_key
+JWT_ALGORITHM = settings.jwt_algorithm
+JWT_EXPIRATION_HOURS = settings.jwt_expiration_hours
+JWT_EXPIRATION_SECONDS = settings.jwt_expiration_seconds
+
+CORS_ORIGINS = settings.cors_origins
+ENABLE_AUTH = settings.enable_auth
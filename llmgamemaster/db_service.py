@@ -1,82 +1,729 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.errors
+import psycopg2.extensions
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import logging
-from config import (
-    SILVER_DB_HOST, SILVER_DB_PORT, SILVER_DB_NAME, DB_READ_USER, DB_READ_PASSWORD,
-    GAME_DB_HOST, GAME_DB_PORT, GAME_DB_NAME, GAME_DB_USER, GAME_DB_PASSWORD
-)
+import queue
+import select
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, wraps
+from cachetools import TTLCache
+from config import settings
 from datetime import datetime
+from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
+# Taille des pools de connexions (une connexion est empruntée par requête SQL logique)
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 16
+
+# Options libpq communes à toutes les connexions : délai de connexion borné et
+# keepalives TCP pour garder les connexions longues vivantes (et détecter un pair mort)
+CONNECTION_OPTIONS = {
+    'connect_timeout': 5,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+    'tcp_user_timeout': 30000,
+    'application_name': 'llmgamemaster',
+}
+
+# Erreurs d'une connexion coupée (failover, timeout d'inactivité) : l'appel est rejoué une fois
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Tentatives de la première connexion dédiée (attente doublée à chaque échec)
+CONNECT_RETRIES = 3
+CONNECT_RETRY_DELAY_SECONDS = 0.5
+
+# Nombre de lignes par INSERT multi-VALUES lors de l'enregistrement groupé de messages
+MESSAGE_INSERT_PAGE_SIZE = 200
+
+# Nombre d'UPDATE envoyés par aller-retour lors des mises à jour groupées de PNJ / lieux / quêtes
+CONTENT_UPDATE_PAGE_SIZE = 128
+
+# Nombre de lignes par INSERT multi-VALUES lors des créations groupées de PNJ / lieux / quêtes
+CONTENT_INSERT_PAGE_SIZE = 100
+
+# File d'écriture en arrière-plan des messages de campagne (hors chemin de réponse)
+WRITE_QUEUE_MAXSIZE = 1000
+WRITE_BATCH_MAX_ROWS = 200
+# Tentatives d'écriture d'un lot après une coupure de connexion (attente doublée à chaque échec)
+WRITE_RETRIES = 4
+WRITE_RETRY_DELAY_SECONDS = 0.5
+
+# Au-delà de STREAM_THRESHOLD_ROWS lignes demandées, les lectures passent par un
+# curseur serveur nommé et rapatrient les lignes par paquets de STREAM_BATCH_ROWS
+STREAM_THRESHOLD_ROWS = 100
+STREAM_BATCH_ROWS = 500
+
+# Cache des recherches de monstres / sorts (données de référence quasi statiques),
+# clé = nom normalisé ; les noms inconnus sont aussi mémorisés pour éviter de
+# relancer un scan ILIKE à chaque appel. L'invalidation passe par LISTEN/NOTIFY
+# (canal REFERENCE_CHANNEL, charge utile "schema.table"), le TTL n'est qu'un filet de sécurité
+REFERENCE_CACHE_MAXSIZE = 4096
+REFERENCE_CACHE_TTL_SECONDS = 24 * 3600
+_NOT_FOUND = object()
+REFERENCE_CHANNEL = "reference_changed"
+MONSTER_TABLE = "bestiary.fusion_bestiary"
+SPELL_TABLE = "spells.fusion_spells"
+# Attente maximale de select() et délai avant reconnexion du thread d'écoute
+LISTENER_POLL_SECONDS = 60
+LISTENER_RETRY_SECONDS = 5
+
+# Cache court des lieux / quêtes d'une campagne, relus à chaque construction de
+# prompt ; invalidé par les créations / mises à jour faites par ce service
+CAMPAIGN_CACHE_MAXSIZE = 1024
+CAMPAIGN_CACHE_TTL_SECONDS = 30
+
+# Colonnes réellement lues par les appelants (formatage des prompts, filtres de
+# localisation) : évite de transférer et d'allouer les colonnes inutiles
+CHARACTER_COLUMNS = (
+    'c."Id"', 'c."Name"', 'c."Race"', 'c."Gender"', 'c."Class"', 'c."Level"',
+    'c."Alignment"', 'c."Background"', 'c."Strength"', 'c."Dexterity"',
+    'c."Constitution"', 'c."Intelligence"', 'c."Wisdom"', 'c."Charisma"',
+    'c."Description"', 'c."Equipment"', 'c."PortraitUrl"',
+    'cc."CharacterId"', 'cc."CurrentLocationId"', 'cc."CurrentLocation"',
+)
+MESSAGE_COLUMNS = ('"Id"', '"CampaignId"', '"CharacterId"', '"MessageType"', '"Content"', '"UserId"')
+NPC_CONTEXT_COLUMNS = (
+    '"Id"', '"Name"', '"Type"', '"Race"', '"Class"', '"Level"', '"Alignment"',
+    '"Description"', '"CurrentLocationId"', '"CurrentLocation"', '"Status"', '"CreatedAt"',
+)
+CHARACTER_SELECT = ", ".join(CHARACTER_COLUMNS)
+
+# Curseur tuple (sans dict par ligne) pour les lectures internes d'une valeur
+# scalaire ; les méthodes qui renvoient des lignes aux appelants gardent RealDictCursor
+TupleCursor = psycopg2.extensions.cursor
+NPC_CONTEXT_SELECT = ", ".join(NPC_CONTEXT_COLUMNS)
+
+# Requêtes de recherche par nom appelées à chaque outil du LLM : préparées
+# (PREPARE) une seule fois par connexion du pool puis exécutées par EXECUTE.
+# Les ILIKE '%nom%' s'appuient sur les index trigrammes (pg_trgm) de name / "Name" ;
+# un appelant qui n'a besoin que d'un préfixe doit passer 'nom%' (motif plus sélectif)
+PREPARED_STATEMENTS = {
+    "monster_by_name": """
+        PREPARE monster_by_name (text) AS
+        SELECT * FROM bestiary.fusion_bestiary WHERE name ILIKE $1 LIMIT 1
+    """,
+    "spell_by_name": """
+        PREPARE spell_by_name (text) AS
+        SELECT * FROM spells.fusion_spells WHERE name ILIKE $1 LIMIT 1
+    """,
+    "npc_by_name": """
+        PREPARE npc_by_name (integer, text) AS
+        SELECT * FROM "CampaignNPCs" WHERE "CampaignId" = $1 AND "Name" ILIKE $2 LIMIT 1
+    """,
+    # Correspondance exacte (index btree sur lower()) d'abord, sinon sous-chaîne
+    # (index trigrammes) : l'Append s'arrête dès la première ligne trouvée
+    "location_by_name": """
+        PREPARE location_by_name (integer, text) AS
+        (SELECT * FROM "CampaignLocations" WHERE "CampaignId" = $1 AND lower("Name") = lower($2) LIMIT 1)
+        UNION ALL
+        (SELECT * FROM "CampaignLocations" WHERE "CampaignId" = $1 AND "Name" ILIKE '%' || $2 || '%' LIMIT 1)
+        LIMIT 1
+    """,
+    "quest_by_title": """
+        PREPARE quest_by_title (integer, text) AS
+        (SELECT * FROM "CampaignQuests" WHERE "CampaignId" = $1 AND lower("Title") = lower($2) LIMIT 1)
+        UNION ALL
+        (SELECT * FROM "CampaignQuests" WHERE "CampaignId" = $1 AND "Title" ILIKE '%' || $2 || '%' LIMIT 1)
+        LIMIT 1
+    """,
+    "character_location": """
+        PREPARE character_location (integer, integer) AS
+        SELECT "CurrentLocation" FROM "CampaignCharacters"
+        WHERE "CampaignId" = $1 AND "CharacterId" = $2 LIMIT 1
+    """,
+}
+
+# Mêmes recherches, pour toute une liste de noms en un aller-retour : chaque nom
+# de unnest() garde la sémantique de la requête préparée correspondante (LATERAL),
+# la colonne lookup_name rattache la ligne trouvée au nom demandé
+NPCS_BY_NAMES_SQL = """
+    SELECT n.name AS lookup_name, t.*
+    FROM unnest(%(names)s::text[]) AS n(name)
+    CROSS JOIN LATERAL (
+        SELECT * FROM "CampaignNPCs"
+        WHERE "CampaignId" = %(campaign_id)s AND "Name" ILIKE '%%' || n.name || '%%' LIMIT 1
+    ) t
+"""
+LOCATIONS_BY_NAMES_SQL = """
+    SELECT n.name AS lookup_name, t.*
+    FROM unnest(%(names)s::text[]) AS n(name)
+    CROSS JOIN LATERAL (
+        (SELECT * FROM "CampaignLocations" WHERE "CampaignId" = %(campaign_id)s AND lower("Name") = lower(n.name) LIMIT 1)
+        UNION ALL
+        (SELECT * FROM "CampaignLocations" WHERE "CampaignId" = %(campaign_id)s AND "Name" ILIKE '%%' || n.name || '%%' LIMIT 1)
+        LIMIT 1
+    ) t
+"""
+QUESTS_BY_TITLES_SQL = """
+    SELECT n.name AS lookup_name, t.*
+    FROM unnest(%(names)s::text[]) AS n(name)
+    CROSS JOIN LATERAL (
+        (SELECT * FROM "CampaignQuests" WHERE "CampaignId" = %(campaign_id)s AND lower("Title") = lower(n.name) LIMIT 1)
+        UNION ALL
+        (SELECT * FROM "CampaignQuests" WHERE "CampaignId" = %(campaign_id)s AND "Title" ILIKE '%%' || n.name || '%%' LIMIT 1)
+        LIMIT 1
+    ) t
+"""
+
+# Listes d'une campagne, renvoyées en bloc (get_*) ou lues en flux par un
+# curseur serveur (iter_*) quand l'appelant les parcourt sans tout garder
+CAMPAIGN_NPCS_SQL = """
+    SELECT *
+    FROM "CampaignNPCs"
+    WHERE "CampaignId" = %s
+    ORDER BY "CreatedAt" DESC
+"""
+CAMPAIGN_LOCATIONS_SQL = """
+    SELECT *
+    FROM "CampaignLocations"
+    WHERE "CampaignId" = %s
+    ORDER BY "CreatedAt" DESC
+"""
+CAMPAIGN_QUESTS_SQL = """
+    SELECT *
+    FROM "CampaignQuests"
+    WHERE "CampaignId" = %s
+    ORDER BY "CreatedAt" DESC
+"""
+CHARACTER_QUESTS_SQL = """
+    SELECT {columns}
+    FROM "CharacterQuests" cq
+    INNER JOIN "CampaignQuests" q ON cq."QuestId" = q."Id"
+    WHERE cq."CampaignId" = %s AND cq."CharacterId" = %s
+    ORDER BY cq."AcceptedAt" DESC
+"""
+CHARACTER_QUESTS_BULK_SQL = """
+    SELECT {columns}
+    FROM "CharacterQuests" cq
+    INNER JOIN "CampaignQuests" q ON cq."QuestId" = q."Id"
+    WHERE cq."CampaignId" = %s AND cq."CharacterId" = ANY(%s)
+    ORDER BY cq."CharacterId", cq."AcceptedAt" DESC
+"""
+# Index unique sur lequel s'appuie ON CONFLICT pour accepter une quête : init.sql ne le
+# crée que sur une base neuve, ensure_character_quest_index() l'ajoute aux bases existantes
+# (doublons laissés par l'ancienne vérification retirés, l'acceptation la plus ancienne gardée)
+CHARACTER_QUEST_KEY = ('CampaignId', 'CharacterId', 'QuestId')
+CHARACTER_QUEST_INDEX = "IX_CharacterQuests_CampaignId_CharacterId_QuestId"
+CHARACTER_QUEST_DEDUP_SQL = """
+    DELETE FROM "CharacterQuests" a USING "CharacterQuests" b
+    WHERE a."CampaignId" = b."CampaignId" AND a."CharacterId" = b."CharacterId"
+    AND a."QuestId" = b."QuestId" AND a."Id" > b."Id"
+"""
+CHARACTER_QUEST_INDEX_SQL = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS "{CHARACTER_QUEST_INDEX}"
+    ON "CharacterQuests" ("CampaignId", "CharacterId", "QuestId")
+"""
+# Sans l'index (droits insuffisants pour le créer) : quête déjà acceptée vérifiée avant l'INSERT
+CHARACTER_QUEST_ACCEPTED_SQL = """
+    SELECT 1 FROM "CharacterQuests"
+    WHERE "CampaignId" = %s AND "CharacterId" = %s AND "QuestId" = %s
+    LIMIT 1
+"""
+# Colonnes des quêtes acceptées renvoyées par défaut (sans cq.* : "Notes" peut être
+# long et n'est lu par personne) ; les colonnes facultatives se demandent via fields=
+CHARACTER_QUEST_COLUMNS = (
+    'cq."Id"', 'cq."CampaignId"', 'cq."CharacterId"', 'cq."QuestId"', 'cq."Status"',
+    'cq."Progress"', 'cq."AcceptedAt"', 'cq."CompletedAt"',
+    'q."Title"', 'q."Description"', 'q."Type"', 'q."Difficulty"', 'q."Reward"',
+)
+CHARACTER_QUEST_OPTIONAL_COLUMNS = {'Notes': 'cq."Notes"'}
+
+
+# Colonnes optionnelles acceptées (clé kwargs -> colonne) par les créations / mises à jour
+NPC_INSERT_FIELDS = {
+    'class': 'Class',
+    'level': 'Level',
+    'max_hit_points': 'MaxHitPoints',
+    'current_hit_points': 'CurrentHitPoints',
+    'armor_class': 'ArmorClass',
+    'strength': 'Strength',
+    'dexterity': 'Dexterity',
+    'constitution': 'Constitution',
+    'intelligence': 'Intelligence',
+    'wisdom': 'Wisdom',
+    'charisma': 'Charisma',
+    'alignment': 'Alignment',
+    'description': 'Description',
+    'current_location': 'CurrentLocation',
+    'status': 'Status',
+    'notes': 'Notes',
+    'portrait_url': 'PortraitUrl'
+}
+NPC_UPDATE_FIELDS = {'name': 'Name', 'type': 'Type', 'race': 'Race', **NPC_INSERT_FIELDS}
+
+LOCATION_INSERT_FIELDS = {
+    'description': 'Description',
+    'short_description': 'ShortDescription',
+    'parent_location_id': 'ParentLocationId',
+    'is_discovered': 'IsDiscovered',
+    'is_accessible': 'IsAccessible',
+    'climate': 'Climate',
+    'terrain': 'Terrain',
+    'population': 'Population',
+    'notes': 'Notes',
+    'image_url': 'ImageUrl'
+}
+LOCATION_UPDATE_FIELDS = {'name': 'Name', 'type': 'Type', **LOCATION_INSERT_FIELDS}
+
+QUEST_INSERT_FIELDS = {
+    'description': 'Description',
+    'short_description': 'ShortDescription',
+    'type': 'Type',
+    'status': 'Status',
+    'reward': 'Reward',
+    'requirements': 'Requirements',
+    'required_level': 'RequiredLevel',
+    'location_id': 'LocationId',
+    'quest_giver': 'QuestGiver',
+    'difficulty': 'Difficulty',
+    'notes': 'Notes',
+    'progress': 'Progress'
+}
+QUEST_UPDATE_FIELDS = {'title': 'Title', **QUEST_INSERT_FIELDS}
+
+CHARACTER_QUEST_FIELDS = {
+    'status': 'Status',
+    'progress': 'Progress',
+    'notes': 'Notes'
+}
+
+
+def _character_quest_select(fields):
+    """Select list of the character quest queries, with the requested optional columns"""
+    unknown = set(fields) - CHARACTER_QUEST_OPTIONAL_COLUMNS.keys()
+    if unknown:
+        raise ValueError(f"Unknown character quest fields: {sorted(unknown)}")
+    return ", ".join(CHARACTER_QUEST_COLUMNS + tuple(CHARACTER_QUEST_OPTIONAL_COLUMNS[field] for field in fields))
+
+
+# Conversion tuple -> dict générée une fois par liste de colonnes : un littéral de
+# dict aux indices fixes, sans zip() ni construction incrémentale à chaque ligne
+@lru_cache(maxsize=64)
+def _row_marshaller(columns):
+    """Compiled function turning a tuple row into a dict keyed by columns"""
+    items = ", ".join(f"{name!r}: row[{index}]" for index, name in enumerate(columns))
+    namespace = {}
+    exec(compile(f"def marshal(row):\n    return {{{items}}}\n", "<row_marshaller>", "exec"), namespace)
+    return namespace["marshal"]
+
+
+def _provided_keys(fields, kwargs):
+    """Keys of a field map that were passed with a non-None value, in map order"""
+    return tuple(key for key in fields if kwargs.get(key) is not None)
+
+
+def _quest_touched_columns(fields):
+    """Timestamp columns set to NOW() by a quest update: UpdatedAt, plus CompletedAt on completion"""
+    if fields.get('status') == 'Completed':
+        return ('UpdatedAt', 'CompletedAt')
+    return ('UpdatedAt',)
+
+
+def _identifiers(names):
+    """Comma-separated list of quoted identifiers"""
+    return sql.SQL(", ").join(sql.Identifier(name) for name in names)
+
+
+# Le SQL généré ne dépend que de la table et du jeu de colonnes : il est
+# composé (identifiants quotés par sql.Identifier) une fois par combinaison puis réutilisé
+@lru_cache(maxsize=2048)
+def _insert_sql(table, columns, returning, conflict_columns=()):
+    """INSERT ... RETURNING statement for the given column tuple
+    
+    With conflict_columns, a row clashing on them is skipped (ON CONFLICT DO NOTHING)
+    and the statement returns no row.
+    """
+    on_conflict = sql.SQL("")
+    if conflict_columns:
+        on_conflict = sql.SQL(" ON CONFLICT ({}) DO NOTHING").format(_identifiers(conflict_columns))
+    return sql.SQL("INSERT INTO {} ({}) VALUES ({}){} RETURNING {}").format(
+        sql.Identifier(table),
+        _identifiers(columns),
+        sql.SQL(", ").join(sql.Placeholder() * len(columns)),
+        on_conflict,
+        _identifiers(returning),
+    )
+
+
+@lru_cache(maxsize=2048)
+def _insert_values_sql(table, columns, returning):
+    """INSERT ... VALUES %s RETURNING statement for execute_values"""
+    return sql.SQL("INSERT INTO {} ({}) VALUES %s RETURNING {}").format(
+        sql.Identifier(table),
+        _identifiers(columns),
+        _identifiers(returning),
+    )
+
+
+@lru_cache(maxsize=2048)
+def _update_sql(table, columns, touched_columns, returning):
+    """UPDATE ... WHERE "Id" = %s RETURNING statement; touched_columns are set to NOW()"""
+    assignments = [sql.SQL("{} = %s").format(sql.Identifier(column)) for column in columns]
+    assignments += [sql.SQL("{} = NOW()").format(sql.Identifier(column)) for column in touched_columns]
+    return sql.SQL("UPDATE {} SET {} WHERE {} = %s RETURNING {}").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(assignments),
+        sql.Identifier("Id"),
+        _identifiers(returning),
+    )
+
+
+@lru_cache(maxsize=8)
+def _generation_status_sql(prefix):
+    """UPDATE of the "<prefix>*" generation columns of a campaign, whatever the status
+    
+    Parameters: status, error, status, status, campaign id. The timestamps are
+    picked by CASE on the server, so each prefix has a single statement (and plan).
+    """
+    status, error, started, completed = (
+        sql.Identifier(f"{prefix}{suffix}") for suffix in ("Status", "Error", "StartedAt", "CompletedAt")
+    )
+    return sql.SQL(
+        "UPDATE {table} SET {status} = %s, {error} = %s, "
+        "{started} = CASE WHEN %s = 'InProgress' THEN NOW() ELSE {started} END, "
+        "{completed} = CASE WHEN %s IN ('Completed', 'Failed') THEN NOW() ELSE {completed} END "
+        "WHERE {id} = %s RETURNING {id}"
+    ).format(
+        table=sql.Identifier("Campaigns"), id=sql.Identifier("Id"),
+        status=status, error=error, started=started, completed=completed,
+    )
+
+
+@lru_cache(maxsize=256)
+def _reference_sql(schema, table, text_columns):
+    """SELECT on a Silver table, with a single ILIKE over the concatenated text columns if given"""
+    source = sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table))
+    if not text_columns:
+        return sql.SQL("SELECT * FROM {} LIMIT %s").format(source)
+    search_expr = sql.SQL(" || ' ' || ").join(
+        sql.SQL("COALESCE({}, '')").format(sql.Identifier(column)) for column in text_columns
+    )
+    return sql.SQL("SELECT * FROM {} WHERE ({}) ILIKE %s LIMIT %s").format(source, search_expr)
+
+
+def _retry_on_drop(method):
+    """Replay a DBService method once when its connection was dropped
+    
+    The second attempt only uses pooled connections that answered a probe.
+    Any other error is handled (or raised) by the method itself. Inside read_txn()
+    nothing is replayed: the transaction's connection is the dead one, so the
+    error propagates and the method that opened read_txn() replays the block.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._in_read_txn():
+            return method(self, *args, **kwargs)
+        try:
+            return method(self, *args, **kwargs)
+        except TRANSIENT_ERRORS as e:
+            logger.warning(f"[DB] Connection lost during {method.__name__} ({e}), retrying once")
+        self._local.validate = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._local.validate = False
+    return wrapper
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connexion du pool qui mémorise ses requêtes préparées et ses curseurs"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        # Plans des requêtes mémoïsées (_insert_sql / _update_sql) : id(requête) -> (requête, nom)
+        self.plans = {}
+        # Curseurs réutilisés d'un emprunt à l'autre, un par type de curseur
+        self.cursors = {}
+
 class DBService:
     def __init__(self):
+        # Connexions dédiées historiques, ouvertes seulement par un appel explicite à
+        # get_silver_db_connection / get_game_db_connection : le service passe par les pools
         self.silver_conn = None
         self.game_conn = None
+        # Pools partagés par toutes les méthodes du service (créés à la demande)
+        self.silver_pool = None
+        self.game_pool = None
+        self._pool_lock = threading.Lock()
+        # Catalogue des colonnes texte de la base Silver, chargé en une requête : {(schema, table): (colonnes,)}
+        self._text_catalog = None
+        # État par thread : connexion de la transaction de lecture en cours (read_txn),
+        # connexions à valider après une coupure (_retry_on_drop)
+        self._local = threading.local()
+        # Requête des messages de campagne, résolue une seule fois (colonne de tri réelle)
+        self._msg_query = None
+        self._msg_order_col = None
+        self._msg_select = None
+        # Écritures différées : file bornée vidée par un thread démon démarré au premier envoi
+        self._write_queue = queue.Queue(maxsize=WRITE_QUEUE_MAXSIZE)
+        self._writer_thread = None
+        # Recherches de référence mises en cache (TTLCache n'est pas thread-safe)
+        self._monster_cache = TTLCache(maxsize=REFERENCE_CACHE_MAXSIZE, ttl=REFERENCE_CACHE_TTL_SECONDS)
+        self._spell_cache = TTLCache(maxsize=REFERENCE_CACHE_MAXSIZE, ttl=REFERENCE_CACHE_TTL_SECONDS)
+        self._reference_cache_lock = threading.Lock()
+        self._listener_thread = None
+        # Listes par campagne mises en cache ; l'époque change à chaque invalidation
+        self._npc_cache = TTLCache(maxsize=CAMPAIGN_CACHE_MAXSIZE, ttl=CAMPAIGN_CACHE_TTL_SECONDS)
+        self._location_cache = TTLCache(maxsize=CAMPAIGN_CACHE_MAXSIZE, ttl=CAMPAIGN_CACHE_TTL_SECONDS)
+        self._quest_cache = TTLCache(maxsize=CAMPAIGN_CACHE_MAXSIZE, ttl=CAMPAIGN_CACHE_TTL_SECONDS)
+        self._campaign_cache_lock = threading.Lock()
+        self._campaign_cache_epoch = 0
+        # Index unique des quêtes acceptées : None tant qu'il n'est pas vérifié, False s'il manque
+        self._character_quest_index = None
     
     def force_reconnect(self):
-        """Force close all connections and recreate them"""
+        """Close every connection and forget the cached schema; the pools reconnect on next use"""
         logger.info("Forcing reconnection to databases...")
         
-        # Close existing connections
-        if self.silver_conn and not self.silver_conn.closed:
-            self.silver_conn.close()
-            logger.info("Closed Silver database connection")
-        
-        if self.game_conn and not self.game_conn.closed:
-            self.game_conn.close()
-            logger.info("Closed Game database connection")
+        # Close existing connections and pools
+        self.close_connections()
+        self.close_pools()
+        self.clear_schema_cache()
+        self._msg_query = None
+        self._msg_order_col = None
+        self._msg_select = None
         
         # Reset connection objects
         self.silver_conn = None
         self.game_conn = None
         
-        # Recreate connections
-        self.get_silver_db_connection()
-        self.get_game_db_connection()
+        logger.info("Database connections closed, pools will reconnect on next use")
+    
+    def _get_silver_pool(self):
+        """Create (once) the Silver database connection pool"""
+        if self.silver_pool is None or self.silver_pool.closed:
+            with self._pool_lock:
+                if self.silver_pool is None or self.silver_pool.closed:
+                    self.silver_pool = ThreadedConnectionPool(
+                        POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS,
+                        host=settings.silver_db_host,
+                        port=settings.silver_db_port,
+                        dbname=settings.silver_db_name,
+                        user=settings.db_read_user,
+                        password=settings.db_read_password,
+                        cursor_factory=RealDictCursor,
+                        connection_factory=PooledConnection,
+                        **CONNECTION_OPTIONS
+                    )
+                    logger.info(f"Created Silver database pool for {settings.silver_db_host}:{settings.silver_db_port}/{settings.silver_db_name}")
+        return self.silver_pool
+    
+    def _get_game_pool(self):
+        """Create (once) the Game database connection pool"""
+        if self.game_pool is None or self.game_pool.closed:
+            with self._pool_lock:
+                if self.game_pool is None or self.game_pool.closed:
+                    self.game_pool = ThreadedConnectionPool(
+                        POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS,
+                        host=settings.game_db_host,
+                        port=settings.game_db_port,
+                        dbname=settings.game_db_name,
+                        user=settings.game_db_user,
+                        password=settings.game_db_password,
+                        cursor_factory=RealDictCursor,
+                        connection_factory=PooledConnection,
+                        **CONNECTION_OPTIONS
+                    )
+                    logger.info(f"Created Game database pool for {settings.game_db_host}:{settings.game_db_port}/{settings.game_db_name}")
+        return self.game_pool
+    
+    @contextmanager
+    def _pooled_connection(self, pool):
+        """Borrow an autocommit connection from a pool and always give it back"""
+        conn = pool.getconn()
+        # Une connexion coupée côté serveur est jetée et remplacée
+        if conn.closed:
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        if not conn.autocommit:
+            conn.autocommit = True
+        if getattr(self._local, "validate", False):
+            conn = self._live_connection(pool, conn)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            # Un BEGIN explicite laissé ouvert par un chemin d'exception imprévu : la
+            # connexion ne doit pas revenir au pool au milieu d'une transaction
+            if (not broken and not conn.closed
+                    and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+                try:
+                    self._get_cursor(conn, TupleCursor).execute("ROLLBACK")
+                except psycopg2.Error as e:
+                    logger.warning(f"Rollback of a pooled connection failed, discarding it: {e}")
+                    broken = True
+            pool.putconn(conn, close=broken or bool(conn.closed))
+    
+    def _live_connection(self, pool, conn):
+        """Probe a borrowed connection, replacing it until one answers (after a dropped connection)"""
+        for _ in range(POOL_MAX_CONNECTIONS):
+            try:
+                self._get_cursor(conn, TupleCursor).execute("SELECT 1")
+                return conn
+            except TRANSIENT_ERRORS:
+                # Les autres connexions inactives du pool ont pu être coupées en même temps
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+                conn.autocommit = True
+        return conn
+    
+    def _get_cursor(self, conn, cursor_factory=None):
+        """Return the cursor cached on a pooled connection, creating it on first use
+        
+        A pooled connection is only used by the thread that borrowed it, so its
+        cursors need no extra locking; they are closed with the connection.
+        """
+        cursor = conn.cursors.get(cursor_factory)
+        if cursor is None or cursor.closed:
+            cursor = conn.cursor(cursor_factory=cursor_factory) if cursor_factory else conn.cursor()
+            conn.cursors[cursor_factory] = cursor
+        return cursor
+    
+    def _execute_prepared(self, cursor, name, params):
+        """Execute a statement of PREPARED_STATEMENTS, preparing it first on a new connection"""
+        conn = cursor.connection
+        if name not in conn.prepared:
+            cursor.execute(PREPARED_STATEMENTS[name])
+            conn.prepared.add(name)
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+    
+    def _execute_plan(self, cursor, query, params):
+        """Execute a memoized _insert_sql / _update_sql statement through a prepared plan
+        
+        The statement is PREPAREd once per connection, so PostgreSQL skips the
+        parse/plan phase on the following calls with the same set of columns.
+        """
+        conn = cursor.connection
+        # La requête est gardée dans l'entrée : son id ne peut pas être réattribué
+        entry = conn.plans.get(id(query))
+        if entry is None:
+            name = f"plan_{len(conn.plans)}"
+            parts = query.as_string(conn).split("%s")
+            text = parts[0] + "".join(f"${index}{part}" for index, part in enumerate(parts[1:], 1))
+            cursor.execute(f"PREPARE {name} AS {text}")
+            entry = conn.plans[id(query)] = (query, name)
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {entry[1]} ({placeholders})", params)
+    
+    def silver_connection(self):
+        """Context manager yielding a pooled Silver database connection"""
+        return self._pooled_connection(self._get_silver_pool())
+    
+    def game_connection(self):
+        """Context manager yielding a pooled Game database connection
+        
+        Inside read_txn() the transaction's connection is reused instead.
+        """
+        txn_conn = getattr(self._local, "conn", None)
+        if txn_conn is not None:
+            return nullcontext(txn_conn)
+        return self._pooled_connection(self._get_game_pool())
+    
+    def _in_read_txn(self):
+        """Whether the current thread runs inside read_txn()"""
+        return getattr(self._local, "conn", None) is not None
+    
+    @contextmanager
+    def read_txn(self):
+        """Run the Game reads of a turn in one REPEATABLE READ, READ ONLY transaction
+        
+        Every game_connection() opened by the same thread inside the block shares
+        the transaction, hence one snapshot and one BEGIN/COMMIT pair. The block
+        must not write and must not span an await (the event loop thread is shared).
+        Errors inside the block propagate (the transaction is aborted after the
+        first one); wrap the method opening it in @_retry_on_drop to replay it.
+        """
+        if getattr(self._local, "conn", None) is not None:
+            # Transaction déjà ouverte plus haut : on s'y rattache
+            yield self._local.conn
+            return
         
-        logger.info("Database connections recreated successfully")
+        with self._pooled_connection(self._get_game_pool()) as conn:
+            # Connexion en autocommit : le BEGIN explicite fixe l'isolation et le mode lecture seule
+            cursor = self._get_cursor(conn)
+            cursor.execute("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            self._local.conn = conn
+            try:
+                yield conn
+            except BaseException:
+                if not conn.closed:
+                    try:
+                        cursor.execute("ROLLBACK")
+                    except psycopg2.Error as e:
+                        logger.warning(f"Rollback of read transaction failed: {e}")
+                raise
+            else:
+                cursor.execute("COMMIT")
+            finally:
+                self._local.conn = None
+    
+    def _connect_with_retry(self, **kwargs):
+        """psycopg2.connect with CONNECTION_OPTIONS, retried with exponential backoff"""
+        delay = CONNECT_RETRY_DELAY_SECONDS
+        for attempt in range(1, CONNECT_RETRIES + 1):
+            try:
+                return psycopg2.connect(**kwargs, **CONNECTION_OPTIONS)
+            except psycopg2.OperationalError as e:
+                if attempt == CONNECT_RETRIES:
+                    raise
+                logger.warning(f"Connection attempt {attempt} to {kwargs.get('host')} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                delay *= 2
     
     def get_silver_db_connection(self):
-        """Create a connection to the Silver database"""
+        """Create a dedicated connection to the Silver database"""
         if self.silver_conn is None or self.silver_conn.closed:
             try:
-                self.silver_conn = psycopg2.connect(
-                    host=SILVER_DB_HOST,
-                    port=SILVER_DB_PORT,
-                    dbname=SILVER_DB_NAME,
-                    user=DB_READ_USER,
-                    password=DB_READ_PASSWORD,
+                self.silver_conn = self._connect_with_retry(
+                    host=settings.silver_db_host,
+                    port=settings.silver_db_port,
+                    dbname=settings.silver_db_name,
+                    user=settings.db_read_user,
+                    password=settings.db_read_password,
                     cursor_factory=RealDictCursor
                 )
                 self.silver_conn.autocommit = True
-                logger.info(f"Connected to Silver database at {SILVER_DB_HOST}:{SILVER_DB_PORT}/{SILVER_DB_NAME}")
+                logger.info(f"Connected to Silver database at {settings.silver_db_host}:{settings.silver_db_port}/{settings.silver_db_name}")
             except Exception as e:
                 logger.error(f"Error connecting to Silver database: {e}")
                 raise
         return self.silver_conn
     
     def get_game_db_connection(self):
-        """Create a connection to the Game database"""
+        """Create a dedicated connection to the Game database"""
         if self.game_conn is None or self.game_conn.closed:
             try:
-                self.game_conn = psycopg2.connect(
-                    host=GAME_DB_HOST,
-                    port=GAME_DB_PORT,
-                    dbname=GAME_DB_NAME,
-                    user=GAME_DB_USER,
-                    password=GAME_DB_PASSWORD,
+                self.game_conn = self._connect_with_retry(
+                    host=settings.game_db_host,
+                    port=settings.game_db_port,
+                    dbname=settings.game_db_name,
+                    user=settings.game_db_user,
+                    password=settings.game_db_password,
                     cursor_factory=RealDictCursor
                 )
                 self.game_conn.autocommit = True
-                logger.info(f"Connected to Game database at {GAME_DB_HOST}:{GAME_DB_PORT}/{GAME_DB_NAME}")
+                logger.info(f"Connected to Game database at {settings.game_db_host}:{settings.game_db_port}/{settings.game_db_name}")
             except Exception as e:
                 logger.error(f"Error connecting to Game database: {e}")
                 raise
         return self.game_conn
     
     def close_connections(self):
-        """Close all database connections"""
+        """Close the dedicated database connections (the pools stay open)"""
         if self.silver_conn and not self.silver_conn.closed:
             self.silver_conn.close()
             logger.info("Closed Silver database connection")
@@ -85,1183 +732,1373 @@ def close_connections(self):
             self.game_conn.close()
             logger.info("Closed Game database connection")
     
-    def get_reference_data(self, schema, table, limit=100, search_query=None):
-        """Get reference data from Silver database"""
-        conn = self.get_silver_db_connection()
-        try:
-            with conn.cursor() as cur:
-                if search_query:
-                    # Get text columns for searching
-                    cur.execute("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_schema = %s
-                        AND table_name = %s
-                        AND data_type IN ('character varying', 'text')
-                    """, (schema, table))
-                    
-                    text_columns = [row["column_name"] for row in cur.fetchall()]
-                    
-                    if not text_columns:
-                        return []
-                    
-                    # Build search conditions
-                    search_conditions = " OR ".join([f"{col} ILIKE %s" for col in text_columns])
-                    search_params = [f"%{search_query}%"] * len(text_columns)
-                    
-                    query = f"""
-                        SELECT *
-                        FROM {schema}.{table}
-                        WHERE {search_conditions}
-                        LIMIT %s
-                    """
-                    cur.execute(query, search_params + [limit])
-                else:
-                    query = f"""
-                        SELECT *
-                        FROM {schema}.{table}
-                        LIMIT %s
-                    """
-                    cur.execute(query, (limit,))
-                
-                return cur.fetchall()
-        except Exception as e:
-            logger.error(f"Error retrieving reference data from {schema}.{table}: {e}")
-            return []
+    def close_pools(self):
+        """Close every pooled connection (reconnect or process shutdown)"""
+        self.flush_writes(timeout=5)
+        with self._pool_lock:
+            for pool in (self.silver_pool, self.game_pool):
+                if pool is not None and not pool.closed:
+                    pool.closeall()
+            self.silver_pool = None
+            self.game_pool = None
     
-    def get_campaign_data(self, campaign_id):
-        """Get campaign data from Game database"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            logger.info(f"[DB] Checking existence of Campaigns table...")
+    @lru_cache(maxsize=256)
+    def _table_exists(self, schema, table):
+        """Check (once per process) that a table exists in the Game database"""
+        with self.game_connection() as conn:
+            cursor = self._get_cursor(conn, TupleCursor)
             cursor.execute("""
                 SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'Campaigns'
-                )
-            """)
-            result = cursor.fetchone()
-            logger.info(f"[DB] Table existence result: {result}")
-            logger.info(f"[DB] Result type: {type(result)}")
-            
-            # Handle both RealDictCursor and regular cursor results
-            if result is None:
-                logger.error("Table existence check returned None")
-                return None
-            
-            # Check if it's a RealDictRow (dict-like) or tuple
-            if hasattr(result, 'get'):
-                # It's a RealDictRow, use dict access
-                table_exists = result.get('exists', False)
-            else:
-                # It's a tuple, use index access
-                table_exists = result[0] if len(result) > 0 else False
-            
-            logger.info(f"[DB] Table exists: {table_exists}")
-            
-            if not table_exists:
-                logger.error("Table 'Campaigns' does not exist")
-                return None
-                
-            logger.info(f"[DB] Querying campaign with Id={campaign_id}")
-            cursor.execute("""
-                SELECT *
-                FROM "Campaigns"
-                WHERE "Id" = %s
-            """, (campaign_id,))
+                    SELECT FROM information_schema.tables
+                    WHERE table_schema = %s
+                    AND table_name = %s
+                ) AS "exists"
+            """, (schema, table))
             result = cursor.fetchone()
-            logger.info(f"[DB] Campaign query result: {result}")
-            logger.info(f"[DB] Campaign result type: {type(result)}")
-            
-            if result is None:
-                logger.error(f"Campaign with ID {campaign_id} not found")
-                return None
-            return result
-        except Exception as e:
-            logger.error(f"Error retrieving campaign data for campaign_id {campaign_id}: {e}")
-            logger.error(f"Exception type: {type(e)}, args: {e.args}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
+        return bool(result and result[0])
     
-    def get_campaign_characters(self, campaign_id):
-        """Get characters for a campaign from Game database"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            # Check if tables exist
+    def load_catalog(self):
+        """Load the text columns of every Silver table in a single query"""
+        with self.silver_connection() as conn:
+            cursor = self._get_cursor(conn, TupleCursor)
             cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'Characters'
-                ) AND EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'CampaignCharacters'
-                )
+                SELECT table_schema, table_name, column_name
+                FROM information_schema.columns
+                WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+                AND data_type IN ('character varying', 'text')
+                ORDER BY table_schema, table_name, ordinal_position
             """)
-            
-            tables_exist = cursor.fetchone()
-            logger.info(f"[DB] Characters tables existence result: {tables_exist}, type: {type(tables_exist)}")
-            
-            # Handle both RealDictCursor and regular cursor results
-            if tables_exist is None:
-                logger.error("Tables existence check returned None")
-                return []
-                
-            # Check if it's a RealDictRow (dict-like) or tuple
-            if hasattr(tables_exist, 'get'):
-                # It's a RealDictRow, use dict access
-                exist_value = tables_exist.get('?column?', False)  # EXISTS query returns ?column?
-            else:
-                # It's a tuple, use index access
-                exist_value = tables_exist[0] if len(tables_exist) > 0 else False
-            
-            if not exist_value:
-                logger.error("Tables 'Characters' or 'CampaignCharacters' do not exist")
-                return []
-            
-            # Execute query if tables exist
-            cursor.execute("""
-                SELECT c.*
-                FROM "Characters" c
-                JOIN "CampaignCharacters" cc ON c."Id" = cc."CharacterId"
-                WHERE cc."CampaignId" = %s
-            """, (campaign_id,))
-            results = cursor.fetchall()
-            logger.info(f"[DB] Found {len(results)} characters for campaign {campaign_id}")
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving characters for campaign_id {campaign_id}: {e}")
-            logger.error(f"Exception type: {type(e)}, args: {e.args}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
+            rows = cursor.fetchall()
+        catalog = {}
+        for schema, table, column_name in rows:
+            catalog.setdefault((schema, table), []).append(column_name)
+        self._text_catalog = {key: tuple(columns) for key, columns in catalog.items()}
+        logger.info(f"[DB] Loaded Silver column catalog ({len(self._text_catalog)} tables)")
+        return self._text_catalog
     
-    def get_campaign_messages(self, campaign_id, limit=20):
-        """Get message history for a campaign from Game database"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            # Check if table exists
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'CampaignMessages'
+    def _text_columns(self, schema, table):
+        """Text columns of a Silver table, read from the preloaded catalog"""
+        catalog = self._text_catalog
+        if catalog is None:
+            catalog = self.load_catalog()
+        return catalog.get((schema, table), ())
+    
+    def clear_schema_cache(self):
+        """Forget cached schema lookups (after a reconnect or a missing table)"""
+        DBService._table_exists.cache_clear()
+        self._text_catalog = None
+    
+    def clear_reference_cache(self):
+        """Forget cached monster and spell lookups (after the Silver tables were reloaded)"""
+        with self._reference_cache_lock:
+            self._monster_cache.clear()
+            self._spell_cache.clear()
+    
+    def _start_reference_listener(self):
+        """Start the thread listening for Silver reference table changes once"""
+        if self._listener_thread is None or not self._listener_thread.is_alive():
+            with self._pool_lock:
+                if self._listener_thread is None or not self._listener_thread.is_alive():
+                    self._listener_thread = threading.Thread(
+                        target=self._listener_loop, name="db-reference-listener", daemon=True
+                    )
+                    self._listener_thread.start()
+    
+    def _listener_loop(self):
+        """LISTEN on REFERENCE_CHANNEL and invalidate the matching caches, reconnecting on failure"""
+        while True:
+            conn = None
+            try:
+                conn = self._connect_with_retry(
+                    host=settings.silver_db_host,
+                    port=settings.silver_db_port,
+                    dbname=settings.silver_db_name,
+                    user=settings.db_read_user,
+                    password=settings.db_read_password
                 )
-            """)
-            
-            result = cursor.fetchone()
-            logger.info(f"[DB] CampaignMessages table existence result: {result}, type: {type(result)}")
-            
-            # Handle both RealDictCursor and regular cursor results
-            if result is None:
-                logger.error("Table existence check returned None")
-                return []
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {REFERENCE_CHANNEL}")
+                # Des notifications ont pu être perdues pendant la coupure
+                self.clear_reference_cache()
+                logger.info(f"Listening for Silver reference changes on '{REFERENCE_CHANNEL}'")
                 
-            # Check if it's a RealDictRow (dict-like) or tuple
-            if hasattr(result, 'get'):
-                # It's a RealDictRow, use dict access
-                table_exists = result.get('exists', False)
-            else:
-                # It's a tuple, use index access
-                table_exists = result[0] if len(result) > 0 else False
-            
-            if not table_exists:
-                logger.error("Table 'CampaignMessages' does not exist")
-                return []
-            
-            # Check if SentAt column exists
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.columns
+                while True:
+                    if select.select([conn], [], [], LISTENER_POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._invalidate_reference(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"Reference listener stopped ({e}), restarting in {LISTENER_RETRY_SECONDS}s")
+                time.sleep(LISTENER_RETRY_SECONDS)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
+    
+    def _invalidate_reference(self, table):
+        """Drop the cached lookups of a changed Silver table ("schema.table")"""
+        logger.info(f"[DB] Silver table {table} changed, invalidating cached lookups")
+        with self._reference_cache_lock:
+            if table == MONSTER_TABLE:
+                self._monster_cache.clear()
+            elif table == SPELL_TABLE:
+                self._spell_cache.clear()
+        self._text_catalog = None
+    
+    def _cached_reference_lookup(self, cache, statement, name):
+        """Read-through lookup of a Silver row by name, misses included"""
+        self._start_reference_listener()
+        key = name.strip().lower()
+        with self._reference_cache_lock:
+            cached = cache.get(key)
+        if cached is not None:
+            # Copie : l'appelant peut modifier la ligne sans altérer le cache
+            return None if cached is _NOT_FOUND else dict(cached)
+        
+        with self.silver_connection() as conn:
+            cursor = self._get_cursor(conn)
+            # Même nom normalisé que la clé : une entrée ne dépend pas de la casse ni des espaces de l'appel
+            self._execute_prepared(cursor, statement, (f"%{key}%",))
+            result = cursor.fetchone()
+        
+        if result is None:
+            with self._reference_cache_lock:
+                cache[key] = _NOT_FOUND
+            return None
+        with self._reference_cache_lock:
+            cache[key] = result
+        return dict(result)
+    
+    def _get_campaign_messages_query(self, full=False):
+        """Resolve once the ordering column of CampaignMessages and build the message query"""
+        if self._msg_query is None:
+            with self.game_connection() as conn:
+                cursor = self._get_cursor(conn, TupleCursor)
+                cursor.execute("""
+                    SELECT column_name
+                    FROM information_schema.columns
                     WHERE table_schema = 'public'
                     AND table_name = 'CampaignMessages'
-                    AND column_name = 'SentAt'
-                )
-            """)
-            
-            result = cursor.fetchone()
-            
-            # Handle both RealDictCursor and regular cursor results
+                    AND column_name IN ('SentAt', 'CreatedAt', 'Id')
+                    ORDER BY array_position(ARRAY['SentAt', 'CreatedAt', 'Id']::text[], column_name::text)
+                    LIMIT 1
+                """)
+                result = cursor.fetchone()
             if result is None:
-                logger.error("SentAt column existence check returned None")
-                return []
-                
-            if hasattr(result, 'get'):
-                sentat_exists = result.get('exists', False)
-            else:
-                sentat_exists = result[0] if len(result) > 0 else False
+                # Table absente : rien n'est mémorisé, la résolution sera retentée
+                return None
+            order_col = result[0]
+            logger.info(f"[DB] CampaignMessages ordered by \"{order_col}\"")
+            self._msg_order_col = order_col
+            columns = MESSAGE_COLUMNS if f'"{order_col}"' in MESSAGE_COLUMNS else MESSAGE_COLUMNS + (f'"{order_col}"',)
+            self._msg_select = ", ".join(columns)
+            self._msg_query = self._build_campaign_messages_query(self._msg_select)
+        if full:
+            return self._build_campaign_messages_query("*")
+        return self._msg_query
+    
+    def _build_campaign_messages_query(self, select_list):
+        """Build the latest-messages query ordered by the resolved column"""
+        return f"""
+            SELECT {select_list}
+            FROM "CampaignMessages"
+            WHERE "CampaignId" = %s
+            ORDER BY "{self._msg_order_col}" DESC
+            LIMIT %s
+        """
+    
+    def _reference_query(self, schema, table, limit, search_query):
+        """Query and parameters of a reference data read, None if the table has no text column"""
+        if not search_query:
+            return _reference_sql(schema, table, ()), (limit,)
+        
+        text_columns = self._text_columns(schema, table)
+        if not text_columns:
+            # Table inconnue (ou sans texte) : le catalogue sera rechargé au prochain appel
+            self._text_catalog = None
+            return None
+        
+        # Un seul prédicat ILIKE sur la concaténation des colonnes texte
+        # (au lieu d'une chaîne de OR, un paramètre unique)
+        return _reference_sql(schema, table, text_columns), (f"%{search_query}%", limit)
+    
+    def _stream(self, pool, query, params, batch=STREAM_BATCH_ROWS):
+        """Yield the rows of a query through a server-side named cursor, batch rows at a time
+        
+        The pooled connection is held until the generator is exhausted or closed.
+        """
+        with self._pooled_connection(pool) as conn:
+            # Un curseur nommé vit dans une transaction, et psycopg2 le refuse sur une connexion
+            # en autocommit (un BEGIN explicite ne suffit pas) : autocommit coupé le temps du parcours
+            conn.autocommit = False
+            try:
+                # Première requête de la transaction (psycopg2 envoie le BEGIN) : lecture seule
+                self._get_cursor(conn, TupleCursor).execute("SET TRANSACTION READ ONLY")
+                with conn.cursor(name=f"stream_{uuid4().hex}", cursor_factory=RealDictCursor) as named:
+                    named.itersize = batch
+                    named.execute(query, params)
+                    yield from named
+                conn.commit()
+            except BaseException:
+                if not conn.closed:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error as e:
+                        logger.warning(f"Rollback of streaming read failed: {e}")
+                raise
+            finally:
+                # Connexion rendue au pool en autocommit (sinon remis à l'emprunt suivant)
+                if not conn.closed and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.autocommit = True
+    
+    def iter_reference_data(self, schema, table, limit=None, search_query=None, batch=STREAM_BATCH_ROWS):
+        """Iterate over reference data from Silver database without loading it all (limit=None: no limit)"""
+        reference_query = self._reference_query(schema, table, limit, search_query)
+        if reference_query is None:
+            return iter(())
+        query, params = reference_query
+        return self._stream(self._get_silver_pool(), query, params, batch)
+    
+    @_retry_on_drop
+    def get_reference_data(self, schema, table, limit=100, search_query=None):
+        """Get reference data from Silver database"""
+        try:
+            if limit is None or limit > STREAM_THRESHOLD_ROWS:
+                return list(self.iter_reference_data(schema, table, limit, search_query))
             
-            # Execute query based on available columns
-            if sentat_exists:
-                # Use SentAt column for ordering
+            reference_query = self._reference_query(schema, table, limit, search_query)
+            if reference_query is None:
+                return []
+            query, params = reference_query
+            with self.silver_connection() as conn:
+                cur = self._get_cursor(conn)
+                cur.execute(query, params)
+                return cur.fetchall()
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            logger.error(f"Error retrieving reference data from {schema}.{table}: {e}")
+            return []
+        
+    @_retry_on_drop
+    def get_campaign_data(self, campaign_id):
+        """Get campaign data from Game database"""
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                if not self._table_exists('public', 'Campaigns'):
+                    logger.error("Table 'Campaigns' does not exist")
+                    self.clear_schema_cache()
+                    return None
+                    
+                logger.debug(f"[DB] Querying campaign with Id={campaign_id}")
                 cursor.execute("""
                     SELECT *
-                    FROM "CampaignMessages"
-                    WHERE "CampaignId" = %s
-                    ORDER BY "SentAt" DESC
-                    LIMIT %s
-                """, (campaign_id, limit))
-            else:
-                # Try CreatedAt or default to Id if neither exists
-                cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.columns
-                        WHERE table_schema = 'public'
-                        AND table_name = 'CampaignMessages'
-                        AND column_name = 'CreatedAt'
-                    )
-                """)
+                    FROM "Campaigns"
+                    WHERE "Id" = %s
+                """, (campaign_id,))
                 result = cursor.fetchone()
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[DB] Campaign query result: {result}")
                 
                 if result is None:
-                    logger.error("CreatedAt column existence check returned None")
+                    logger.error(f"Campaign with ID {campaign_id} not found")
+                    return None
+                return result
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving campaign data for campaign_id {campaign_id}: {e}")
+                logger.error(f"Exception type: {type(e)}, args: {e.args}")
+                return None
+        
+    @_retry_on_drop
+    def get_campaign_characters(self, campaign_id, full=False):
+        """Get characters for a campaign from Game database
+        
+        By default only CHARACTER_COLUMNS are returned; full=True returns every Characters column.
+        """
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                # Check if tables exist
+                if not (self._table_exists('public', 'Characters') and self._table_exists('public', 'CampaignCharacters')):
+                    logger.error("Tables 'Characters' or 'CampaignCharacters' do not exist")
+                    self.clear_schema_cache()
                     return []
-                    
-                if hasattr(result, 'get'):
-                    createdat_exists = result.get('exists', False)
-                else:
-                    createdat_exists = result[0] if len(result) > 0 else False
                 
-                if createdat_exists:
-                    cursor.execute("""
-                        SELECT *
-                        FROM "CampaignMessages"
-                        WHERE "CampaignId" = %s
-                        ORDER BY "CreatedAt" DESC
-                        LIMIT %s
-                    """, (campaign_id, limit))
-                else:
-                    # Fallback to Id if no timestamp columns exist
-                    cursor.execute("""
-                        SELECT *
-                        FROM "CampaignMessages"
-                        WHERE "CampaignId" = %s
-                        ORDER BY "Id" DESC
-                        LIMIT %s
-                    """, (campaign_id, limit))
+                # Execute query if tables exist
+                select_list = 'c.*, cc."CharacterId", cc."CurrentLocationId", cc."CurrentLocation"' if full else CHARACTER_SELECT
+                cursor.execute(f"""
+                    SELECT {select_list}
+                    FROM "Characters" c
+                    JOIN "CampaignCharacters" cc ON c."Id" = cc."CharacterId"
+                    WHERE cc."CampaignId" = %s
+                """, (campaign_id,))
+                results = cursor.fetchall()
+                logger.debug(f"[DB] Found {len(results)} characters for campaign {campaign_id}")
+                return results
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving characters for campaign_id {campaign_id}: {e}")
+                logger.error(f"Exception type: {type(e)}, args: {e.args}")
+                return []
+        
+    @_retry_on_drop
+    def get_campaign_messages(self, campaign_id, limit=20, full=False):
+        """Get message history for a campaign from Game database
+        
+        By default only MESSAGE_COLUMNS (plus the ordering column) are returned; full=True returns every column.
+        """
+        try:
+            query = self._get_campaign_messages_query(full=full)
+            if query is None:
+                logger.error("Table 'CampaignMessages' does not exist")
+                return []
             
-            results = cursor.fetchall()
-            logger.info(f"[DB] Found {len(results)} messages for campaign {campaign_id}")
+            if limit is None or limit > STREAM_THRESHOLD_ROWS:
+                # Longs historiques : lecture par paquets via un curseur serveur
+                results = list(self._stream(self._get_game_pool(), query, (campaign_id, limit)))
+            else:
+                with self.game_connection() as conn:
+                    cursor = self._get_cursor(conn)
+                    cursor.execute(query, (campaign_id, limit))
+                    results = cursor.fetchall()
+            logger.debug(f"[DB] Found {len(results)} messages for campaign {campaign_id}")
             return results
-        except Exception as e:
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
             logger.error(f"Error retrieving messages for campaign_id {campaign_id}: {e}")
             logger.error(f"Exception type: {type(e)}, args: {e.args}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-    
+        
     def save_campaign_message(self, campaign_id, message_type, content, user_id=None, character_id=None):
-        """Save a campaign message to the database"""
-        conn = self.get_game_db_connection()
-        cursor = None
+        """Queue a campaign message for the background writer and return immediately
+        
+        The message is timestamped now, not when the writer saves it. Returns a Future
+        resolved with True once the message is written, or False if it was dropped.
+        Call flush_writes() before reading back messages that must be visible.
+        """
+        written = Future()
+        self._start_writer()
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO "CampaignMessages" (
-                    "CampaignId", "MessageType", "Content", "UserId", "CharacterId", "SentAt"
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-            """, (campaign_id, message_type, content, user_id, character_id, datetime.now()))
-            
-            logger.info(f"Saved campaign message: {message_type} for campaign {campaign_id}")
+            self._write_queue.put(
+                ((campaign_id, message_type, content, user_id, character_id, datetime.now()), written), timeout=5
+            )
+        except queue.Full:
+            logger.error(f"Write queue full, dropping campaign message for campaign {campaign_id}")
+            written.set_result(False)
+        return written
+    
+    def _start_writer(self):
+        """Start the background writer thread once"""
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            with self._pool_lock:
+                if self._writer_thread is None or not self._writer_thread.is_alive():
+                    self._writer_thread = threading.Thread(
+                        target=self._writer_loop, name="db-writer", daemon=True
+                    )
+                    self._writer_thread.start()
+    
+    def _writer_loop(self):
+        """Drain the write queue, saving each drained batch with a single INSERT"""
+        # Connexions sondées avant chaque lot : une connexion inactive coupée est remplacée
+        # avant l'INSERT, dont l'échec ne peut plus être rejoué sans risque de doublon
+        self._local.validate = True
+        while True:
+            batch = [self._write_queue.get()]
+            while len(batch) < WRITE_BATCH_MAX_ROWS:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                saved = self._write_batch([message for message, _ in batch])
+                for (_, written), ok in zip(batch, saved):
+                    written.set_result(ok)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def _write_batch(self, messages):
+        """Save a drained batch, retrying it while no connection can be obtained
+        
+        A batch lost mid-INSERT is never replayed (it may have been committed). A batch
+        the database rejects is saved message by message so that only the faulty
+        messages are lost. Returns one success flag per message.
+        """
+        delay = WRITE_RETRY_DELAY_SECONDS
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                saved = self.save_campaign_messages(messages)
+            except TRANSIENT_ERRORS as e:
+                if attempt == WRITE_RETRIES:
+                    logger.error(f"Dropping {len(messages)} campaign message(s) after {attempt} failed attempts: {e}")
+                    return [False] * len(messages)
+                logger.warning(f"Saving {len(messages)} campaign message(s) failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if saved is None or saved:
+                return [bool(saved)] * len(messages)
+            break
+        if len(messages) == 1:
+            return [False]
+        return [self._write_batch([message])[0] for message in messages]
+    
+    def flush_writes(self, timeout=None):
+        """Wait until every queued write has been processed; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._write_queue.all_tasks_done:
+            while self._write_queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._write_queue.all_tasks_done.wait(remaining)
+        return True
+        
+    def save_campaign_messages(self, messages):
+        """Save several campaign messages in a single INSERT
+        
+        messages: iterable of (campaign_id, message_type, content, user_id, character_id[, sent_at])
+        tuples; messages without sent_at are timestamped now.
+        
+        Returns True once saved, False if the database rejected the messages and None if
+        the connection dropped during the INSERT (they may have been saved). Connection
+        errors raised before the INSERT is sent propagate: only those can be retried.
+        """
+        sent_at = datetime.now()
+        rows = [message if len(message) == 6 else (*message, sent_at) for message in messages]
+        if not rows:
             return True
-        except Exception as e:
-            logger.error(f"Error saving campaign message: {e}")
+        
+        sent = False
+        try:
+            with self.game_connection() as conn:
+                cursor = self._get_cursor(conn)
+                sent = True
+                execute_values(cursor, """
+                    INSERT INTO "CampaignMessages" (
+                        "CampaignId", "MessageType", "Content", "UserId", "CharacterId", "SentAt"
+                    ) VALUES %s
+                """, rows, page_size=MESSAGE_INSERT_PAGE_SIZE)
+        except TRANSIENT_ERRORS as e:
+            if not sent:
+                raise
+            # Validé ou non avant la coupure : rejouer l'INSERT pourrait dupliquer les messages
+            logger.error(f"Connection lost while saving {len(rows)} campaign message(s), not retried: {e}")
+            return None
+        except psycopg2.Error as e:
+            logger.error(f"Error saving campaign messages: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-    
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Saved {len(rows)} campaign message(s) for campaign(s) {sorted({row[0] for row in rows})}")
+        return True
+        
+    @_retry_on_drop
     def get_monster_by_name(self, name):
-        """Get monster data by name from Silver database"""
-        conn = self.get_silver_db_connection()
-        cursor = None
+        """Get monster data by name from Silver database (cached)"""
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM bestiary.fusion_bestiary
-                WHERE name ILIKE %s
-                LIMIT 1
-            """, (f"%{name}%",))
-            result = cursor.fetchone()
-            return result
-        except Exception as e:
+            return self._cached_reference_lookup(self._monster_cache, "monster_by_name", name)
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
             logger.error(f"Error retrieving monster data for name {name}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-    
+        
+    @_retry_on_drop
     def get_spell_by_name(self, name):
-        """Get spell data by name from Silver database"""
-        conn = self.get_silver_db_connection()
-        cursor = None
+        """Get spell data by name from Silver database (cached)"""
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM spells.fusion_spells
-                WHERE name ILIKE %s
-                LIMIT 1
-            """, (f"%{name}%",))
-            result = cursor.fetchone()
-            return result
-        except Exception as e:
+            return self._cached_reference_lookup(self._spell_cache, "spell_by_name", name)
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
             logger.error(f"Error retrieving spell data for name {name}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-    
+        
+    @_retry_on_drop
     def update_character_content(self, character_id, description=None, portrait_url=None):
         """Update character description and portrait URL"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            
-            # Build update query dynamically based on provided parameters
-            update_fields = []
-            params = []
-            
-            # Always include description if provided (even if None)
-            if description is not None:
-                update_fields.append('"Description" = %s')
-                params.append(description)
-            
-            # Always include portrait_url if provided (even if None)
-            if portrait_url is not None:
-                update_fields.append('"PortraitUrl" = %s')
-                params.append(portrait_url)
-            elif portrait_url is None and 'description' in locals():
-                # If portrait_url is explicitly None, update it to NULL in database
-                update_fields.append('"PortraitUrl" = %s')
-                params.append(None)
-            
-            if not update_fields:
-                logger.warning("No fields to update for character")
-                return None
-            
-            # Add UpdatedAt field
-            update_fields.append('"UpdatedAt" = NOW()')
-            
-            # Add character_id parameter
-            params.append(character_id)
-            
-            query = f"""
-                UPDATE "Characters"
-                SET {', '.join(update_fields)}
-                WHERE "Id" = %s
-                RETURNING "Id", "UpdatedAt"
-            """
-            
-            logger.info(f"[DB] Updating character {character_id} with query: {query}")
-            logger.info(f"[DB] Parameters: {params}")
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully updated character {character_id}")
-                return result
-            else:
-                logger.warning(f"[DB] No character found with ID {character_id}")
-                return None
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
                 
-        except Exception as e:
-            logger.error(f"Error updating character {character_id}: {e}")
-            logger.error(f"Exception type: {type(e)}, args: {e.args}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-    
-    def update_character_location(self, campaign_id, character_id, location_name, location_id=None):
-        """Update character location in a campaign (supports both name and ID for maximum compatibility)"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE "CampaignCharacters"
-                SET "CurrentLocationId" = %s, "CurrentLocation" = %s
-                WHERE "CampaignId" = %s AND "CharacterId" = %s
-                RETURNING "Id"
-            """, (location_id, location_name, campaign_id, character_id))
-            result = cursor.fetchone()
-            
-            if result:
-                conn.commit()  # Commit the transaction immediately
-                logger.info(f"[DB] Successfully updated character {character_id} location to '{location_name}' (ID: {location_id})")
-                return result
-            else:
-                logger.warning(f"[DB] No character found with CampaignId {campaign_id} and CharacterId {character_id}")
+                # Description only when provided; PortraitUrl is always written (NULL if None)
+                if description is not None:
+                    columns = ('Description', 'PortraitUrl')
+                    params = [description, portrait_url, character_id]
+                else:
+                    columns = ('PortraitUrl',)
+                    params = [portrait_url, character_id]
+                
+                query = _update_sql("Characters", columns, ('UpdatedAt',), ('Id', 'UpdatedAt'))
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[DB] Updating character {character_id} with query: {query.as_string(conn)}")
+                    logger.debug(f"[DB] Parameters: {params}")
+                
+                self._execute_plan(cursor, query, params)
+                result = cursor.fetchone()
+                
+                if result:
+                    logger.debug(f"[DB] Successfully updated character {character_id}")
+                    return result
+                else:
+                    logger.warning(f"[DB] No character found with ID {character_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error updating character {character_id}: {e}")
+                logger.error(f"Exception type: {type(e)}, args: {e.args}")
                 return None
+        
+    @_retry_on_drop
+    def update_character_location(self, campaign_id, character_id, location_name, location_id=None):
+        """Update character location in a campaign (supports both name and ID for maximum compatibility)
+        
+        Returns the updated row (Id, CharacterId, CurrentLocationId, CurrentLocation) plus
+        PreviousLocation, so callers don't need to read the location before or after.
+        """
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                # Une seule instruction : le CTE verrouille la ligne et conserve l'ancienne
+                # localisation ; connexion en autocommit, l'UPDATE est validé immédiatement
+                cursor.execute("""
+                    WITH previous AS (
+                        SELECT "Id", "CurrentLocation"
+                        FROM "CampaignCharacters"
+                        WHERE "CampaignId" = %s AND "CharacterId" = %s
+                        FOR UPDATE
+                    )
+                    UPDATE "CampaignCharacters" cc
+                    SET "CurrentLocationId" = %s, "CurrentLocation" = %s
+                    FROM previous
+                    WHERE cc."Id" = previous."Id"
+                    RETURNING cc."Id", cc."CharacterId", cc."CurrentLocationId", cc."CurrentLocation",
+                              previous."CurrentLocation" AS "PreviousLocation"
+                """, (campaign_id, character_id, location_id, location_name))
+                result = cursor.fetchone()
                 
-        except Exception as e:
-            conn.rollback()  # Rollback on error
-            logger.error(f"Error updating character {character_id} location: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-    
+                if result:
+                    logger.debug(f"[DB] Successfully updated character {character_id} location to '{location_name}' (ID: {location_id})")
+                    return result
+                else:
+                    logger.warning(f"[DB] No character found with CampaignId {campaign_id} and CharacterId {character_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error updating character {character_id} location: {e}")
+                return None
+        
+    @_retry_on_drop
     def get_character_location(self, campaign_id, character_id):
         """Get the current location of a character in a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT "CurrentLocation"
-                FROM "CampaignCharacters"
-                WHERE "CampaignId" = %s AND "CharacterId" = %s
-                LIMIT 1
-            """, (campaign_id, character_id))
-            result = cursor.fetchone()
-            
-            if result:
-                location = result['CurrentLocation']
-                logger.info(f"[DB] Character {character_id} is currently in {location}")
-                return location
-            else:
-                logger.warning(f"[DB] No character found with CampaignId {campaign_id} and CharacterId {character_id}")
-                return None
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn, TupleCursor)
+                self._execute_prepared(cursor, "character_location", (campaign_id, character_id))
+                result = cursor.fetchone()
                 
-        except Exception as e:
-            logger.error(f"Error getting character {character_id} location: {e}")
+                if result:
+                    location = result[0]
+                    logger.debug(f"[DB] Character {character_id} is currently in {location}")
+                    return location
+                else:
+                    logger.warning(f"[DB] No character found with CampaignId {campaign_id} and CharacterId {character_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error getting character {character_id} location: {e}")
+                return None
+        
+    # NPC Management Functions
+    def create_campaign_npcs_bulk(self, campaign_id, npcs):
+        """Create several NPCs for a campaign in one transaction
+        
+        npcs is a list of dicts with 'name', 'type', 'race' and the create_campaign_npc keyword names.
+        Returns the created rows in input order, or None on error (nothing is created).
+        """
+        try:
+            results = self._insert_bulk(
+                "CampaignNPCs", {'name': 'Name', 'type': 'Type', 'race': 'Race'}, NPC_INSERT_FIELDS,
+                campaign_id, npcs
+            )
+        except psycopg2.Error as e:
+            logger.error(f"Error creating NPCs in bulk for campaign {campaign_id}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
+        self._invalidate_campaign_rows(self._npc_cache, campaign_id)
+        logger.info(f"[DB] Created {len(results)} NPCs for campaign {campaign_id}")
+        return results
     
-    # NPC Management Functions
     def create_campaign_npc(self, campaign_id, name, npc_type, race, **kwargs):
         """Create a new NPC for a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                
+                keys = _provided_keys(NPC_INSERT_FIELDS, kwargs)
+                query = _insert_sql(
+                    "CampaignNPCs",
+                    ('CampaignId', 'Name', 'Type', 'Race') + tuple(NPC_INSERT_FIELDS[key] for key in keys),
+                    ('Id', 'CreatedAt')
+                )
+                values = [campaign_id, name, npc_type, race] + [kwargs[key] for key in keys]
+                
+                logger.debug(f"[DB] Creating NPC: {name} for campaign {campaign_id}")
+                self._execute_plan(cursor, query, values)
+                result = cursor.fetchone()
+                
+                if result:
+                    self._invalidate_campaign_rows(self._npc_cache, campaign_id)
+                    logger.info(f"[DB] Successfully created NPC {name} with ID {result['Id']}")
+                    return result
+                else:
+                    logger.error(f"[DB] Failed to create NPC {name}")
+                    return None
+                    
+            except psycopg2.Error as e:
+                logger.error(f"Error creating NPC {name}: {e}")
+                return None
+        
+    @_retry_on_drop
+    def get_campaign_bundle(self, campaign_id, msg_limit=20):
+        """Get campaign, characters, messages and NPCs in a single round trip
+        
+        Returns a dict with keys campaign (None if not found), characters, messages, npcs.
+        Rows are aggregated server-side with json_agg: timestamps come back as ISO strings.
+        """
         try:
-            cursor = conn.cursor()
-            
-            # Build insert query dynamically
-            fields = ['"CampaignId"', '"Name"', '"Type"', '"Race"']
-            values = [campaign_id, name, npc_type, race]
-            placeholders = ['%s', '%s', '%s', '%s']
+            if self._get_campaign_messages_query() is None:
+                logger.error("Table 'CampaignMessages' does not exist")
+                return None
+            order_col = self._msg_order_col
+            
+            with self.read_txn() as conn:
+                cursor = self._get_cursor(conn)
+                cursor.execute(f"""
+                    SELECT
+                        (SELECT row_to_json(c) FROM "Campaigns" c WHERE c."Id" = %(campaign_id)s) AS campaign,
+                        COALESCE((
+                            SELECT json_agg(ch)
+                            FROM (
+                                SELECT {CHARACTER_SELECT}
+                                FROM "Characters" c
+                                JOIN "CampaignCharacters" cc ON c."Id" = cc."CharacterId"
+                                WHERE cc."CampaignId" = %(campaign_id)s
+                            ) ch
+                        ), '[]'::json) AS characters,
+                        COALESCE((
+                            SELECT json_agg(m ORDER BY m."{order_col}" DESC)
+                            FROM (
+                                SELECT {self._msg_select}
+                                FROM "CampaignMessages"
+                                WHERE "CampaignId" = %(campaign_id)s
+                                ORDER BY "{order_col}" DESC
+                                LIMIT %(msg_limit)s
+                            ) m
+                        ), '[]'::json) AS messages,
+                        COALESCE((
+                            SELECT json_agg(n ORDER BY n."CreatedAt" DESC)
+                            FROM (
+                                SELECT {NPC_CONTEXT_SELECT}
+                                FROM "CampaignNPCs"
+                                WHERE "CampaignId" = %(campaign_id)s
+                            ) n
+                        ), '[]'::json) AS npcs
+                """, {"campaign_id": campaign_id, "msg_limit": msg_limit})
+                result = cursor.fetchone()
             
-            # Optional fields
-            optional_fields = {
-                'class': '"Class"',
-                'level': '"Level"',
-                'max_hit_points': '"MaxHitPoints"',
-                'current_hit_points': '"CurrentHitPoints"',
-                'armor_class': '"ArmorClass"',
-                'strength': '"Strength"',
-                'dexterity': '"Dexterity"',
-                'constitution': '"Constitution"',
-                'intelligence': '"Intelligence"',
-                'wisdom': '"Wisdom"',
-                'charisma': '"Charisma"',
-                'alignment': '"Alignment"',
-                'description': '"Description"',
-                'current_location': '"CurrentLocation"',
-                'status': '"Status"',
-                'notes': '"Notes"',
-                'portrait_url': '"PortraitUrl"'
+            bundle = dict(result)
+            logger.debug(f"[DB] Campaign bundle for {campaign_id}: found={bundle['campaign'] is not None}, "
+                        f"{len(bundle['characters'])} characters, {len(bundle['messages'])} messages, {len(bundle['npcs'])} NPCs")
+            return bundle
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            logger.error(f"Error retrieving campaign bundle for campaign_id {campaign_id}: {e}")
+            logger.error(f"Exception type: {type(e)}, args: {e.args}")
+            return None
+        
+    @_retry_on_drop
+    def get_campaign_elements(self, campaign_id):
+        """Get the NPCs, locations and quests of a campaign from one snapshot (read_txn)
+        
+        The campaign cache is bypassed so that all three lists come from the snapshot.
+        Database errors propagate instead of yielding empty lists.
+        """
+        with self.read_txn():
+            return {
+                "npcs": self.get_campaign_npcs(campaign_id),
+                "locations": self.get_campaign_locations(campaign_id),
+                "quests": self.get_campaign_quests(campaign_id),
             }
-            
-            for key, field in optional_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    fields.append(field)
-                    values.append(kwargs[key])
-                    placeholders.append('%s')
-            
-            query = f"""
-                INSERT INTO "CampaignNPCs" ({', '.join(fields)})
-                VALUES ({', '.join(placeholders)})
-                RETURNING "Id", "CreatedAt"
-            """
-            
-            logger.info(f"[DB] Creating NPC: {name} for campaign {campaign_id}")
-            cursor.execute(query, values)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully created NPC {name} with ID {result['Id']}")
+    
+    @_retry_on_drop
+    def get_campaign_npcs(self, campaign_id):
+        """Get all NPCs for a campaign (cached for CAMPAIGN_CACHE_TTL_SECONDS)"""
+        return self._cached_campaign_rows(self._npc_cache, CAMPAIGN_NPCS_SQL, campaign_id, "NPCs")
+        
+    @_retry_on_drop
+    def get_npc_by_name(self, campaign_id, name):
+        """Get an NPC by name for a specific campaign"""
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                self._execute_prepared(cursor, "npc_by_name", (campaign_id, f"%{name}%"))
+                result = cursor.fetchone()
                 return result
-            else:
-                logger.error(f"[DB] Failed to create NPC {name}")
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving NPC {name} for campaign {campaign_id}: {e}")
                 return None
+        
+    @_retry_on_drop
+    def _rows_by_names(self, query, campaign_id, names, label):
+        """Run a *_BY_NAMES_SQL lookup, as {name: row} for the names that matched (None on error)"""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                cursor.execute(query, {'names': names, 'campaign_id': campaign_id})
+                return {row.pop('lookup_name'): row for row in cursor.fetchall()}
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving {label} {names} for campaign {campaign_id}: {e}")
+                return None
+        
+    def get_npcs_by_names(self, campaign_id, names):
+        """Get several NPCs by name in one query, as {name: npc} (same matching as get_npc_by_name)"""
+        return self._rows_by_names(NPCS_BY_NAMES_SQL, campaign_id, names, "NPCs")
+        
+    @_retry_on_drop
+    def update_npc(self, npc_id, **kwargs):
+        """Update an existing NPC"""
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
                 
-        except Exception as e:
-            logger.error(f"Error creating NPC {name}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
+                keys = _provided_keys(NPC_UPDATE_FIELDS, kwargs)
+                if not keys:
+                    logger.warning("No fields to update for NPC")
+                    return None
+                
+                query = _update_sql(
+                    "CampaignNPCs",
+                    tuple(NPC_UPDATE_FIELDS[key] for key in keys),
+                    ('UpdatedAt',),
+                    ('Id', 'UpdatedAt', 'CampaignId')
+                )
+                params = [kwargs[key] for key in keys] + [npc_id]
+                
+                self._execute_plan(cursor, query, params)
+                result = cursor.fetchone()
+                
+                if result:
+                    self._invalidate_campaign_rows(self._npc_cache, result['CampaignId'])
+                    logger.debug(f"[DB] Successfully updated NPC {npc_id}")
+                    return result
+                else:
+                    logger.warning(f"[DB] No NPC found with ID {npc_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error updating NPC {npc_id}: {e}")
+                return None
     
-    def get_campaign_npcs(self, campaign_id):
-        """Get all NPCs for a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM "CampaignNPCs"
-                WHERE "CampaignId" = %s
-                ORDER BY "CreatedAt" DESC
-            """, (campaign_id,))
-            results = cursor.fetchall()
-            logger.info(f"[DB] Found {len(results)} NPCs for campaign {campaign_id}")
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving NPCs for campaign {campaign_id}: {e}")
+    def _update_bulk(self, table, fields, touched, updates):
+        """Update several rows of a campaign table by "Id" in one transaction
+        
+        updates is an iterable of (row_id, values) keyed like fields; touched(values) gives the
+        columns set to NOW(). Rows sharing the same columns go in one execute_batch.
+        Returns the ids of the rows submitted (those with at least one field).
+        """
+        # Regroupement par jeu de colonnes : une requête UPDATE (mémoïsée) par groupe
+        groups = {}
+        for row_id, values in updates:
+            keys = _provided_keys(fields, values)
+            if not keys:
+                logger.warning(f"No fields to update for {table} {row_id}")
+                continue
+            groups.setdefault((keys, touched(values)), []).append([values[key] for key in keys] + [row_id])
+        
+        if not groups:
             return []
-        finally:
-            if cursor:
-                cursor.close()
+        
+        with self.game_connection() as conn:
+            cursor = self._get_cursor(conn)
+            cursor.execute("BEGIN")
+            try:
+                for (keys, touched_columns), rows in groups.items():
+                    query = _update_sql(
+                        table,
+                        tuple(fields[key] for key in keys),
+                        touched_columns,
+                        ('Id', 'UpdatedAt')
+                    )
+                    execute_batch(cursor, query, rows, page_size=CONTENT_UPDATE_PAGE_SIZE)
+                cursor.execute("COMMIT")
+            except psycopg2.Error:
+                if not conn.closed:
+                    cursor.execute("ROLLBACK")
+                raise
+        
+        updated = [row[-1] for rows in groups.values() for row in rows]
+        logger.info(f"[DB] Updated {len(updated)} {table} rows in {len(groups)} batch(es)")
+        return updated
     
-    def get_npc_by_name(self, campaign_id, name):
-        """Get an NPC by name for a specific campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
+    @_retry_on_drop
+    def update_npcs_bulk(self, campaign_id, updates):
+        """Update several NPCs of a campaign in one transaction
+        
+        updates is an iterable of (npc_id, fields) where fields uses the update_npc keyword names.
+        Returns the ids of the NPCs updated, or None on error (nothing is applied).
+        """
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM "CampaignNPCs"
-                WHERE "CampaignId" = %s AND "Name" ILIKE %s
-                LIMIT 1
-            """, (campaign_id, f"%{name}%"))
-            result = cursor.fetchone()
-            return result
-        except Exception as e:
-            logger.error(f"Error retrieving NPC {name} for campaign {campaign_id}: {e}")
+            updated = self._update_bulk("CampaignNPCs", NPC_UPDATE_FIELDS, lambda fields: ('UpdatedAt',), updates)
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            logger.error(f"Error updating NPCs in bulk for campaign {campaign_id}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
+        self._invalidate_campaign_rows(self._npc_cache, campaign_id)
+        return updated
+        
+    def _insert_bulk(self, table, required, fields, campaign_id, items):
+        """Insert several rows of a campaign table in one transaction
+        
+        required maps the mandatory item keys to their columns, fields the optional ones.
+        Items sharing the same set of provided fields go in one execute_values.
+        Returns the ("Id", "CreatedAt") rows in the order of items.
+        """
+        # Regroupement par jeu de colonnes : un INSERT multi-VALUES (mémoïsé) par groupe
+        groups = {}
+        for index, item in enumerate(items):
+            keys = _provided_keys(fields, item)
+            row = [campaign_id] + [item[key] for key in required] + [item[key] for key in keys]
+            groups.setdefault(keys, []).append((index, row))
+        
+        results = [None] * len(items)
+        if not groups:
+            return results
+        
+        with self.game_connection() as conn:
+            cursor = self._get_cursor(conn)
+            cursor.execute("BEGIN")
+            try:
+                for keys, rows in groups.items():
+                    query = _insert_values_sql(
+                        table,
+                        ('CampaignId',) + tuple(required.values()) + tuple(fields[key] for key in keys),
+                        ('Id', 'CreatedAt')
+                    )
+                    created = execute_values(
+                        cursor, query, [row for _, row in rows],
+                        page_size=CONTENT_INSERT_PAGE_SIZE, fetch=True
+                    )
+                    for (index, _), result in zip(rows, created):
+                        results[index] = result
+                cursor.execute("COMMIT")
+            except psycopg2.Error:
+                if not conn.closed:
+                    cursor.execute("ROLLBACK")
+                raise
+        return results
     
-    def update_npc(self, npc_id, **kwargs):
-        """Update an existing NPC"""
-        conn = self.get_game_db_connection()
-        cursor = None
+    # Location Management Functions
+    def create_campaign_locations_bulk(self, campaign_id, locations):
+        """Create several locations for a campaign in one transaction
+        
+        locations is a list of dicts with 'name', 'type' and the create_campaign_location keyword names.
+        Returns the created rows in input order, or None on error (nothing is created).
+        """
         try:
-            cursor = conn.cursor()
-            
-            # Build update query dynamically
-            update_fields = []
-            params = []
-            
-            updatable_fields = {
-                'name': '"Name"',
-                'type': '"Type"',
-                'race': '"Race"',
-                'class': '"Class"',
-                'level': '"Level"',
-                'max_hit_points': '"MaxHitPoints"',
-                'current_hit_points': '"CurrentHitPoints"',
-                'armor_class': '"ArmorClass"',
-                'strength': '"Strength"',
-                'dexterity': '"Dexterity"',
-                'constitution': '"Constitution"',
-                'intelligence': '"Intelligence"',
-                'wisdom': '"Wisdom"',
-                'charisma': '"Charisma"',
-                'alignment': '"Alignment"',
-                'description': '"Description"',
-                'current_location': '"CurrentLocation"',
-                'status': '"Status"',
-                'notes': '"Notes"',
-                'portrait_url': '"PortraitUrl"'
-            }
-            
-            for key, field in updatable_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    update_fields.append(f'{field} = %s')
-                    params.append(kwargs[key])
-            
-            if not update_fields:
-                logger.warning("No fields to update for NPC")
-                return None
-            
-            # Add UpdatedAt field
-            update_fields.append('"UpdatedAt" = NOW()')
-            params.append(npc_id)
-            
-            query = f"""
-                UPDATE "CampaignNPCs"
-                SET {', '.join(update_fields)}
-                WHERE "Id" = %s
-                RETURNING "Id", "UpdatedAt"
-            """
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully updated NPC {npc_id}")
-                return result
-            else:
-                logger.warning(f"[DB] No NPC found with ID {npc_id}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error updating NPC {npc_id}: {e}")
+            results = self._insert_bulk(
+                "CampaignLocations", {'name': 'Name', 'type': 'Type'}, LOCATION_INSERT_FIELDS,
+                campaign_id, locations
+            )
+        except psycopg2.Error as e:
+            logger.error(f"Error creating locations in bulk for campaign {campaign_id}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
+        self._invalidate_campaign_rows(self._location_cache, campaign_id)
+        logger.info(f"[DB] Created {len(results)} locations for campaign {campaign_id}")
+        return results
     
-    # Location Management Functions
     def create_campaign_location(self, campaign_id, name, location_type, **kwargs):
         """Create a new location for a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            
-            # Build insert query dynamically
-            fields = ['"CampaignId"', '"Name"', '"Type"']
-            values = [campaign_id, name, location_type]
-            placeholders = ['%s', '%s', '%s']
-            
-            # Optional fields
-            optional_fields = {
-                'description': '"Description"',
-                'short_description': '"ShortDescription"',
-                'parent_location_id': '"ParentLocationId"',
-                'is_discovered': '"IsDiscovered"',
-                'is_accessible': '"IsAccessible"',
-                'climate': '"Climate"',
-                'terrain': '"Terrain"',
-                'population': '"Population"',
-                'notes': '"Notes"',
-                'image_url': '"ImageUrl"'
-            }
-            
-            for key, field in optional_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    fields.append(field)
-                    values.append(kwargs[key])
-                    placeholders.append('%s')
-            
-            query = f"""
-                INSERT INTO "CampaignLocations" ({', '.join(fields)})
-                VALUES ({', '.join(placeholders)})
-                RETURNING "Id", "CreatedAt"
-            """
-            
-            logger.info(f"[DB] Creating location: {name} for campaign {campaign_id}")
-            cursor.execute(query, values)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully created location {name} with ID {result['Id']}")
-                return result
-            else:
-                logger.error(f"[DB] Failed to create location {name}")
-                return None
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
                 
-        except Exception as e:
-            logger.error(f"Error creating location {name}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
+                keys = _provided_keys(LOCATION_INSERT_FIELDS, kwargs)
+                query = _insert_sql(
+                    "CampaignLocations",
+                    ('CampaignId', 'Name', 'Type') + tuple(LOCATION_INSERT_FIELDS[key] for key in keys),
+                    ('Id', 'CreatedAt')
+                )
+                values = [campaign_id, name, location_type] + [kwargs[key] for key in keys]
+                
+                logger.debug(f"[DB] Creating location: {name} for campaign {campaign_id}")
+                self._execute_plan(cursor, query, values)
+                result = cursor.fetchone()
+                
+                if result:
+                    self._invalidate_campaign_rows(self._location_cache, campaign_id)
+                    logger.info(f"[DB] Successfully created location {name} with ID {result['Id']}")
+                    return result
+                else:
+                    logger.error(f"[DB] Failed to create location {name}")
+                    return None
+                    
+            except psycopg2.Error as e:
+                logger.error(f"Error creating location {name}: {e}")
+                return None
+        
+    def _cached_campaign_rows(self, cache, query, campaign_id, label):
+        """Read-through lookup of a campaign list, returned as fresh dicts callers may modify
+        
+        Inside read_txn() the cache is not read (its rows predate the snapshot) and
+        errors propagate, since the aborted transaction fails every later read.
+        """
+        in_txn = self._in_read_txn()
+        with self._campaign_cache_lock:
+            entry = None if in_txn else cache.get(campaign_id)
+            epoch = self._campaign_cache_epoch
+        
+        if entry is None:
+            with self.game_connection() as conn:
+                try:
+                    # Lignes en tuples + noms de colonnes partagés : bien plus compact en
+                    # cache qu'un RealDictRow (OrderedDict) par ligne
+                    cursor = self._get_cursor(conn, TupleCursor)
+                    cursor.execute(query, (campaign_id,))
+                    entry = (tuple(column.name for column in cursor.description), cursor.fetchall())
+                except TRANSIENT_ERRORS:
+                    raise
+                except psycopg2.Error as e:
+                    logger.error(f"Error retrieving {label} for campaign {campaign_id}: {e}")
+                    if in_txn:
+                        raise
+                    return []
+            logger.debug(f"[DB] Found {len(entry[1])} {label} for campaign {campaign_id}")
+            
+            with self._campaign_cache_lock:
+                # Une écriture pendant la lecture a pu rendre ces lignes obsolètes
+                if epoch == self._campaign_cache_epoch:
+                    cache[campaign_id] = entry
+        
+        columns, rows = entry
+        marshal = _row_marshaller(columns)
+        return [marshal(row) for row in rows]
+    
+    def _invalidate_campaign_rows(self, cache, campaign_id):
+        """Drop the cached list of a campaign after a write"""
+        with self._campaign_cache_lock:
+            self._campaign_cache_epoch += 1
+            cache.pop(campaign_id, None)
     
+    @_retry_on_drop
     def get_campaign_locations(self, campaign_id):
-        """Get all locations for a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM "CampaignLocations"
-                WHERE "CampaignId" = %s
-                ORDER BY "CreatedAt" DESC
-            """, (campaign_id,))
-            results = cursor.fetchall()
-            logger.info(f"[DB] Found {len(results)} locations for campaign {campaign_id}")
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving locations for campaign {campaign_id}: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
+        """Get all locations for a campaign (cached for CAMPAIGN_CACHE_TTL_SECONDS)"""
+        return self._cached_campaign_rows(self._location_cache, CAMPAIGN_LOCATIONS_SQL, campaign_id, "locations")
     
+    @_retry_on_drop
     def get_location_by_name(self, campaign_id, name):
         """Get a location by name for a specific campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM "CampaignLocations"
-                WHERE "CampaignId" = %s AND "Name" ILIKE %s
-                LIMIT 1
-            """, (campaign_id, f"%{name}%"))
-            result = cursor.fetchone()
-            return result
-        except Exception as e:
-            logger.error(f"Error retrieving location {name} for campaign {campaign_id}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-    
-    def update_location(self, location_id, **kwargs):
-        """Update an existing location"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            
-            # Build update query dynamically
-            update_fields = []
-            params = []
-            
-            updatable_fields = {
-                'name': '"Name"',
-                'type': '"Type"',
-                'description': '"Description"',
-                'short_description': '"ShortDescription"',
-                'parent_location_id': '"ParentLocationId"',
-                'is_discovered': '"IsDiscovered"',
-                'is_accessible': '"IsAccessible"',
-                'climate': '"Climate"',
-                'terrain': '"Terrain"',
-                'population': '"Population"',
-                'notes': '"Notes"',
-                'image_url': '"ImageUrl"'
-            }
-            
-            for key, field in updatable_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    update_fields.append(f'{field} = %s')
-                    params.append(kwargs[key])
-            
-            if not update_fields:
-                logger.warning("No fields to update for location")
-                return None
-            
-            # Add UpdatedAt field
-            update_fields.append('"UpdatedAt" = NOW()')
-            params.append(location_id)
-            
-            query = f"""
-                UPDATE "CampaignLocations"
-                SET {', '.join(update_fields)}
-                WHERE "Id" = %s
-                RETURNING "Id", "UpdatedAt"
-            """
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully updated location {location_id}")
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                self._execute_prepared(cursor, "location_by_name", (campaign_id, name))
+                result = cursor.fetchone()
                 return result
-            else:
-                logger.warning(f"[DB] No location found with ID {location_id}")
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving location {name} for campaign {campaign_id}: {e}")
                 return None
+        
+    def get_locations_by_names(self, campaign_id, names):
+        """Get several locations by name in one query, as {name: location} (same matching as get_location_by_name)"""
+        return self._rows_by_names(LOCATIONS_BY_NAMES_SQL, campaign_id, names, "locations")
+        
+    @_retry_on_drop
+    def update_location(self, location_id, **kwargs):
+        """Update an existing location"""
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
                 
-        except Exception as e:
-            logger.error(f"Error updating location {location_id}: {e}")
+                keys = _provided_keys(LOCATION_UPDATE_FIELDS, kwargs)
+                if not keys:
+                    logger.warning("No fields to update for location")
+                    return None
+                
+                query = _update_sql(
+                    "CampaignLocations",
+                    tuple(LOCATION_UPDATE_FIELDS[key] for key in keys),
+                    ('UpdatedAt',),
+                    ('Id', 'UpdatedAt', 'CampaignId')
+                )
+                params = [kwargs[key] for key in keys] + [location_id]
+                
+                self._execute_plan(cursor, query, params)
+                result = cursor.fetchone()
+                
+                if result:
+                    self._invalidate_campaign_rows(self._location_cache, result['CampaignId'])
+                    logger.debug(f"[DB] Successfully updated location {location_id}")
+                    return result
+                else:
+                    logger.warning(f"[DB] No location found with ID {location_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error updating location {location_id}: {e}")
+                return None
+        
+    @_retry_on_drop
+    def update_locations_bulk(self, campaign_id, updates):
+        """Update several locations of a campaign in one transaction
+        
+        updates is an iterable of (location_id, fields) where fields uses the update_location keyword names.
+        Returns the ids of the locations updated, or None on error (nothing is applied).
+        """
+        try:
+            updated = self._update_bulk("CampaignLocations", LOCATION_UPDATE_FIELDS, lambda fields: ('UpdatedAt',), updates)
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            logger.error(f"Error updating locations in bulk for campaign {campaign_id}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-    
+        self._invalidate_campaign_rows(self._location_cache, campaign_id)
+        return updated
+        
     # Quest Management Functions
-    def create_campaign_quest(self, campaign_id, title, **kwargs):
-        """Create a new quest for a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
+    def create_campaign_quests_bulk(self, campaign_id, quests):
+        """Create several quests for a campaign in one transaction
+        
+        quests is a list of dicts with 'title' and the create_campaign_quest keyword names.
+        Returns the created rows in input order, or None on error (nothing is created).
+        """
         try:
-            cursor = conn.cursor()
-            
-            # Build insert query dynamically
-            fields = ['"CampaignId"', '"Title"']
-            values = [campaign_id, title]
-            placeholders = ['%s', '%s']
-            
-            # Optional fields
-            optional_fields = {
-                'description': '"Description"',
-                'short_description': '"ShortDescription"',
-                'type': '"Type"',
-                'status': '"Status"',
-                'reward': '"Reward"',
-                'requirements': '"Requirements"',
-                'required_level': '"RequiredLevel"',
-                'location_id': '"LocationId"',
-                'quest_giver': '"QuestGiver"',
-                'difficulty': '"Difficulty"',
-                'notes': '"Notes"',
-                'progress': '"Progress"'
-            }
-            
-            for key, field in optional_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    fields.append(field)
-                    values.append(kwargs[key])
-                    placeholders.append('%s')
-            
-            query = f"""
-                INSERT INTO "CampaignQuests" ({', '.join(fields)})
-                VALUES ({', '.join(placeholders)})
-                RETURNING "Id", "CreatedAt"
-            """
-            
-            logger.info(f"[DB] Creating quest: {title} for campaign {campaign_id}")
-            cursor.execute(query, values)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully created quest {title} with ID {result['Id']}")
-                return result
-            else:
-                logger.error(f"[DB] Failed to create quest {title}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error creating quest {title}: {e}")
+            results = self._insert_bulk(
+                "CampaignQuests", {'title': 'Title'}, QUEST_INSERT_FIELDS, campaign_id, quests
+            )
+        except psycopg2.Error as e:
+            logger.error(f"Error creating quests in bulk for campaign {campaign_id}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
+        self._invalidate_campaign_rows(self._quest_cache, campaign_id)
+        logger.info(f"[DB] Created {len(results)} quests for campaign {campaign_id}")
+        return results
     
+    def create_campaign_quest(self, campaign_id, title, **kwargs):
+        """Create a new quest for a campaign"""
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                
+                keys = _provided_keys(QUEST_INSERT_FIELDS, kwargs)
+                query = _insert_sql(
+                    "CampaignQuests",
+                    ('CampaignId', 'Title') + tuple(QUEST_INSERT_FIELDS[key] for key in keys),
+                    ('Id', 'CreatedAt')
+                )
+                values = [campaign_id, title] + [kwargs[key] for key in keys]
+                
+                logger.debug(f"[DB] Creating quest: {title} for campaign {campaign_id}")
+                self._execute_plan(cursor, query, values)
+                result = cursor.fetchone()
+                
+                if result:
+                    self._invalidate_campaign_rows(self._quest_cache, campaign_id)
+                    logger.info(f"[DB] Successfully created quest {title} with ID {result['Id']}")
+                    return result
+                else:
+                    logger.error(f"[DB] Failed to create quest {title}")
+                    return None
+                    
+            except psycopg2.Error as e:
+                logger.error(f"Error creating quest {title}: {e}")
+                return None
+        
+    @_retry_on_drop
     def get_campaign_quests(self, campaign_id):
-        """Get all quests for a campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM "CampaignQuests"
-                WHERE "CampaignId" = %s
-                ORDER BY "CreatedAt" DESC
-            """, (campaign_id,))
-            results = cursor.fetchall()
-            logger.info(f"[DB] Found {len(results)} quests for campaign {campaign_id}")
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving quests for campaign {campaign_id}: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
+        """Get all quests for a campaign (cached for CAMPAIGN_CACHE_TTL_SECONDS)"""
+        return self._cached_campaign_rows(self._quest_cache, CAMPAIGN_QUESTS_SQL, campaign_id, "quests")
     
+    @_retry_on_drop
     def get_quest_by_title(self, campaign_id, title):
         """Get a quest by title for a specific campaign"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT *
-                FROM "CampaignQuests"
-                WHERE "CampaignId" = %s AND "Title" ILIKE %s
-                LIMIT 1
-            """, (campaign_id, f"%{title}%"))
-            result = cursor.fetchone()
-            return result
-        except Exception as e:
-            logger.error(f"Error retrieving quest {title} for campaign {campaign_id}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-    
-    def update_quest(self, quest_id, **kwargs):
-        """Update an existing quest"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            
-            # Build update query dynamically
-            update_fields = []
-            params = []
-            
-            updatable_fields = {
-                'title': '"Title"',
-                'description': '"Description"',
-                'short_description': '"ShortDescription"',
-                'type': '"Type"',
-                'status': '"Status"',
-                'reward': '"Reward"',
-                'requirements': '"Requirements"',
-                'required_level': '"RequiredLevel"',
-                'location_id': '"LocationId"',
-                'quest_giver': '"QuestGiver"',
-                'difficulty': '"Difficulty"',
-                'notes': '"Notes"',
-                'progress': '"Progress"'
-            }
-            
-            for key, field in updatable_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    update_fields.append(f'{field} = %s')
-                    params.append(kwargs[key])
-            
-            if not update_fields:
-                logger.warning("No fields to update for quest")
-                return None
-            
-            # Add UpdatedAt field and handle CompletedAt if status is 'Completed'
-            update_fields.append('"UpdatedAt" = NOW()')
-            if 'status' in kwargs and kwargs['status'] == 'Completed':
-                update_fields.append('"CompletedAt" = NOW()')
-            
-            params.append(quest_id)
-            
-            query = f"""
-                UPDATE "CampaignQuests"
-                SET {', '.join(update_fields)}
-                WHERE "Id" = %s
-                RETURNING "Id", "UpdatedAt"
-            """
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully updated quest {quest_id}")
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                self._execute_prepared(cursor, "quest_by_title", (campaign_id, title))
+                result = cursor.fetchone()
                 return result
-            else:
-                logger.warning(f"[DB] No quest found with ID {quest_id}")
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving quest {title} for campaign {campaign_id}: {e}")
                 return None
+        
+    def get_quests_by_titles(self, campaign_id, titles):
+        """Get several quests by title in one query, as {title: quest} (same matching as get_quest_by_title)"""
+        return self._rows_by_names(QUESTS_BY_TITLES_SQL, campaign_id, titles, "quests")
+        
+    @_retry_on_drop
+    def update_quest(self, quest_id, **kwargs):
+        """Update an existing quest"""
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                
+                keys = _provided_keys(QUEST_UPDATE_FIELDS, kwargs)
+                if not keys:
+                    logger.warning("No fields to update for quest")
+                    return None
                 
-        except Exception as e:
-            logger.error(f"Error updating quest {quest_id}: {e}")
+                query = _update_sql(
+                    "CampaignQuests",
+                    tuple(QUEST_UPDATE_FIELDS[key] for key in keys),
+                    _quest_touched_columns(kwargs),
+                    ('Id', 'UpdatedAt', 'CampaignId')
+                )
+                params = [kwargs[key] for key in keys] + [quest_id]
+                
+                self._execute_plan(cursor, query, params)
+                result = cursor.fetchone()
+                
+                if result:
+                    self._invalidate_campaign_rows(self._quest_cache, result['CampaignId'])
+                    logger.debug(f"[DB] Successfully updated quest {quest_id}")
+                    return result
+                else:
+                    logger.warning(f"[DB] No quest found with ID {quest_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error updating quest {quest_id}: {e}")
+                return None
+        
+    @_retry_on_drop
+    def update_quests_bulk(self, campaign_id, updates):
+        """Update several quests of a campaign in one transaction
+        
+        updates is an iterable of (quest_id, fields) where fields uses the update_quest keyword names.
+        Returns the ids of the quests updated, or None on error (nothing is applied).
+        """
+        try:
+            updated = self._update_bulk("CampaignQuests", QUEST_UPDATE_FIELDS, _quest_touched_columns, updates)
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            logger.error(f"Error updating quests in bulk for campaign {campaign_id}: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-    
-    def update_campaign_content_status(self, campaign_id: int, status: str, error: str = None):
-        """Update campaign content generation status"""
+        self._invalidate_campaign_rows(self._quest_cache, campaign_id)
+        return updated
+        
+    @_retry_on_drop
+    def _update_generation_status(self, prefix, label, campaign_id, status, error):
+        """Set the "<prefix>Status"/"<prefix>Error" columns of a campaign in one UPDATE
+        
+        InProgress also stamps "<prefix>StartedAt", Completed/Failed stamp "<prefix>CompletedAt".
+        """
         try:
-            conn = self.get_game_db_connection()
-            cursor = conn.cursor()
-            
-            if status == "InProgress":
-                query = """
-                    UPDATE "Campaigns" 
-                    SET "ContentGenerationStatus" = %s, "ContentGenerationStartedAt" = NOW(), "ContentGenerationError" = %s
-                    WHERE "Id" = %s
-                """
-            elif status in ["Completed", "Failed"]:
-                query = """
-                    UPDATE "Campaigns" 
-                    SET "ContentGenerationStatus" = %s, "ContentGenerationCompletedAt" = NOW(), "ContentGenerationError" = %s
-                    WHERE "Id" = %s
-                """
-            else:
-                query = """
-                    UPDATE "Campaigns" 
-                    SET "ContentGenerationStatus" = %s, "ContentGenerationError" = %s
-                    WHERE "Id" = %s
-                """
-            
-            cursor.execute(query, (status, error, campaign_id))
-            cursor.close()
-            conn.close()
+            with self.game_connection() as conn:
+                cursor = self._get_cursor(conn)
+                self._execute_plan(
+                    cursor, _generation_status_sql(prefix), (status, error, status, status, campaign_id)
+                )
+                # Connexion en autocommit : l'UPDATE est déjà validé, RETURNING confirme la ligne
+                if cursor.fetchone() is None:
+                    logger.warning(f"[DB] Campaign {campaign_id} not found, {label} not updated")
+                    return False
             
-            logger.info(f"[DB] Updated campaign {campaign_id} content status to {status}")
+            logger.info(f"[DB] Updated campaign {campaign_id} {label} to {status}")
             return True
-        except Exception as e:
-            logger.error(f"Error updating campaign content status for campaign {campaign_id}: {str(e)}")
+        except TRANSIENT_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            logger.error(f"Error updating {label} for campaign {campaign_id}: {str(e)}")
             return False
     
+    def update_campaign_content_status(self, campaign_id: int, status: str, error: str = None):
+        """Update campaign content generation status"""
+        return self._update_generation_status("ContentGeneration", "content status", campaign_id, status, error)
+    
     def update_character_generation_status(self, campaign_id: int, status: str, error: str = None):
         """Update campaign character generation status"""
-        try:
-            conn = self.get_game_db_connection()
-            cursor = conn.cursor()
-            
-            if status == "InProgress":
-                query = """
-                    UPDATE "Campaigns" 
-                    SET "CharacterGenerationStatus" = %s, "CharacterGenerationStartedAt" = NOW(), "CharacterGenerationError" = %s
-                    WHERE "Id" = %s
-                """
-            elif status in ["Completed", "Failed"]:
-                query = """
-                    UPDATE "Campaigns" 
-                    SET "CharacterGenerationStatus" = %s, "CharacterGenerationCompletedAt" = NOW(), "CharacterGenerationError" = %s
-                    WHERE "Id" = %s
-                """
-            else:
-                query = """
-                    UPDATE "Campaigns" 
-                    SET "CharacterGenerationStatus" = %s, "CharacterGenerationError" = %s
-                    WHERE "Id" = %s
-                """
-            
-            cursor.execute(query, (status, error, campaign_id))
-            cursor.close()
-            conn.close()
-            
-            logger.info(f"[DB] Updated campaign {campaign_id} character generation status to {status}")
-            return True
-        except Exception as e:
-            logger.error(f"Error updating character generation status for campaign {campaign_id}: {str(e)}")
-            return False
+        return self._update_generation_status("CharacterGeneration", "character generation status", campaign_id, status, error)
     
     # Character Quest Management Functions
+    def ensure_character_quest_index(self):
+        """Create the CharacterQuests unique index used by ON CONFLICT on databases that predate it
+        
+        Duplicate acceptances are removed first, keeping the oldest one. Returns True when the index exists.
+        """
+        with self.game_connection() as conn:
+            cursor = self._get_cursor(conn, TupleCursor)
+            cursor.execute("SELECT to_regclass(%s)", (f'"{CHARACTER_QUEST_INDEX}"',))
+            if cursor.fetchone()[0] is None:
+                try:
+                    # Table verrouillée contre les écritures entre le nettoyage et la création de l'index
+                    cursor.execute("BEGIN")
+                    cursor.execute('LOCK TABLE "CharacterQuests" IN SHARE ROW EXCLUSIVE MODE')
+                    cursor.execute(CHARACTER_QUEST_DEDUP_SQL)
+                    removed = cursor.rowcount
+                    cursor.execute(CHARACTER_QUEST_INDEX_SQL)
+                    cursor.execute("COMMIT")
+                except psycopg2.Error as e:
+                    try:
+                        cursor.execute("ROLLBACK")
+                    except psycopg2.Error:
+                        pass
+                    logger.warning(f"[DB] Could not create {CHARACTER_QUEST_INDEX}, quest acceptance checks existing rows: {e}")
+                    self._character_quest_index = False
+                    return False
+                logger.info(f"[DB] Created {CHARACTER_QUEST_INDEX} ({removed} duplicate acceptance(s) removed)")
+        self._character_quest_index = True
+        return True
+    
+    def _quest_accepted(self, cursor, campaign_id: int, character_id: int, quest_id: int):
+        """Whether the character already accepted the quest (fallback without the unique index)"""
+        cursor.execute(CHARACTER_QUEST_ACCEPTED_SQL, (campaign_id, character_id, quest_id))
+        return cursor.fetchone() is not None
+    
     def accept_quest(self, campaign_id: int, character_id: int, quest_id: int, **kwargs):
         """Accept a quest for a character"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            
-            # Check if quest is already accepted
-            cursor.execute("""
-                SELECT "Id" FROM "CharacterQuests"
-                WHERE "CampaignId" = %s AND "CharacterId" = %s AND "QuestId" = %s
-            """, (campaign_id, character_id, quest_id))
-            
-            if cursor.fetchone():
-                logger.warning(f"[DB] Quest {quest_id} already accepted by character {character_id}")
-                return None
-            
-            # Build insert query
-            fields = ['"CampaignId"', '"CharacterId"', '"QuestId"']
-            values = [campaign_id, character_id, quest_id]
-            placeholders = ['%s', '%s', '%s']
-            
-            # Optional fields
-            optional_fields = {
-                'status': '"Status"',
-                'progress': '"Progress"',
-                'notes': '"Notes"'
-            }
-            
-            for key, field in optional_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    fields.append(field)
-                    values.append(kwargs[key])
-                    placeholders.append('%s')
-            
-            query = f"""
-                INSERT INTO "CharacterQuests" ({', '.join(fields)})
-                VALUES ({', '.join(placeholders)})
-                RETURNING "Id", "AcceptedAt"
-            """
-            
-            logger.info(f"[DB] Character {character_id} accepting quest {quest_id}")
-            cursor.execute(query, values)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully accepted quest {quest_id} for character {character_id}")
-                return result
-            else:
-                logger.error(f"[DB] Failed to accept quest {quest_id} for character {character_id}")
-                return None
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                keys = _provided_keys(CHARACTER_QUEST_FIELDS, kwargs)
+                columns = CHARACTER_QUEST_KEY + tuple(CHARACTER_QUEST_FIELDS[key] for key in keys)
+                values = [campaign_id, character_id, quest_id] + [kwargs[key] for key in keys]
                 
-        except Exception as e:
-            logger.error(f"Error accepting quest {quest_id} for character {character_id}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-    
-    def get_character_quests(self, campaign_id: int, character_id: int):
-        """Get all quests for a character"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT cq.*, q."Title", q."Description", q."Type", q."Difficulty", q."Reward"
-                FROM "CharacterQuests" cq
-                INNER JOIN "CampaignQuests" q ON cq."QuestId" = q."Id"
-                WHERE cq."CampaignId" = %s AND cq."CharacterId" = %s
-                ORDER BY cq."AcceptedAt" DESC
-            """, (campaign_id, character_id))
-            results = cursor.fetchall()
-            logger.info(f"[DB] Found {len(results)} quests for character {character_id}")
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving quests for character {character_id}: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
+                logger.debug(f"[DB] Character {character_id} accepting quest {quest_id}")
+                result = None
+                if self._character_quest_index is not False:
+                    # Un seul aller-retour : l'index unique (CampaignId, CharacterId, QuestId)
+                    # écarte une quête déjà acceptée, sans SELECT préalable ni course entre deux appels
+                    try:
+                        self._execute_plan(cursor, _insert_sql("CharacterQuests", columns, ('Id', 'AcceptedAt'), CHARACTER_QUEST_KEY), values)
+                        result = cursor.fetchone()
+                    except psycopg2.errors.InvalidColumnReference:
+                        # Index absent (base antérieure, non créé au démarrage) : vérification préalable
+                        logger.warning(f"[DB] {CHARACTER_QUEST_INDEX} is missing, checking accepted quests before inserting")
+                        self._character_quest_index = False
+                if self._character_quest_index is False:
+                    if not self._quest_accepted(cursor, campaign_id, character_id, quest_id):
+                        self._execute_plan(cursor, _insert_sql("CharacterQuests", columns, ('Id', 'AcceptedAt')), values)
+                        result = cursor.fetchone()
+                
+                if result:
+                    logger.info(f"[DB] Successfully accepted quest {quest_id} for character {character_id}")
+                    return result
+                else:
+                    logger.warning(f"[DB] Quest {quest_id} already accepted by character {character_id}")
+                    return None
+                    
+            except psycopg2.Error as e:
+                logger.error(f"Error accepting quest {quest_id} for character {character_id}: {e}")
+                return None
+        
+    @_retry_on_drop
+    def get_character_quests(self, campaign_id: int, character_id: int, fields=()):
+        """Get all quests for a character
+        
+        fields lists optional CharacterQuests columns to add (see CHARACTER_QUEST_OPTIONAL_COLUMNS).
+        """
+        query = CHARACTER_QUESTS_SQL.format(columns=_character_quest_select(fields))
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                cursor.execute(query, (campaign_id, character_id))
+                results = cursor.fetchall()
+                logger.debug(f"[DB] Found {len(results)} quests for character {character_id}")
+                return results
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving quests for character {character_id}: {e}")
+                return []
     
+    @_retry_on_drop
+    def get_character_quests_bulk(self, campaign_id: int, character_ids, fields=()):
+        """Get the quests of several characters in one query, as {character_id: [quests]}"""
+        character_ids = list(character_ids)
+        quests_by_character = {character_id: [] for character_id in character_ids}
+        if not character_ids:
+            return quests_by_character
+        query = CHARACTER_QUESTS_BULK_SQL.format(columns=_character_quest_select(fields))
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
+                cursor.execute(query, (campaign_id, character_ids))
+                results = cursor.fetchall()
+                for quest in results:
+                    quests_by_character.setdefault(quest["CharacterId"], []).append(quest)
+                logger.debug(f"[DB] Found {len(results)} quests for {len(character_ids)} characters")
+                return quests_by_character
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error retrieving quests for characters {character_ids}: {e}")
+                return quests_by_character
+        
+    @_retry_on_drop
     def update_character_quest(self, character_quest_id: int, **kwargs):
         """Update a character's quest progress"""
-        conn = self.get_game_db_connection()
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            
-            # Build update query dynamically
-            update_fields = []
-            params = []
-            
-            updatable_fields = {
-                'status': '"Status"',
-                'progress': '"Progress"',
-                'notes': '"Notes"'
-            }
-            
-            for key, field in updatable_fields.items():
-                if key in kwargs and kwargs[key] is not None:
-                    update_fields.append(f'{field} = %s')
-                    params.append(kwargs[key])
-            
-            if not update_fields:
-                logger.warning("No fields to update for character quest")
-                return None
-            
-            # Handle CompletedAt if status is 'Completed'
-            if 'status' in kwargs and kwargs['status'] == 'Completed':
-                update_fields.append('"CompletedAt" = NOW()')
-            
-            params.append(character_quest_id)
-            
-            query = f"""
-                UPDATE "CharacterQuests"
-                SET {', '.join(update_fields)}
-                WHERE "Id" = %s
-                RETURNING "Id", "Status"
-            """
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            if result:
-                logger.info(f"[DB] Successfully updated character quest {character_quest_id}")
-                return result
-            else:
-                logger.warning(f"[DB] No character quest found with ID {character_quest_id}")
-                return None
+        with self.game_connection() as conn:
+            try:
+                cursor = self._get_cursor(conn)
                 
-        except Exception as e:
-            logger.error(f"Error updating character quest {character_quest_id}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close() 
\ No newline at end of file
+                keys = _provided_keys(CHARACTER_QUEST_FIELDS, kwargs)
+                if not keys:
+                    logger.warning("No fields to update for character quest")
+                    return None
+                
+                # CompletedAt when the quest is completed
+                touched = ('CompletedAt',) if kwargs.get('status') == 'Completed' else ()
+                query = _update_sql(
+                    "CharacterQuests",
+                    tuple(CHARACTER_QUEST_FIELDS[key] for key in keys),
+                    touched,
+                    ('Id', 'Status')
+                )
+                params = [kwargs[key] for key in keys] + [character_quest_id]
+                
+                self._execute_plan(cursor, query, params)
+                result = cursor.fetchone()
+                
+                if result:
+                    logger.debug(f"[DB] Successfully updated character quest {character_quest_id}")
+                    return result
+                else:
+                    logger.warning(f"[DB] No character quest found with ID {character_quest_id}")
+                    return None
+                    
+            except TRANSIENT_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Error updating character quest {character_quest_id}: {e}")
+                return None
@@ -1,26 +1,213 @@
 import re
 import logging
-import threading
 import time
 import asyncio
-from typing import Dict, List, Optional, Tuple
-from db_service import DBService
+import types
+from dataclasses import dataclass
+from rapidfuzz import fuzz, process
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from db_service import DBService, TRANSIENT_ERRORS
+from async_utils import db_call
 from llm_service import LLMService
 
 logger = logging.getLogger(__name__)
 
+# Commandes explicites émises par le LLM, compilées une seule fois au chargement du module
+NPC_CREATE_RE = re.compile(r'\[CREATE_NPC:name=([^,]+), race=([^,]+), class=([^,]+), description=([^\]]+?)(?:, ([^\]]+))?\]', re.IGNORECASE)
+LOCATION_CREATE_RE = re.compile(r'\[CREATE_LOCATION:name=([^,]+), type=([^,]+), description=([^\]]+?)(?:, ([^\]]+))?\]', re.IGNORECASE)
+QUEST_CREATE_RE = re.compile(r'\[CREATE_QUEST:title=([^,]+), type=([^,]+), description=([^\]]+?)(?:, ([^\]]+))?\]', re.IGNORECASE)
+NPC_UPDATE_RE = re.compile(r'\[UPDATE_NPC:name=([^,]+), ([^\]]+)\]', re.IGNORECASE)
+LOCATION_UPDATE_RE = re.compile(r'\[UPDATE_LOCATION:name=([^,]+), ([^\]]+)\]', re.IGNORECASE)
+QUEST_UPDATE_RE = re.compile(r'\[UPDATE_QUEST:title=([^,]+), ([^\]]+)\]', re.IGNORECASE)
+
+# Champs "clé=valeur" des commandes : une valeur s'étend jusqu'à la clé suivante
+# (", clé=") ou la fin, elle peut donc contenir des virgules
+FIELD_RE = re.compile(r'(\w+)\s*=\s*(.*?)\s*(?=,\s*\w+\s*=|$)', re.DOTALL)
+
+# Un seul parcours du texte repère toutes les commandes ; chacune est ensuite
+# validée par le motif détaillé de son type
+COMMAND_RE = re.compile(
+    r'\[(?P<kind>CREATE_NPC|CREATE_LOCATION|CREATE_QUEST|UPDATE_NPC|UPDATE_LOCATION|UPDATE_QUEST):[^\]]+\]',
+    re.IGNORECASE
+)
+COMMAND_PATTERNS = {
+    'CREATE_NPC': NPC_CREATE_RE,
+    'CREATE_LOCATION': LOCATION_CREATE_RE,
+    'CREATE_QUEST': QUEST_CREATE_RE,
+    'UPDATE_NPC': NPC_UPDATE_RE,
+    'UPDATE_LOCATION': LOCATION_UPDATE_RE,
+    'UPDATE_QUEST': QUEST_UPDATE_RE,
+}
+
+# Déplacements du personnage mentionnés dans la narration, par langue. Le lieu s'arrête au premier
+# point, virgule ou saut de ligne : une classe de caractères, sans quantificateur paresseux à étendre
+MOVEMENT_PATTERNS_FR = (
+    r"tu te trouves (?:maintenant |désormais )?(?:dans|à|en|au|aux) ([^.,\n]+)",
+    r"vous vous trouvez (?:maintenant |désormais )?(?:dans|à|en|au|aux) ([^.,\n]+)",
+    r"tu te déplaces? vers ([^.,\n]+)",
+    r"vous vous déplacez vers ([^.,\n]+)",
+    r"tu (?:arrives?|entre.?|va.?) (?:dans|à|en|au|aux) ([^.,\n]+)",
+    r"vous (?:arrivez|entrez|allez) (?:dans|à|en|au|aux) ([^.,\n]+)",
+    r"direction (?:de |du |de la |des )?([^.,\n]+)",
+    r"(?:bienvenue|retour) (?:dans|à|en|au|aux) ([^.,\n]+)"
+)
+MOVEMENT_PATTERNS_EN = (
+    r"you (?:are )?(?:now |currently )?(?:in|at|inside) ([^.,\n]+)",
+    r"you move (?:to|towards|into) ([^.,\n]+)",
+    r"you (?:arrive|enter|go) (?:at|in|to) ([^.,\n]+)",
+    r"you (?:travel|head|walk) (?:to|towards) ([^.,\n]+)",
+    r"welcome to ([^.,\n]+)",
+    r"(?:arriving|entering) ([^.,\n]+)"
+)
+# Chaque langue en une seule regex : le motif i devient le groupe nommé p<i>, et le lieu
+# (seul groupe capturant de chaque motif) est le groupe qui le suit
+MOVEMENT_RE_FR, MOVEMENT_RE_EN = (
+    re.compile('|'.join(f'(?P<p{i}>{pattern})' for i, pattern in enumerate(patterns)), re.IGNORECASE | re.MULTILINE)
+    for patterns in (MOVEMENT_PATTERNS_FR, MOVEMENT_PATTERNS_EN)
+)
+# Débuts de phrase dont au moins un figure dans tout déplacement reconnu (texte mis en minuscules) :
+# sans eux, ni les regex ni la lecture des lieux en base ne sont nécessaires. Ils suivent les
+# regex mot pour mot, afin qu'un simple « you » ou « vous » dans le texte ne suffise pas
+MOVEMENT_KEYWORDS_FR = (
+    "tu te trouves ", "vous vous trouvez ", "tu te déplace", "vous vous déplacez ",
+    "tu arrive", "tu entre", "tu va", "vous arrivez ", "vous entrez ", "vous allez ",
+    "direction ", "bienvenue ", "retour "
+)
+MOVEMENT_KEYWORDS_EN = (
+    "you are ", "you now ", "you currently ", "you in", "you at ", "you move ",
+    "you arrive ", "you enter ", "you go ", "you travel ", "you head ", "you walk ",
+    "welcome to ", "arriving ", "entering "
+)
+# Articles et prépositions retirés des lieux mentionnés (toutes langues), et ponctuation autour des mots
+LOCATION_ARTICLES = frozenset(('le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'the', 'a', 'an'))
+LOCATION_WORD_PUNCTUATION = '.,!?;:"()[]{}'
+# Score minimal (sur 100) pour rapprocher un lieu mentionné d'un lieu existant par similarité
+LOCATION_MATCH_CUTOFF = 70
+
+# Résultat partagé (en lecture seule) des tours sans commande ni personnage : rien à allouer
+EMPTY_RESULT = types.MappingProxyType({'npcs': (), 'locations': (), 'quests': (), 'character_movements': ()})
+
+# Échecs attendus pour un élément : données incomplètes ou mal typées, connexion perdue malgré la reprise
+ELEMENT_ERRORS = (KeyError, TypeError, ValueError) + TRANSIENT_ERRORS
+
+# Générations d'images simultanées au plus ; les suivantes attendent leur tour
+IMAGE_GENERATION_CONCURRENCY = 3
+
+# Valeurs par défaut des champs des éléments créés par commande explicite
+NPC_DEFAULTS = {
+    'type': 'Humanoid',
+    'level': 1,
+    'max_hit_points': 10,
+    'current_hit_points': 10,
+    'armor_class': 10,
+    'strength': 10,
+    'dexterity': 10,
+    'constitution': 10,
+    'intelligence': 10,
+    'wisdom': 10,
+    'charisma': 10,
+    'alignment': None,
+    'current_location': None,
+    'status': 'Active',
+    'notes': None
+}
+LOCATION_DEFAULTS = {
+    'short_description': None,
+    'parent_location_id': None,
+    'is_discovered': True,
+    'is_accessible': True,
+    'climate': None,
+    'terrain': None,
+    'population': None,
+    'notes': None
+}
+QUEST_DEFAULTS = {
+    'difficulty': 'Medium',
+    'status': 'Available',
+    'short_description': None,
+    'reward': None,
+    'requirements': None,
+    'required_level': None,
+    'location_id': None,
+    'quest_giver': None,
+    'notes': None,
+    'progress': None
+}
+
+@dataclass(frozen=True, slots=True)
+class ElementKind:
+    """How one type of campaign element is looked up, created and updated through DBService"""
+    name: str                   # 'type' des résultats et des images
+    group: str                  # clé des résultats regroupés par type
+    label: str                  # pour les logs
+    key: str                    # champ identifiant l'élément dans une commande ('name' / 'title')
+    commands: Tuple[str, str]   # commandes CREATE_* et UPDATE_* du type
+    get_by_key: Callable        # méthodes non liées de DBService, appelées avec l'instance
+    get_by_keys: Callable
+    create: Callable
+    create_bulk: Callable
+    update: Callable
+    update_bulk: Callable
+    create_params: Tuple[Tuple[str, str], ...]  # (champ, paramètre de create) obligatoires
+    create_defaults: Mapping    # valeurs des champs obligatoires absents
+    image_field: Optional[str]  # champ de l'image générée à la création (None : pas d'image)
+    discoverable: bool          # mis à jour sans son nom et marqué découvert s'il existe déjà
+
+
+NPC_KIND = ElementKind(
+    name='npc', group='npcs', label='NPC', key='name', commands=('CREATE_NPC', 'UPDATE_NPC'),
+    get_by_key=DBService.get_npc_by_name, get_by_keys=DBService.get_npcs_by_names,
+    create=DBService.create_campaign_npc, create_bulk=DBService.create_campaign_npcs_bulk,
+    update=DBService.update_npc, update_bulk=DBService.update_npcs_bulk,
+    create_params=(('name', 'name'), ('type', 'npc_type'), ('race', 'race')),
+    create_defaults={'type': 'Humanoid'}, image_field='portrait_url', discoverable=False
+)
+LOCATION_KIND = ElementKind(
+    name='location', group='locations', label='location', key='name', commands=('CREATE_LOCATION', 'UPDATE_LOCATION'),
+    get_by_key=DBService.get_location_by_name, get_by_keys=DBService.get_locations_by_names,
+    create=DBService.create_campaign_location, create_bulk=DBService.create_campaign_locations_bulk,
+    update=DBService.update_location, update_bulk=DBService.update_locations_bulk,
+    create_params=(('name', 'name'), ('type', 'location_type')),
+    create_defaults={'type': 'Location'}, image_field='image_url', discoverable=True
+)
+QUEST_KIND = ElementKind(
+    name='quest', group='quests', label='quest', key='title', commands=('CREATE_QUEST', 'UPDATE_QUEST'),
+    get_by_key=DBService.get_quest_by_title, get_by_keys=DBService.get_quests_by_titles,
+    create=DBService.create_campaign_quest, create_bulk=DBService.create_campaign_quests_bulk,
+    update=DBService.update_quest, update_bulk=DBService.update_quests_bulk,
+    create_params=(('title', 'title'),),
+    create_defaults={}, image_field=None, discoverable=False
+)
+ELEMENT_KINDS = (NPC_KIND, LOCATION_KIND, QUEST_KIND)
+
+def _extract_traits(description: str) -> str:
+    """The first ten words of the description's first sentence, comma separated, for image prompts"""
+    # partition s'arrête au premier point sans découper toute la description
+    return ', '.join(description.partition('.')[0].split()[:10])
+
+def _parse_fields(fields: str) -> Dict:
+    """Parse the "key=value, ..." fields of a command, converting integers and booleans"""
+    parsed = {}
+    for key, value in FIELD_RE.findall(fields):
+        if value.isdigit():
+            parsed[key] = int(value)
+        elif value.lower() in ('true', 'false'):
+            parsed[key] = value.lower() == 'true'
+        else:
+            parsed[key] = value
+    return parsed
+
 class ElementManager:
     """Manages the automatic creation and updating of campaign elements (NPCs, Locations, Quests)"""
     
     def __init__(self, db_service: DBService):
         self.db_service = db_service
         self.llm_service = LLMService()
-        self._background_threads = []
-        self._max_background_threads = 3  # Limiter le nombre de threads simultanés
-    
-    def _cleanup_background_threads(self):
-        """Nettoyer les threads terminés"""
-        self._background_threads = [t for t in self._background_threads if t.is_alive()]
+        # Générations d'images : tâches asyncio sur la boucle de l'application (pas de thread OS).
+        # La boucle est retenue au premier appel fait depuis elle, pour les appels venus d'un thread
+        self._image_semaphore = asyncio.Semaphore(IMAGE_GENERATION_CONCURRENCY)
+        self._image_tasks = set()
+        self._loop = None
     
     async def _generate_image_async(self, element_type: str, element_id: int, element_data: Dict, campaign_id: int):
         """Génère une image en arrière-plan pour un élément et la stocke localement"""
@@ -31,144 +218,137 @@ async def _generate_image_async(self, element_type: str, element_id: int, elemen
             if element_type == 'npc':
                 local_path = await self._generate_npc_portrait(element_data, campaign_id)
                 if local_path:
-                    self.db_service.update_npc(element_id, portrait_url=local_path)
+                    await db_call(self.db_service.update_npc, element_id, portrait_url=local_path)
                     logger.info(f"✅ Portrait généré et stocké pour NPC {element_data['name']}: {local_path}")
             elif element_type == 'location':
                 local_path = await self._generate_location_image(element_data, campaign_id)
                 if local_path:
-                    self.db_service.update_location(element_id, image_url=local_path)
+                    await db_call(self.db_service.update_location, element_id, image_url=local_path)
                     logger.info(f"✅ Image générée et stockée pour location {element_data['name']}: {local_path}")
         except Exception as e:
             logger.error(f"❌ Erreur lors de la génération d'image pour {element_type} {element_data.get('name', 'Unknown')}: {e}")
-        finally:
-            # Nettoyer les threads terminés
-            self._cleanup_background_threads()
+    
+    async def _spawn_image(self, element_type: str, element_id: int, element_data: Dict, campaign_id: int):
+        """Génère l'image dès qu'une place se libère (IMAGE_GENERATION_CONCURRENCY au plus)"""
+        async with self._image_semaphore:
+            await self._generate_image_async(element_type, element_id, element_data, campaign_id)
+    
+    def _track_image_task(self, coroutine):
+        """Lance la génération comme tâche de la boucle courante, oubliée une fois terminée"""
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._image_tasks.add(task)
+        task.add_done_callback(self._image_tasks.discard)
     
     def _start_background_image_generation(self, element_type: str, element_id: int, element_data: Dict, campaign_id: int):
         """Démarre la génération d'image en arrière-plan"""
-        # Nettoyer les threads terminés
-        self._cleanup_background_threads()
-        
-        # Limiter le nombre de threads simultanés
-        if len(self._background_threads) >= self._max_background_threads:
-            logger.info(f"⏳ Limite de threads atteinte, génération d'image pour {element_type} {element_data.get('name', 'Unknown')} mise en attente")
-            return
-        
-        # Créer un nouveau thread pour la génération d'image
-        thread = threading.Thread(
-            target=self._generate_image_async,
-            args=(element_type, element_id, element_data, campaign_id),
-            daemon=True
-        )
-        thread.start()
-        self._background_threads.append(thread)
+        coroutine = self._spawn_image(element_type, element_id, element_data, campaign_id)
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._track_image_task(coroutine)
+        except RuntimeError:
+            # Appel depuis un thread de travail : la tâche est confiée à la boucle de l'application
+            if self._loop is None or not self._loop.is_running():
+                coroutine.close()
+                logger.warning(f"⚠️ Pas de boucle asyncio active, image non générée pour {element_type} {element_data.get('name', 'Unknown')}")
+                return
+            self._loop.call_soon_threadsafe(self._track_image_task, coroutine)
         logger.info(f"🔄 Démarrage de la génération d'image en arrière-plan pour {element_type} {element_data.get('name', 'Unknown')}")
     
-    async def process_narrative_response(self, campaign_id: int, narrative_response: str, language: str = "English", character_id: int = None) -> Dict[str, List[Dict]]:
+    async def process_narrative_response(self, campaign_id: int, narrative_response: str, language: str = "English", character_id: int = None) -> Mapping[str, List[Dict]]:
         """
         Process a narrative response and automatically create/update elements
         Language-aware processing for different campaign languages
         Returns a summary of created/updated elements
         """
-        created_elements = {
-            'npcs': [],
-            'locations': [],
-            'quests': [],
-            'character_movements': []
-        }
+        has_commands = '[' in narrative_response
+        if not has_commands and not character_id:
+            return EMPTY_RESULT
+        
+        created_elements = dict(EMPTY_RESULT)
         
         try:
-            # First, check for explicit creation commands
-            created_elements = self._process_explicit_creation_commands(campaign_id, narrative_response, language)
+            # Les traitements ci-dessous font des appels DB bloquants : ils tournent dans un thread
+            # de travail. Les images lancées depuis ce thread sont confiées à cette boucle
+            self._loop = asyncio.get_running_loop()
+            
+            # First, check for explicit creation commands (every command starts with '[')
+            if has_commands:
+                created_elements.update(await asyncio.to_thread(
+                    self._process_explicit_creation_commands, campaign_id, narrative_response, language
+                ))
             
-            # If no explicit commands found, try automatic extraction as fallback
+            # Elements are only created from explicit commands (there is no automatic extraction)
             if not any(created_elements.values()):
-                logger.info("No explicit creation commands found, trying automatic extraction")
-                created_elements = await self._extract_elements_automatically_sync(campaign_id, narrative_response, language)
+                logger.debug("No explicit creation commands found")
             
             # NOUVEAU: Détecter automatiquement les changements de location du character
             if character_id:
-                location_movements = self._detect_character_location_changes(campaign_id, character_id, narrative_response, language)
+                location_movements = await asyncio.to_thread(
+                    self._detect_character_location_changes, campaign_id, character_id, narrative_response, language
+                )
                 if location_movements:
                     created_elements['character_movements'] = location_movements
                     logger.info(f"🚶 Detected character location changes: {location_movements}")
             
-        except Exception as e:
-            logger.error(f"Error processing narrative response: {e}")
+        except Exception:
+            # Dernier rempart du tour de jeu : la réponse narrative est renvoyée même si le traitement échoue
+            logger.exception("Error processing narrative response")
         
         return created_elements
     
-    def _parse_optional_fields(self, optional_fields: str, element_name: str) -> Dict:
-        """Parse optional fields from creation commands"""
-        kwargs = {}
-        if optional_fields:
-            try:
-                for field in optional_fields.split(', '):
-                    if '=' in field:
-                        key, value = field.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        # Convert numeric values
-                        if value.isdigit():
-                            kwargs[key] = int(value)
-                        elif value.lower() in ['true', 'false']:
-                            kwargs[key] = value.lower() == 'true'
-                        else:
-                            kwargs[key] = value
-            except Exception as e:
-                logger.warning(f"Error parsing optional fields for {element_name}: {e}")
-        return kwargs
-    
     def _process_explicit_creation_commands(self, campaign_id: int, text: str, language: str = "English") -> Dict[str, List[Dict]]:
         """Process explicit creation and update commands from the AI response"""
-        created_elements = {
-            'npcs': [],
-            'locations': [],
-            'quests': []
-        }
-        
-        updated_elements = {
-            'npcs': [],
-            'locations': [],
-            'quests': []
-        }
-        
-        # Patterns for explicit creation commands
-        npc_pattern = r'\[CREATE_NPC:name=([^,]+), race=([^,]+), class=([^,]+), description=([^\]]+?)(?:, ([^\]]+))?\]'
-        location_pattern = r'\[CREATE_LOCATION:name=([^,]+), type=([^,]+), description=([^\]]+?)(?:, ([^\]]+))?\]'
-        quest_pattern = r'\[CREATE_QUEST:title=([^,]+), type=([^,]+), description=([^\]]+?)(?:, ([^\]]+))?\]'
+        # Every command starts with '[': most roleplay turns contain none
+        if '[' not in text:
+            return {'npcs': [], 'locations': [], 'quests': []}
+        
+        # Collect every command in one pass, grouped by kind (in text order)
+        commands = {kind: [] for kind in COMMAND_PATTERNS}
+        for command in COMMAND_RE.finditer(text):
+            kind = command.group('kind').upper()
+            match = COMMAND_PATTERNS[kind].fullmatch(command.group(0))
+            if match:
+                commands[kind].append(match)
+        
+        # A '[' alone is not a command: each pass only runs when one of its commands was found
+        has_create = any(commands[kind.commands[0]] for kind in ELEMENT_KINDS)
+        has_update = any(commands[kind.commands[1]] for kind in ELEMENT_KINDS)
+        result = {kind.group: [] for kind in ELEMENT_KINDS}
+        if not has_create and not has_update:
+            return result
         
-        # Patterns for update commands
-        update_npc_pattern = r'\[UPDATE_NPC:name=([^,]+), ([^\]]+)\]'
-        update_location_pattern = r'\[UPDATE_LOCATION:name=([^,]+), ([^\]]+)\]'
-        update_quest_pattern = r'\[UPDATE_QUEST:title=([^,]+), ([^\]]+)\]'
+        # Look up every element named by the commands up front (one query per type)
+        existing = self._prefetch_existing_elements(campaign_id, commands)
         
         # Process creation commands
-        created_elements = self._process_creation_commands(campaign_id, text, npc_pattern, location_pattern, quest_pattern)
+        if has_create:
+            for group, elements in self._process_creation_commands(campaign_id, commands, existing).items():
+                result[group] += elements
         
         # Process update commands
-        updated_elements = self._process_update_commands(campaign_id, text, update_npc_pattern, update_location_pattern, update_quest_pattern)
-        
-        # Combine results
-        result = {
-            'npcs': created_elements['npcs'] + updated_elements['npcs'],
-            'locations': created_elements['locations'] + updated_elements['locations'],
-            'quests': created_elements['quests'] + updated_elements['quests']
-        }
+        if has_update:
+            for group, elements in self._process_update_commands(campaign_id, commands, existing).items():
+                result[group] += elements
         
         return result
     
-    def _process_creation_commands(self, campaign_id: int, text: str, npc_pattern: str, location_pattern: str, quest_pattern: str) -> Dict[str, List[Dict]]:
+    def _prefetch_existing_elements(self, campaign_id: int, commands: Dict[str, List[re.Match]]) -> Dict[str, Dict[str, Optional[Dict]]]:
+        """Fetch the elements named by the commands, as {type: {name: row or None}}"""
+        existing = {}
+        for kind in ELEMENT_KINDS:
+            names = list(dict.fromkeys(
+                match.group(1).strip() for command in kind.commands for match in commands[command]
+            ))
+            found = kind.get_by_keys(self.db_service, campaign_id, names) if names else {}
+            # On error nothing is prefetched: each element falls back to its own lookup
+            existing[kind.group] = {} if found is None else {name: found.get(name) for name in names}
+        return existing
+    
+    def _process_creation_commands(self, campaign_id: int, commands: Dict[str, List[re.Match]], existing: Dict[str, Dict[str, Optional[Dict]]]) -> Dict[str, List[Dict]]:
         """Process creation commands"""
-        created_elements = {
-            'npcs': [],
-            'locations': [],
-            'quests': []
-        }
-        
-        # Find NPC creation commands
-        npc_matches = re.finditer(npc_pattern, text, re.IGNORECASE)
-        for match in npc_matches:
+        # Parse every command first: the elements of a type are then written together
+        npcs = []
+        for match in commands['CREATE_NPC']:
             name = match.group(1).strip()
             race = match.group(2).strip()
             character_class = match.group(3).strip()
@@ -176,368 +356,279 @@ def _process_creation_commands(self, campaign_id: int, text: str, npc_pattern: s
             optional_fields = match.group(5) if match.group(5) else ""
             
             # Parse optional fields
-            kwargs = self._parse_optional_fields(optional_fields, f"NPC {name}")
-            
-            # Use the simple explicit method
-            result = self.create_npc_explicitly(campaign_id, name, race, character_class, description, **kwargs)
-            if result:
-                created_elements['npcs'].append(result)
-                logger.info(f"Created NPC via explicit command: {name}")
+            kwargs = _parse_fields(optional_fields)
+            npcs.append(self._build_npc_data(name, race, character_class, description, **kwargs))
         
-        # Find location creation commands
-        location_matches = re.finditer(location_pattern, text, re.IGNORECASE)
-        for match in location_matches:
+        locations = []
+        for match in commands['CREATE_LOCATION']:
             name = match.group(1).strip()
             location_type = match.group(2).strip()
             description = match.group(3).strip()
             optional_fields = match.group(4) if match.group(4) else ""
             
             # Parse optional fields
-            kwargs = self._parse_optional_fields(optional_fields, f"Location {name}")
-            
-            # Use the simple explicit method
-            result = self.create_location_explicitly(campaign_id, name, location_type, description, **kwargs)
-            if result:
-                created_elements['locations'].append(result)
-                logger.info(f"Created location via explicit command: {name}")
+            kwargs = _parse_fields(optional_fields)
+            locations.append(self._build_location_data(name, location_type, description, **kwargs))
         
-        # Find quest creation commands
-        quest_matches = re.finditer(quest_pattern, text, re.IGNORECASE)
-        for match in quest_matches:
+        quests = []
+        for match in commands['CREATE_QUEST']:
             title = match.group(1).strip()
             quest_type = match.group(2).strip()
             description = match.group(3).strip()
             optional_fields = match.group(4) if match.group(4) else ""
             
             # Parse optional fields
-            kwargs = self._parse_optional_fields(optional_fields, f"Quest {title}")
-            
-            # Use the simple explicit method
-            result = self.create_quest_explicitly(campaign_id, title, quest_type, description, **kwargs)
-            if result:
-                created_elements['quests'].append(result)
-                logger.info(f"Created quest via explicit command: {title}")
+            kwargs = _parse_fields(optional_fields)
+            quests.append(self._build_quest_data(title, quest_type, description, **kwargs))
+        
+        created_elements = {}
+        for kind, items in ((NPC_KIND, npcs), (LOCATION_KIND, locations), (QUEST_KIND, quests)):
+            created_elements[kind.group] = self._create_or_update_elements(campaign_id, kind, items, existing[kind.group])
+            for result in created_elements[kind.group]:
+                logger.info(f"Created {kind.label} via explicit command: {result[kind.key]}")
         
         return created_elements
     
-    def _process_update_commands(self, campaign_id: int, text: str, update_npc_pattern: str, update_location_pattern: str, update_quest_pattern: str) -> Dict[str, List[Dict]]:
+    def _process_update_commands(self, campaign_id: int, commands: Dict[str, List[re.Match]], existing: Dict[str, Dict[str, Optional[Dict]]]) -> Dict[str, List[Dict]]:
         """Process update commands"""
-        updated_elements = {
-            'npcs': [],
-            'locations': [],
-            'quests': []
-        }
-        
-        # Find NPC update commands
-        npc_matches = re.finditer(update_npc_pattern, text, re.IGNORECASE)
-        for match in npc_matches:
-            name = match.group(1).strip()
-            update_fields = match.group(2).strip()
-            
-            # Parse update fields
-            update_data = self._parse_update_fields(update_fields, f"NPC {name}")
-            
-            # Update NPC
-            result = self.update_npc_explicitly(campaign_id, name, **update_data)
-            if result:
-                updated_elements['npcs'].append(result)
-                logger.info(f"Updated NPC via explicit command: {name}")
-        
-        # Find location update commands
-        location_matches = re.finditer(update_location_pattern, text, re.IGNORECASE)
-        for match in location_matches:
-            name = match.group(1).strip()
-            update_fields = match.group(2).strip()
-            
-            # Parse update fields
-            update_data = self._parse_update_fields(update_fields, f"Location {name}")
-            
-            # Update location
-            result = self.update_location_explicitly(campaign_id, name, **update_data)
-            if result:
-                updated_elements['locations'].append(result)
-                logger.info(f"Updated location via explicit command: {name}")
-        
-        # Find quest update commands
-        quest_matches = re.finditer(update_quest_pattern, text, re.IGNORECASE)
-        for match in quest_matches:
-            title = match.group(1).strip()
-            update_fields = match.group(2).strip()
-            
-            # Parse update fields
-            update_data = self._parse_update_fields(update_fields, f"Quest {title}")
-            
-            # Update quest
-            result = self.update_quest_explicitly(campaign_id, title, **update_data)
-            if result:
-                updated_elements['quests'].append(result)
-                logger.info(f"Updated quest via explicit command: {title}")
+        updated_elements = {}
+        for kind in ELEMENT_KINDS:
+            prefetched = existing[kind.group]
+            updates = []
+            for match in commands[kind.commands[1]]:
+                name = match.group(1).strip()
+                update_fields = match.group(2).strip()
+                
+                # Parse update fields
+                update_data = _parse_fields(update_fields)
+                
+                # Find the element (prefetched, or looked up once on its own if the prefetch failed)
+                if name not in prefetched:
+                    prefetched[name] = kind.get_by_key(self.db_service, campaign_id, name)
+                row = prefetched[name]
+                if not row:
+                    logger.warning(f"{kind.label} {name} not found for update")
+                    continue
+                updates.append((name, row, update_data))
+            
+            updated_elements[kind.group] = self._update_elements(campaign_id, kind, updates)
+            for result in updated_elements[kind.group]:
+                logger.info(f"Updated {kind.label} via explicit command: {result[kind.key]}")
         
         return updated_elements
     
-    def _parse_update_fields(self, update_fields: str, element_name: str) -> Dict:
-        """Parse update fields from update commands"""
-        update_data = {}
-        if update_fields:
-            try:
-                for field in update_fields.split(', '):
-                    if '=' in field:
-                        key, value = field.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        # Convert numeric values
-                        if value.isdigit():
-                            update_data[key] = int(value)
-                        elif value.lower() in ['true', 'false']:
-                            update_data[key] = value.lower() == 'true'
-                        else:
-                            update_data[key] = value
-            except Exception as e:
-                logger.warning(f"Error parsing update fields for {element_name}: {e}")
-        return update_data
-    
-
-    def _create_or_update_npc(self, campaign_id: int, npc_data: Dict) -> Optional[Dict]:
-        """Create a new NPC or update existing one"""
-        try:
-            # Check if NPC already exists
-            existing_npc = self.db_service.get_npc_by_name(campaign_id, npc_data['name'])
-            
-            if existing_npc:
-                # Update existing NPC
-                logger.info(f"Updating existing NPC: {npc_data['name']}")
-                result = self.db_service.update_npc(existing_npc['Id'], **npc_data)
+    def _create_or_update_elements(self, campaign_id: int, kind: ElementKind, items: List[Dict], existing: Dict[str, Optional[Dict]]) -> List[Dict]:
+        """Create or update several elements of one type: one bulk INSERT for the new ones, one bulk UPDATE for the others"""
+        # Names the prefetch does not cover (failed lookup) go through the per-element path
+        results = []
+        pending = {}
+        for data in items:
+            if data[kind.key] not in existing:
+                result = self._create_or_update(kind, campaign_id, data, existing)
                 if result:
-                    return {'action': 'updated', 'type': 'npc', 'name': npc_data['name'], 'id': existing_npc['Id']}
+                    results.append(result)
             else:
-                # Create new NPC
-                logger.info(f"Creating new NPC: {npc_data['name']}")
-                result = self.db_service.create_campaign_npc(
-                    campaign_id=campaign_id,
-                    name=npc_data['name'],
-                    npc_type=npc_data.get('type', 'Humanoid'),
-                    race=npc_data['race'],
-                    **{k: v for k, v in npc_data.items() if k not in ['name', 'type', 'race']}
-                )
-                if result:
-                    # Start background image generation for new NPC
-                    self._start_background_image_generation('npc', result['Id'], npc_data, campaign_id)
-                    
-                    return {'action': 'created', 'type': 'npc', 'name': npc_data['name'], 'id': result['Id']}
+                # A name repeated in the response is written once, later fields overriding earlier ones
+                pending.setdefault(data[kind.key], {}).update(data)
         
-        except Exception as e:
-            logger.error(f"Error creating/updating NPC {npc_data.get('name', 'Unknown')}: {e}")
+        # Split before creating: the rows created below are added to existing
+        to_create = [data for name, data in pending.items() if not existing[name]]
+        to_update = [(name, existing[name], self._update_data(kind, existing[name], data)) for name, data in pending.items() if existing[name]]
         
-        return None
+        if to_create:
+            results += self._create_elements(campaign_id, kind, to_create, existing)
+        if to_update:
+            results += self._update_elements(campaign_id, kind, to_update)
+        return results
     
-    def _create_or_update_location(self, campaign_id: int, location_data: Dict) -> Optional[Dict]:
-        """Create a new location or update existing one"""
+    def _create_elements(self, campaign_id: int, kind: ElementKind, items: List[Dict], existing: Dict[str, Optional[Dict]]) -> List[Dict]:
+        """Create new elements of one type with a single bulk INSERT"""
         try:
-            # Check if location already exists
-            existing_location = self.db_service.get_location_by_name(campaign_id, location_data['name'])
-            
-            if existing_location:
-                # Update existing location (mark as discovered if not already)
-                logger.info(f"Updating existing location: {location_data['name']}")
-                update_data = {k: v for k, v in location_data.items() if k != 'name'}
-                if not existing_location.get('IsDiscovered', False):
-                    update_data['is_discovered'] = True
-                
-                result = self.db_service.update_location(existing_location['Id'], **update_data)
+            rows = kind.create_bulk(self.db_service, campaign_id, [{**kind.create_defaults, **data} for data in items])
+            if rows is None:
+                # Nothing was created: fall back to one INSERT per element
+                results = [self._create_or_update(kind, campaign_id, data, existing) for data in items]
+                return [result for result in results if result]
+            
+            results = []
+            for data, row in zip(items, rows):
+                existing[data[kind.key]] = row
+                if kind.image_field:
+                    # Start background image generation for the new element
+                    self._start_background_image_generation(kind.name, row['Id'], data, campaign_id)
+                results.append({'action': 'created', 'type': kind.name, kind.key: data[kind.key], 'id': row['Id']})
+            return results
+        except ELEMENT_ERRORS:
+            logger.exception(f"Error creating {kind.group} in bulk for campaign {campaign_id}")
+            return []
+    
+    def _update_elements(self, campaign_id: int, kind: ElementKind, updates: List[tuple]) -> List[Dict]:
+        """Update existing elements of one type with a single bulk UPDATE; updates holds (name, row, fields)"""
+        try:
+            if not updates:
+                return []
+            
+            # An element updated several times gets its fields merged, later ones winning
+            merged = {}
+            for name, row, fields in updates:
+                merged.setdefault(row['Id'], (name, {}))[1].update(fields)
+            
+            updated = kind.update_bulk(self.db_service, campaign_id, [(row_id, fields) for row_id, (_, fields) in merged.items()])
+            if updated is None:
+                # Nothing was applied: fall back to one UPDATE per element
+                updated = [row_id for row_id, (_, fields) in merged.items() if kind.update(self.db_service, row_id, **fields)]
+            
+            return [{'action': 'updated', 'type': kind.name, kind.key: merged[row_id][0], 'id': row_id} for row_id in updated]
+        except ELEMENT_ERRORS:
+            logger.exception(f"Error updating {kind.group} in bulk for campaign {campaign_id}")
+            return []
+    
+    def _update_data(self, kind: ElementKind, row: Dict, data: Dict) -> Dict:
+        """Fields written when a created element already exists"""
+        if not kind.discoverable:
+            return data
+        # Existing locations are updated without their name and marked as discovered
+        update_data = data.copy()
+        update_data.pop(kind.key, None)
+        if not row.get('IsDiscovered', False):
+            update_data['is_discovered'] = True
+        return update_data
+    
+    def _create_or_update(self, kind: ElementKind, campaign_id: int, data: Dict, existing: Optional[Dict[str, Optional[Dict]]] = None) -> Optional[Dict]:
+        """Create a new element or update the existing one, looking it up in existing (key -> row or None) when prefetched"""
+        key = data.get(kind.key, 'Unknown')
+        try:
+            # Check if the element already exists
+            if existing is not None and key in existing:
+                row = existing[key]
+            else:
+                row = kind.get_by_key(self.db_service, campaign_id, data[kind.key])
+                if existing is not None:
+                    existing[key] = row
+            
+            if row:
+                # Update existing element
+                logger.info(f"Updating existing {kind.label}: {key}")
+                result = kind.update(self.db_service, row['Id'], **self._update_data(kind, row, data))
                 if result:
-                    return {'action': 'updated', 'type': 'location', 'name': location_data['name'], 'id': existing_location['Id']}
+                    return {'action': 'updated', 'type': kind.name, kind.key: key, 'id': row['Id']}
             else:
-                # Create new location
-                logger.info(f"Creating new location: {location_data['name']}")
-                result = self.db_service.create_campaign_location(
-                    campaign_id=campaign_id,
-                    name=location_data['name'],
-                    location_type=location_data.get('type', 'Location'),
-                    **{k: v for k, v in location_data.items() if k not in ['name', 'type']}
-                )
+                # Create new element: the create_* parameters are popped from a single
+                # copy of the data, what remains is passed as the optional fields
+                logger.info(f"Creating new {kind.label}: {key}")
+                extras = {**kind.create_defaults, **data}
+                params = {parameter: extras.pop(field) for field, parameter in kind.create_params}
+                result = kind.create(self.db_service, campaign_id=campaign_id, **params, **extras)
                 if result:
-                    # Start background image generation for new location
-                    self._start_background_image_generation('location', result['Id'], location_data, campaign_id)
+                    if existing is not None:
+                        existing[key] = result
+                    if kind.image_field:
+                        # Start background image generation for the new element
+                        self._start_background_image_generation(kind.name, result['Id'], data, campaign_id)
                     
-                    return {'action': 'created', 'type': 'location', 'name': location_data['name'], 'id': result['Id']}
+                    return {'action': 'created', 'type': kind.name, kind.key: key, 'id': result['Id']}
         
-        except Exception as e:
-            logger.error(f"Error creating/updating location {location_data.get('name', 'Unknown')}: {e}")
+        except ELEMENT_ERRORS:
+            logger.exception(f"Error creating/updating {kind.label} {key}")
         
         return None
     
-    def _create_or_update_quest(self, campaign_id: int, quest_data: Dict) -> Optional[Dict]:
+    def _create_or_update_npc(self, campaign_id: int, npc_data: Dict, existing: Optional[Dict[str, Optional[Dict]]] = None) -> Optional[Dict]:
+        """Create a new NPC or update existing one"""
+        return self._create_or_update(NPC_KIND, campaign_id, npc_data, existing)
+    
+    def _create_or_update_location(self, campaign_id: int, location_data: Dict, existing: Optional[Dict[str, Optional[Dict]]] = None) -> Optional[Dict]:
+        """Create a new location or update existing one"""
+        return self._create_or_update(LOCATION_KIND, campaign_id, location_data, existing)
+    
+    def _create_or_update_quest(self, campaign_id: int, quest_data: Dict, existing: Optional[Dict[str, Optional[Dict]]] = None) -> Optional[Dict]:
         """Create a new quest or update existing one"""
-        try:
-            # Check if quest already exists
-            existing_quest = self.db_service.get_quest_by_title(campaign_id, quest_data['title'])
-            
-            if existing_quest:
-                # Update existing quest
-                logger.info(f"Updating existing quest: {quest_data['title']}")
-                result = self.db_service.update_quest(existing_quest['Id'], **quest_data)
-                if result:
-                    return {'action': 'updated', 'type': 'quest', 'title': quest_data['title'], 'id': existing_quest['Id']}
-            else:
-                # Create new quest
-                logger.info(f"Creating new quest: {quest_data['title']}")
-                result = self.db_service.create_campaign_quest(
-                    campaign_id=campaign_id,
-                    title=quest_data['title'],
-                    **{k: v for k, v in quest_data.items() if k != 'title'}
-                )
-                if result:
-                    return {'action': 'created', 'type': 'quest', 'title': quest_data['title'], 'id': result['Id']}
-        
-        except Exception as e:
-            logger.error(f"Error creating/updating quest {quest_data.get('title', 'Unknown')}: {e}")
-        
-        return None
+        return self._create_or_update(QUEST_KIND, campaign_id, quest_data, existing)
+    
+    def _build_npc_data(self, name: str, race: str, character_class: str, description: str, **kwargs) -> Dict:
+        """Data of an NPC from an explicit command, with defaults for the missing fields"""
+        # One C-level merge: defaults, then the explicit arguments, then kwargs (which win)
+        return {**NPC_DEFAULTS, 'name': name, 'race': race, 'class': character_class, 'description': description, **kwargs}
     
     def create_npc_explicitly(self, campaign_id: int, name: str, race: str, character_class: str, description: str, **kwargs) -> Optional[Dict]:
         """Create an NPC explicitly with provided data"""
-        try:
-            npc_data = {
-                'name': name,
-                'race': race,
-                'type': kwargs.get('type', 'Humanoid'),
-                'class': character_class,
-                'description': description,
-                'level': kwargs.get('level', 1),
-                'max_hit_points': kwargs.get('max_hit_points', 10),
-                'current_hit_points': kwargs.get('current_hit_points', 10),
-                'armor_class': kwargs.get('armor_class', 10),
-                'strength': kwargs.get('strength', 10),
-                'dexterity': kwargs.get('dexterity', 10),
-                'constitution': kwargs.get('constitution', 10),
-                'intelligence': kwargs.get('intelligence', 10),
-                'wisdom': kwargs.get('wisdom', 10),
-                'charisma': kwargs.get('charisma', 10),
-                'alignment': kwargs.get('alignment'),
-                'current_location': kwargs.get('current_location'),
-                'status': kwargs.get('status', 'Active'),
-                'notes': kwargs.get('notes'),
-                **kwargs
-            }
-            
-            result = self._create_or_update_npc(campaign_id, npc_data)
-            if result:
-                logger.info(f"Explicitly created NPC: {name}")
-            return result
-        except Exception as e:
-            logger.error(f"Error creating NPC {name}: {e}")
-            return None
+        npc_data = self._build_npc_data(name, race, character_class, description, **kwargs)
+        
+        result = self._create_or_update_npc(campaign_id, npc_data)
+        if result:
+            logger.info(f"Explicitly created NPC: {name}")
+        return result
+    
+    def _build_location_data(self, name: str, location_type: str, description: str, **kwargs) -> Dict:
+        """Data of a location from an explicit command, with defaults for the missing fields"""
+        return {**LOCATION_DEFAULTS, 'name': name, 'type': location_type, 'description': description, **kwargs}
     
     def create_location_explicitly(self, campaign_id: int, name: str, location_type: str, description: str, **kwargs) -> Optional[Dict]:
         """Create a location explicitly with provided data"""
-        try:
-            location_data = {
-                'name': name,
-                'type': location_type,
-                'description': description,
-                'short_description': kwargs.get('short_description'),
-                'parent_location_id': kwargs.get('parent_location_id'),
-                'is_discovered': kwargs.get('is_discovered', True),
-                'is_accessible': kwargs.get('is_accessible', True),
-                'climate': kwargs.get('climate'),
-                'terrain': kwargs.get('terrain'),
-                'population': kwargs.get('population'),
-                'notes': kwargs.get('notes'),
-                **kwargs
-            }
-            
-            result = self._create_or_update_location(campaign_id, location_data)
-            if result:
-                logger.info(f"Explicitly created location: {name}")
-            return result
-        except Exception as e:
-            logger.error(f"Error creating location {name}: {e}")
-            return None
+        location_data = self._build_location_data(name, location_type, description, **kwargs)
+        
+        result = self._create_or_update_location(campaign_id, location_data)
+        if result:
+            logger.info(f"Explicitly created location: {name}")
+        return result
+    
+    def _build_quest_data(self, title: str, quest_type: str, description: str, **kwargs) -> Dict:
+        """Data of a quest from an explicit command, with defaults for the missing fields"""
+        return {**QUEST_DEFAULTS, 'title': title, 'type': quest_type, 'description': description, **kwargs}
     
     def create_quest_explicitly(self, campaign_id: int, title: str, quest_type: str, description: str, **kwargs) -> Optional[Dict]:
         """Create a quest explicitly with provided data"""
-        try:
-            quest_data = {
-                'title': title,
-                'type': quest_type,
-                'difficulty': kwargs.get('difficulty', 'Medium'),
-                'status': kwargs.get('status', 'Available'),
-                'description': description,
-                'short_description': kwargs.get('short_description'),
-                'reward': kwargs.get('reward'),
-                'requirements': kwargs.get('requirements'),
-                'required_level': kwargs.get('required_level'),
-                'location_id': kwargs.get('location_id'),
-                'quest_giver': kwargs.get('quest_giver'),
-                'notes': kwargs.get('notes'),
-                'progress': kwargs.get('progress'),
-                **kwargs
-            }
-            
-            result = self._create_or_update_quest(campaign_id, quest_data)
-            if result:
-                logger.info(f"Explicitly created quest: {title}")
-            return result
-        except Exception as e:
-            logger.error(f"Error creating quest {title}: {e}")
-            return None
+        quest_data = self._build_quest_data(title, quest_type, description, **kwargs)
+        
+        result = self._create_or_update_quest(campaign_id, quest_data)
+        if result:
+            logger.info(f"Explicitly created quest: {title}")
+        return result
     
     def update_npc_explicitly(self, campaign_id: int, name: str, **kwargs) -> Optional[Dict]:
         """Update an NPC explicitly with provided data"""
-        try:
-            # Find existing NPC by name
-            existing_npc = self.db_service.get_npc_by_name(campaign_id, name)
-            if not existing_npc:
-                logger.warning(f"NPC {name} not found for update")
-                return None
-            
-            # Update NPC with provided data
-            result = self.db_service.update_npc(existing_npc['Id'], **kwargs)
-            if result:
-                logger.info(f"Explicitly updated NPC: {name}")
-                return {'action': 'updated', 'type': 'npc', 'name': name, 'id': existing_npc['Id']}
-            return None
-        except Exception as e:
-            logger.error(f"Error updating NPC {name}: {e}")
+        # Find existing NPC by name
+        existing_npc = self.db_service.get_npc_by_name(campaign_id, name)
+        if not existing_npc:
+            logger.warning(f"NPC {name} not found for update")
             return None
+        
+        # Update NPC with provided data
+        result = self.db_service.update_npc(existing_npc['Id'], **kwargs)
+        if result:
+            logger.info(f"Explicitly updated NPC: {name}")
+            return {'action': 'updated', 'type': 'npc', 'name': name, 'id': existing_npc['Id']}
+        return None
     
     def update_location_explicitly(self, campaign_id: int, name: str, **kwargs) -> Optional[Dict]:
         """Update a location explicitly with provided data"""
-        try:
-            # Find existing location by name
-            existing_location = self.db_service.get_location_by_name(campaign_id, name)
-            if not existing_location:
-                logger.warning(f"Location {name} not found for update")
-                return None
-            
-            # Update location with provided data
-            result = self.db_service.update_location(existing_location['Id'], **kwargs)
-            if result:
-                logger.info(f"Explicitly updated location: {name}")
-                return {'action': 'updated', 'type': 'location', 'name': name, 'id': existing_location['Id']}
-            return None
-        except Exception as e:
-            logger.error(f"Error updating location {name}: {e}")
+        # Find existing location by name
+        existing_location = self.db_service.get_location_by_name(campaign_id, name)
+        if not existing_location:
+            logger.warning(f"Location {name} not found for update")
             return None
+        
+        # Update location with provided data
+        result = self.db_service.update_location(existing_location['Id'], **kwargs)
+        if result:
+            logger.info(f"Explicitly updated location: {name}")
+            return {'action': 'updated', 'type': 'location', 'name': name, 'id': existing_location['Id']}
+        return None
     
     def update_quest_explicitly(self, campaign_id: int, title: str, **kwargs) -> Optional[Dict]:
         """Update a quest explicitly with provided data"""
-        try:
-            # Find existing quest by title
-            existing_quest = self.db_service.get_quest_by_title(campaign_id, title)
-            if not existing_quest:
-                logger.warning(f"Quest {title} not found for update")
-                return None
-            
-            # Update quest with provided data
-            result = self.db_service.update_quest(existing_quest['Id'], **kwargs)
-            if result:
-                logger.info(f"Explicitly updated quest: {title}")
-                return {'action': 'updated', 'type': 'quest', 'title': title, 'id': existing_quest['Id']}
-            return None
-        except Exception as e:
-            logger.error(f"Error updating quest {title}: {e}")
+        # Find existing quest by title
+        existing_quest = self.db_service.get_quest_by_title(campaign_id, title)
+        if not existing_quest:
+            logger.warning(f"Quest {title} not found for update")
             return None
+        
+        # Update quest with provided data
+        result = self.db_service.update_quest(existing_quest['Id'], **kwargs)
+        if result:
+            logger.info(f"Explicitly updated quest: {title}")
+            return {'action': 'updated', 'type': 'quest', 'title': title, 'id': existing_quest['Id']}
+        return None
     
     async def _generate_npc_portrait(self, npc_data: Dict, campaign_id: int = None) -> Optional[str]:
         """Generate a portrait for an NPC and store it permanently"""
@@ -547,7 +638,7 @@ async def _generate_npc_portrait(self, npc_data: Dict, campaign_id: int = None)
             character_class = npc_data.get('class', 'Unknown')
             description = npc_data.get('description', '')
             npc_id = npc_data.get('id', 0)
-            traits = ", ".join(description.split(".")[0].split()[:10])
+            traits = _extract_traits(description)
             prompt = f"Portrait de {name}, {race} {character_class}, {traits}. Style fantasy, lumière dramatique."
             prompt = prompt[:750]
             
@@ -576,7 +667,7 @@ async def _generate_location_image(self, location_data: Dict, campaign_id: int =
             location_id = location_data.get('id', 0)
             climate = location_data.get('climate', 'mystérieuse')
             terrain = location_data.get('terrain', 'inconnu')
-            traits = ", ".join(description.split(".")[0].split()[:10])
+            traits = _extract_traits(description)
             prompt = f"Illustration de {name}, {location_type}, {traits}. Ambiance {climate}, terrain {terrain}, style fantasy."
             prompt = prompt[:750]
             
@@ -596,6 +687,13 @@ async def _generate_location_image(self, location_data: Dict, campaign_id: int =
             logger.error(f"Error generating location image: {e}")
             return None 
     
+    async def _generate_missing_image(self, kind: ElementKind, element_data: Dict, campaign_id: int) -> Optional[str]:
+        """Génère l'image d'un élément existant dès qu'une place se libère (IMAGE_GENERATION_CONCURRENCY au plus)"""
+        async with self._image_semaphore:
+            if kind is NPC_KIND:
+                return await self._generate_npc_portrait(element_data, campaign_id)
+            return await self._generate_location_image(element_data, campaign_id)
+    
     async def generate_missing_images_for_campaign(self, campaign_id: int) -> Dict[str, int]:
         """Génère les images manquantes pour tous les éléments d'une campagne"""
         results = {
@@ -605,64 +703,61 @@ async def generate_missing_images_for_campaign(self, campaign_id: int) -> Dict[s
         }
         
         try:
-            # Générer les portraits manquants pour les NPCs
-            npcs = self.db_service.get_campaign_npcs(campaign_id)
+            npcs = await db_call(self.db_service.get_campaign_npcs, campaign_id)
+            locations = await db_call(self.db_service.get_campaign_locations, campaign_id)
+            
+            # Éléments dont l'image manque vraiment (None, vide, ou chaîne vide), avec les données de génération
+            jobs = []
             for npc in npcs:
-                # Ne générer que si l'image est vraiment manquante (None, vide, ou chaîne vide)
                 portrait_url = npc.get('PortraitUrl')
                 if not portrait_url or portrait_url.strip() == '':
-                    try:
-                        npc_data = {
-                            'name': npc['Name'],
-                            'race': npc.get('Race', 'Unknown'),
-                            'class': npc.get('Class', 'Unknown'),
-                            'description': npc.get('Description', ''),
-                            'type': npc.get('Type', 'Humanoid')
-                        }
-                        
-                        new_portrait_url = await self._generate_npc_portrait(npc_data, campaign_id)
-                        if new_portrait_url:
-                            # Use asyncio.to_thread for sync DB call in async context
-                            import asyncio
-                            await asyncio.to_thread(self.db_service.update_npc, npc['Id'], portrait_url=new_portrait_url)
-                            results['npcs_generated'] += 1
-                            logger.info(f"✅ Portrait généré pour NPC existant: {npc['Name']}")
-                        else:
-                            logger.warning(f"⚠️ Échec de génération du portrait pour NPC {npc['Name']}")
-                    except Exception as e:
-                        logger.error(f"❌ Erreur lors de la génération du portrait pour NPC {npc['Name']}: {e}")
-                        results['errors'] += 1
+                    jobs.append((NPC_KIND, npc, {
+                        'name': npc['Name'],
+                        'race': npc.get('Race', 'Unknown'),
+                        'class': npc.get('Class', 'Unknown'),
+                        'description': npc.get('Description', ''),
+                        'type': npc.get('Type', 'Humanoid')
+                    }))
                 else:
                     logger.info(f"ℹ️ NPC {npc['Name']} a déjà un portrait: {portrait_url[:50]}...")
-            
-            # Générer les images manquantes pour les locations
-            locations = self.db_service.get_campaign_locations(campaign_id)
             for location in locations:
-                # Ne générer que si l'image est vraiment manquante (None, vide, ou chaîne vide)
                 image_url = location.get('ImageUrl')
                 if not image_url or image_url.strip() == '':
-                    try:
-                        location_data = {
-                            'name': location['Name'],
-                            'type': location.get('Type', 'Location'),
-                            'description': location.get('Description', '')
-                        }
-                        
-                        new_image_url = await self._generate_location_image(location_data, campaign_id)
-                        if new_image_url:
-                            # Use asyncio.to_thread for sync DB call in async context
-                            import asyncio
-                            await asyncio.to_thread(self.db_service.update_location, location['Id'], image_url=new_image_url)
-                            results['locations_generated'] += 1
-                            logger.info(f"✅ Image générée pour location existante: {location['Name']}")
-                        else:
-                            logger.warning(f"⚠️ Échec de génération de l'image pour location {location['Name']}")
-                    except Exception as e:
-                        logger.error(f"❌ Erreur lors de la génération de l'image pour location {location['Name']}: {e}")
-                        results['errors'] += 1
+                    jobs.append((LOCATION_KIND, location, {
+                        'name': location['Name'],
+                        'type': location.get('Type', 'Location'),
+                        'description': location.get('Description', '')
+                    }))
                 else:
                     logger.info(f"ℹ️ Location {location['Name']} a déjà une image: {image_url[:50]}...")
             
+            # Toutes les générations sont lancées ensemble, le sémaphore partagé en borne le nombre simultané
+            images = await asyncio.gather(
+                *(self._generate_missing_image(kind, element_data, campaign_id) for kind, _, element_data in jobs),
+                return_exceptions=True
+            )
+            
+            updates = {NPC_KIND.name: [], LOCATION_KIND.name: []}
+            for (kind, element, _), image in zip(jobs, images):
+                if isinstance(image, Exception):
+                    logger.error(f"❌ Erreur lors de la génération de l'image pour {kind.label} {element['Name']}: {image}")
+                    results['errors'] += 1
+                elif image:
+                    updates[kind.name].append((element['Id'], {kind.image_field: image}))
+                    logger.info(f"✅ Image générée pour {kind.label} existant: {element['Name']}")
+                else:
+                    logger.warning(f"⚠️ Échec de génération de l'image pour {kind.label} {element['Name']}")
+            
+            # Une seule mise à jour groupée par type pour enregistrer les images
+            for kind, counter in ((NPC_KIND, 'npcs_generated'), (LOCATION_KIND, 'locations_generated')):
+                if not updates[kind.name]:
+                    continue
+                updated = await db_call(kind.update_bulk, self.db_service, campaign_id, updates[kind.name])
+                if updated is None:
+                    results['errors'] += len(updates[kind.name])
+                else:
+                    results[counter] += len(updated)
+            
             logger.info(f"🎨 Génération d'images terminée: {results['npcs_generated']} portraits NPC, {results['locations_generated']} images location, {results['errors']} erreurs")
             
         except Exception as e:
@@ -694,7 +789,7 @@ def get_image_generation_status(self, campaign_id: int) -> Dict[str, any]:
                     'with_images': locations_with_images,
                     'missing_images': total_locations - locations_with_images
                 },
-                'background_threads': len(self._background_threads)
+                'background_threads': len(self._image_tasks)
             }
         except Exception as e:
             logger.error(f"❌ Erreur lors de la récupération du statut d'images pour la campagne {campaign_id}: {e}")
@@ -713,71 +808,62 @@ def _detect_character_location_changes(self, campaign_id: int, character_id: int
         location_movements = []
         
         try:
+            # Multi-language location movement patterns
+            if language.lower() in ['french', 'français']:
+                movement_re, movement_patterns, keywords = MOVEMENT_RE_FR, MOVEMENT_PATTERNS_FR, MOVEMENT_KEYWORDS_FR
+            else:  # English
+                movement_re, movement_patterns, keywords = MOVEMENT_RE_EN, MOVEMENT_PATTERNS_EN, MOVEMENT_KEYWORDS_EN
+            
+            # Aucun mot-clé de déplacement : inutile de charger les lieux ni de lancer les regex
+            narrative_lower = narrative_response.lower()
+            if not any(keyword in narrative_lower for keyword in keywords):
+                return location_movements
+            
             # Get existing locations for the campaign
             locations = self.db_service.get_campaign_locations(campaign_id)
-            location_names = [loc.get('Name', '') for loc in locations if loc.get('Name')]
+            locations_by_name = {loc['Name']: loc for loc in locations if loc.get('Name')}
             
-            if not location_names:
+            if not locations_by_name:
                 return location_movements
             
-            # Multi-language location movement patterns
-            if language.lower() in ['french', 'français']:
-                movement_patterns = [
-                    r"tu te trouves (?:maintenant |désormais )?(?:dans|à|en|au|aux) (.+?)(?:\.|,|$)",
-                    r"vous vous trouvez (?:maintenant |désormais )?(?:dans|à|en|au|aux) (.+?)(?:\.|,|$)",
-                    r"tu te déplaces? vers (.+?)(?:\.|,|$)",
-                    r"vous vous déplacez vers (.+?)(?:\.|,|$)",
-                    r"tu (?:arrives?|entre.?|va.?) (?:dans|à|en|au|aux) (.+?)(?:\.|,|$)",
-                    r"vous (?:arrivez|entrez|allez) (?:dans|à|en|au|aux) (.+?)(?:\.|,|$)",
-                    r"direction (?:de |du |de la |des )?(.+?)(?:\.|,|$)",
-                    r"(?:bienvenue|retour) (?:dans|à|en|au|aux) (.+?)(?:\.|,|$)"
-                ]
-            else:  # English
-                movement_patterns = [
-                    r"you (?:are )?(?:now |currently )?(?:in|at|inside) (.+?)(?:\.|,|$)",
-                    r"you move (?:to|towards|into) (.+?)(?:\.|,|$)",
-                    r"you (?:arrive|enter|go) (?:at|in|to) (.+?)(?:\.|,|$)",
-                    r"you (?:travel|head|walk) (?:to|towards) (.+?)(?:\.|,|$)",
-                    r"welcome to (.+?)(?:\.|,|$)",
-                    r"(?:arriving|entering) (.+?)(?:\.|,|$)"
-                ]
-            
-            # Search for movement patterns in the narrative
-            for pattern in movement_patterns:
-                matches = re.finditer(pattern, narrative_response, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
-                    mentioned_location = match.group(1).strip()
-                    
-                    # Clean up the location name (remove articles, punctuation)
-                    cleaned_location = self._clean_location_name(mentioned_location)
-                    
-                    # Find the best matching location from existing locations
-                    best_match = self._find_best_location_match(cleaned_location, location_names)
+            # Lowercased names and word sets, computed once for every movement of the narrative
+            location_index = self._build_location_index(locations_by_name)
+            
+            # Search for movement patterns in the narrative: one scan for every pattern, in text order
+            for match in movement_re.finditer(narrative_response):
+                # The matched pattern is the outer group p<i>; its location is the group right after it
+                mentioned_location = match.group(match.lastindex + 1).strip()
+                
+                # Clean up the location name (remove articles, punctuation)
+                cleaned_location = self._clean_location_name(mentioned_location)
+                
+                # Find the best matching location from existing locations
+                best_match = self._find_best_location_match(cleaned_location, location_index)
+                
+                if best_match:
+                    # Get the location ID for better synchronization (row already loaded above)
+                    location_data = locations_by_name.get(best_match)
+                    location_id = location_data.get('Id') if location_data else None
                     
-                    if best_match:
-                        # Get the location ID for better synchronization
-                        location_data = self.db_service.get_location_by_name(campaign_id, best_match)
-                        location_id = location_data.get('Id') if location_data else None
-                        
-                        # Update character location in database (both ID and name for compatibility)
-                        success = self.db_service.update_character_location(
-                            campaign_id, character_id, best_match, location_id
-                        )
-                        
-                        if success:
-                            movement_info = {
-                                'character_id': character_id,
-                                'previous_location': self.db_service.get_character_location(campaign_id, character_id),
-                                'new_location': best_match,
-                                'new_location_id': location_id,
-                                'mentioned_as': mentioned_location,
-                                'pattern_matched': pattern,
-                                'action': 'moved'
-                            }
-                            location_movements.append(movement_info)
-                            logger.info(f"🚶 Auto-updated character {character_id} location to '{best_match}' (ID: {location_id}, mentioned as '{mentioned_location}')")
-                            break  # Only process the first movement per response
+                    # Update character location in database (both ID and name for compatibility)
+                    success = self.db_service.update_character_location(
+                        campaign_id, character_id, best_match, location_id
+                    )
                     
+                    if success:
+                        movement_info = {
+                            'character_id': character_id,
+                            'previous_location': success.get('PreviousLocation'),
+                            'new_location': best_match,
+                            'new_location_id': location_id,
+                            'mentioned_as': mentioned_location,
+                            'pattern_matched': movement_patterns[int(match.lastgroup[1:])],
+                            'action': 'moved'
+                        }
+                        location_movements.append(movement_info)
+                        logger.info(f"🚶 Auto-updated character {character_id} location to '{best_match}' (ID: {location_id}, mentioned as '{mentioned_location}')")
+                        break  # Only process the first movement per response
+                
         except Exception as e:
             logger.error(f"Error detecting character location changes: {e}")
         
@@ -786,46 +872,50 @@ def _detect_character_location_changes(self, campaign_id: int, character_id: int
     def _clean_location_name(self, location_name: str) -> str:
         """Clean location name by removing articles and extra words"""
         # Remove common articles and prepositions (multi-language)
-        articles = ['le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'the', 'a', 'an']
         words = location_name.split()
         cleaned_words = []
         
         for word in words:
-            word_clean = word.lower().strip('.,!?;:"()[]{}')
-            if word_clean not in articles:
-                cleaned_words.append(word.strip('.,!?;:"()[]{}'))
+            word_clean = word.strip(LOCATION_WORD_PUNCTUATION)
+            if word_clean.lower() not in LOCATION_ARTICLES:
+                cleaned_words.append(word_clean)
         
         return ' '.join(cleaned_words).title()
     
-    def _find_best_location_match(self, mentioned_location: str, existing_locations: List[str]) -> str:
-        """Find the best matching existing location for a mentioned location"""
+    def _build_location_index(self, location_names) -> Tuple[Dict[str, str], List[Tuple[str, str]], List[str]]:
+        """Index existing locations as ({lowercased name: name}, [(name, lowercased name)] longest first, lowercased names)"""
+        # Sorted once per narrative; equal lengths keep list order
+        entries = sorted(((name, name.lower()) for name in location_names), key=lambda entry: -len(entry[1]))
+        by_lower = {}
+        for name, location_lower in entries:
+            # The first location wins when two names only differ by case
+            by_lower.setdefault(location_lower, name)
+        return by_lower, entries, [location_lower for _, location_lower in entries]
+    
+    def _find_best_location_match(self, mentioned_location: str, location_index: Tuple[Dict[str, str], List[Tuple[str, str]], List[str]]) -> str:
+        """Find the best matching existing location for a mentioned location (location_index from _build_location_index)"""
+        by_lower, entries, location_names = location_index
         mentioned_lower = mentioned_location.lower()
+        if not mentioned_lower:
+            return None
         
         # Exact match first
-        for location in existing_locations:
-            if location.lower() == mentioned_lower:
-                return location
+        exact = by_lower.get(mentioned_lower)
+        if exact:
+            return exact
         
-        # Partial match (location name contains mentioned location or vice versa)
-        for location in existing_locations:
-            location_lower = location.lower()
-            if (mentioned_lower in location_lower or 
-                location_lower in mentioned_lower or
-                self._calculate_similarity(mentioned_lower, location_lower) > 0.7):
+        # Partial match: the longest location named in the mention (the most specific one)...
+        for location, location_lower in entries:
+            if location_lower in mentioned_lower:
+                return location
+        # ...or else the shortest location containing the mention (the closest one)
+        for location, location_lower in reversed(entries):
+            if mentioned_lower in location_lower:
                 return location
         
-        return None
-    
-    def _calculate_similarity(self, text1: str, text2: str) -> float:
-        """Calculate similarity ratio between two texts"""
-        # Simple similarity based on common words
-        words1 = set(text1.split())
-        words2 = set(text2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0.0 
\ No newline at end of file
+        # Fuzzy match only without any partial match: the best scoring name, the longest one on ties
+        best = process.extractOne(
+            mentioned_lower, location_names,
+            scorer=fuzz.WRatio, score_cutoff=LOCATION_MATCH_CUTOFF
+        )
+        return entries[best[2]][0] if best else None 
\ No newline at end of file
@@ -8,20 +8,76 @@
 import hashlib
 import logging
 import aiohttp
+import aiofiles
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterator, Tuple
 from urllib.parse import urlparse
 from datetime import datetime
+from async_utils import db_call
 
 logger = logging.getLogger(__name__)
 
+# Connexions HTTP gardées ouvertes pour les téléchargements d'images (au total / par hôte)
+DOWNLOAD_CONNECTION_LIMIT = 32
+DOWNLOAD_CONNECTIONS_PER_HOST = 16
+# Durée de cache des résolutions DNS (secondes)
+DOWNLOAD_DNS_CACHE_SECONDS = 300
+# Délai maximum d'un téléchargement (secondes)
+DOWNLOAD_TIMEOUT_SECONDS = 30
+# Taille des morceaux écrits sur disque pendant un téléchargement (octets)
+DOWNLOAD_CHUNK_SIZE = 65536
+# Taille minimale d'une image valide : en dessous, c'est probablement une réponse d'erreur (octets)
+MIN_IMAGE_SIZE = 1000
+# Signatures reconnues en tête d'une image téléchargée (PNG, JPEG) et octets lus pour les vérifier
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff')
+IMAGE_SIGNATURE_SIZE = 8
+# Images migrées simultanément au plus (téléchargement puis mise à jour en base)
+MIGRATION_CONCURRENCY = 16
+# Threads réservés aux écritures en base des chemins migrés (hors de l'exécuteur par défaut)
+DB_WRITE_WORKERS = 4
+# Suites de caractères à remplacer par un seul underscore dans les noms de fichiers :
+# tout sauf lettres, chiffres et tirets, underscores existants compris
+FILENAME_UNSAFE_RE = re.compile(r'(?:[^\w-]|_)+')
+
 class ImageStorageService:
     """Service pour télécharger et stocker les images générées de manière permanente"""
     
     def __init__(self, base_storage_path: str = "static/images"):
         self.base_storage_path = Path(base_storage_path)
         self.ensure_directories()
+        # Session HTTP partagée par les téléchargements (créée au premier, dans la boucle qui l'utilise)
+        self._session = None
+        self._session_loop = None
+        # Écritures en base des chemins migrés : exécuteur borné, futurs suivis jusqu'à leur fin
+        self._db_executor = ThreadPoolExecutor(max_workers=DB_WRITE_WORKERS, thread_name_prefix="img-db")
+        self._pending_db_writes = set()
+        
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session HTTP réutilisée d'un téléchargement à l'autre (connexions TLS conservées)"""
+        loop = asyncio.get_running_loop()
+        # Une session est liée à sa boucle : les scripts lancés par asyncio.run en recréent une
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=DOWNLOAD_CONNECTION_LIMIT,
+                    limit_per_host=DOWNLOAD_CONNECTIONS_PER_HOST,
+                    ttl_dns_cache=DOWNLOAD_DNS_CACHE_SECONDS
+                ),
+                timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT_SECONDS)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """Fermer la session HTTP partagée (arrêt du service), après les écritures en base en cours"""
+        if self._pending_db_writes:
+            await asyncio.gather(*self._pending_db_writes, return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
         
     def ensure_directories(self):
         """Créer les dossiers de stockage nécessaires"""
@@ -39,12 +95,8 @@ def ensure_directories(self):
     
     def sanitize_filename(self, name: str) -> str:
         """Nettoyer un nom pour l'utiliser comme nom de fichier"""
-        # Remplacer les caractères spéciaux par des underscores
-        sanitized = re.sub(r'[^\w\s-]', '_', name)
-        # Remplacer les espaces par des underscores
-        sanitized = re.sub(r'\s+', '_', sanitized)
-        # Supprimer les underscores multiples
-        sanitized = re.sub(r'_+', '_', sanitized)
+        # Remplacer caractères spéciaux, espaces et underscores multiples par un seul underscore
+        sanitized = FILENAME_UNSAFE_RE.sub('_', name)
         # Supprimer les underscores au début et à la fin
         sanitized = sanitized.strip('_')
         # Limiter la longueur
@@ -53,20 +105,24 @@ def sanitize_filename(self, name: str) -> str:
         return sanitized.lower()
     
     def generate_filename(self, element_type: str, element_name: str, element_id: int, 
-                         campaign_id: int = None) -> str:
+                         campaign_id: int = None, image_url: str = None) -> str:
         """Générer un nom de fichier unique et descriptif"""
         
         # Nettoyer le nom
         clean_name = self.sanitize_filename(element_name)
         
-        # Générer un timestamp pour l'unicité
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Suffixe d'unicité : empreinte de l'URL source (une même image garde le même fichier),
+        # à défaut un timestamp
+        if image_url:
+            suffix = hashlib.sha256(image_url.encode()).hexdigest()[:16]
+        else:
+            suffix = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Construire le nom selon le type
         if campaign_id:
-            filename = f"{element_type}_{clean_name}_{element_id}_c{campaign_id}_{timestamp}.png"
+            filename = f"{element_type}_{clean_name}_{element_id}_c{campaign_id}_{suffix}.png"
         else:
-            filename = f"{element_type}_{clean_name}_{element_id}_{timestamp}.png"
+            filename = f"{element_type}_{clean_name}_{element_id}_{suffix}.png"
             
         return filename
     
@@ -104,40 +160,79 @@ async def download_and_store_image(self, image_url: str, element_type: str,
                 logger.warning(f"Invalid image URL: {image_url}")
                 return None
             
-            # Générer le nom de fichier
-            filename = self.generate_filename(element_type, element_name, element_id, campaign_id)
+            # Générer le nom de fichier (dérivé de l'URL)
+            filename = self.generate_filename(element_type, element_name, element_id, campaign_id, image_url)
             storage_path = self.get_storage_path(element_type, filename)
+            relative_path = f"/{storage_path.relative_to(self.base_storage_path.parent)}"
+            
+            # Image déjà stockée depuis cette URL (migration relancée) : rien à télécharger
+            if await asyncio.to_thread(storage_path.exists):
+                logger.info(f"♻️ Image already stored: {relative_path}")
+                return relative_path
+            
+            # Écriture dans un fichier temporaire renommé une fois l'image validée :
+            # un fichier présent sous son nom final est toujours complet
+            part_path = storage_path.with_suffix('.part')
             
             logger.info(f"📥 Downloading image for {element_type} '{element_name}' from {image_url[:50]}...")
             
             # Télécharger l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url, timeout=30) as response:
-                    if response.status == 200:
-                        # Lire le contenu de l'image
-                        image_data = await response.read()
-                        
-                        # Vérifier que c'est bien une image
-                        if len(image_data) < 1000:  # Image trop petite, probablement une erreur
-                            logger.error(f"Downloaded image too small ({len(image_data)} bytes)")
-                            return None
-                        
-                        # Sauvegarder l'image
-                        with open(storage_path, 'wb') as f:
-                            f.write(image_data)
-                        
-                        # Vérifier que le fichier a été créé avec succès
-                        if storage_path.exists() and storage_path.stat().st_size > 0:
-                            relative_path = f"/{storage_path.relative_to(self.base_storage_path.parent)}"
-                            logger.info(f"✅ Image saved successfully: {relative_path}")
-                            return relative_path
-                        else:
-                            logger.error(f"Failed to save image to {storage_path}")
-                            return None
+            session = await self._get_session()
+            async with session.get(image_url) as response:
+                if response.status == 200:
+                    # Écarter d'après les en-têtes ce qui n'est manifestement pas une image (page d'erreur, URL expirée)
+                    content_type = response.headers.get('Content-Type', '')
+                    if content_type and not content_type.startswith(('image/', 'application/octet-stream')):
+                        logger.error(f"Downloaded content is not an image ({content_type})")
+                        return None
+                    content_length = response.headers.get('Content-Length', '')
+                    if content_length.isdigit() and int(content_length) < MIN_IMAGE_SIZE:
+                        logger.error(f"Downloaded image too small ({content_length} bytes)")
+                        return None
+                    
+                    # Puis d'après la signature en tête du corps, avant d'en lire la suite
+                    try:
+                        head = await response.content.readexactly(IMAGE_SIGNATURE_SIZE)
+                    except asyncio.IncompleteReadError as e:
+                        head = e.partial
+                    if not head.startswith(IMAGE_SIGNATURES):
+                        logger.error(f"Downloaded content is not a PNG or JPEG image ({head!r})")
+                        return None
+                    
+                    # Écrire l'image sur disque au fil des morceaux reçus, sans la garder en mémoire
+                    total = len(head)
+                    try:
+                        async with aiofiles.open(part_path, 'wb') as f:
+                            await f.write(head)
+                            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                await f.write(chunk)
+                                total += len(chunk)
+                    except BaseException:
+                        # Ne pas laisser de fichier tronqué (erreur réseau, délai dépassé, annulation)
+                        part_path.unlink(missing_ok=True)
+                        raise
+                    
+                    # Vérifier que c'est bien une image
+                    if total < MIN_IMAGE_SIZE:  # Image trop petite, probablement une erreur
+                        logger.error(f"Downloaded image too small ({total} bytes)")
+                        await asyncio.to_thread(part_path.unlink, missing_ok=True)
+                        return None
+                    
+                    # Vérifier que le fichier a été créé avec succès (appels système hors de la boucle)
+                    exists, size = await asyncio.to_thread(
+                        lambda: (part_path.exists(), part_path.stat().st_size if part_path.exists() else 0)
+                    )
+                    if exists and size > 0:
+                        await asyncio.to_thread(part_path.replace, storage_path)
+                        logger.info(f"✅ Image saved successfully: {relative_path}")
+                        return relative_path
                     else:
-                        logger.error(f"Failed to download image: HTTP {response.status}")
+                        logger.error(f"Failed to save image to {storage_path}")
                         return None
-                        
+                else:
+                    logger.error(f"Failed to download image: HTTP {response.status}")
+                    return None
+                    
         except asyncio.TimeoutError:
             logger.error(f"Timeout downloading image from {image_url}")
             return None
@@ -166,27 +261,32 @@ def get_image_info(self, local_path: str) -> Dict[str, any]:
             logger.error(f"Error getting image info for {local_path}: {e}")
             return {'exists': False, 'error': str(e)}
     
-    def cleanup_old_images(self, days_old: int = 30) -> Dict[str, int]:
+    async def cleanup_old_images(self, days_old: int = 30) -> Dict[str, int]:
         """Nettoyer les anciennes images (optionnel, pour maintenance)"""
+        # Parcours et suppressions dans un thread : la boucle reste disponible pendant le nettoyage
+        return await asyncio.to_thread(self._cleanup_old_images_sync, days_old)
+    
+    def _cleanup_old_images_sync(self, days_old: int) -> Dict[str, int]:
+        """Nettoyage des anciennes images, appels système bloquants"""
         try:
             from datetime import timedelta
-            cutoff_date = datetime.now() - timedelta(days=days_old)
+            cutoff_ts = (datetime.now() - timedelta(days=days_old)).timestamp()
             
             stats = {'checked': 0, 'deleted': 0, 'errors': 0}
             
-            for image_path in self.base_storage_path.rglob("*.png"):
+            for entry in self._iter_png_entries(self.base_storage_path):
                 try:
                     stats['checked'] += 1
                     
-                    # Vérifier la date de création
-                    if datetime.fromtimestamp(image_path.stat().st_ctime) < cutoff_date:
-                        image_path.unlink()  # Supprimer le fichier
+                    # Vérifier la date de création (horodatage brut, sans datetime par fichier)
+                    if entry.stat(follow_symlinks=False).st_ctime < cutoff_ts:
+                        os.unlink(entry.path)  # Supprimer le fichier
                         stats['deleted'] += 1
-                        logger.info(f"🗑️ Deleted old image: {image_path}")
+                        logger.info(f"🗑️ Deleted old image: {entry.path}")
                         
                 except Exception as e:
                     stats['errors'] += 1
-                    logger.error(f"Error deleting {image_path}: {e}")
+                    logger.error(f"Error deleting {entry.path}: {e}")
             
             logger.info(f"🧹 Cleanup completed: {stats}")
             return stats
@@ -195,6 +295,39 @@ def cleanup_old_images(self, days_old: int = 30) -> Dict[str, int]:
             logger.error(f"Error during cleanup: {e}")
             return {'checked': 0, 'deleted': 0, 'errors': 1}
     
+    def _iter_png_entries(self, path) -> Iterator[os.DirEntry]:
+        """Fichiers .png sous path, sous-dossiers compris (os.scandir : type et stat lus avec l'entrée)"""
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_png_entries(entry.path)
+                elif entry.name.endswith('.png'):
+                    yield entry
+    
+    def _submit_db_write(self, update, *args) -> asyncio.Future:
+        """Lancer une écriture en base dans l'exécuteur dédié et la suivre jusqu'à sa fin"""
+        future = asyncio.get_running_loop().run_in_executor(self._db_executor, update, *args)
+        self._pending_db_writes.add(future)
+        future.add_done_callback(self._pending_db_writes.discard)
+        return future
+    
+    async def _migrate_one(self, semaphore: asyncio.Semaphore, element_type: str, element: Dict,
+                           image_url: str, update, campaign_id: int = None) -> Optional[asyncio.Future]:
+        """
+        Télécharger l'image d'un élément puis lancer l'enregistrement de son chemin local via update(id, chemin)
+        
+        Returns:
+            Futur de l'écriture en base ou None si le téléchargement a échoué
+        """
+        async with semaphore:
+            local_path = await self.download_and_store_image(
+                image_url, element_type, element['Name'], element['Id'], campaign_id
+            )
+        if not local_path:
+            return None
+        # L'écriture en base ne retient pas de place de téléchargement
+        return self._submit_db_write(update, element['Id'], local_path)
+    
     async def migrate_existing_urls(self, db_service, campaign_id: int = None) -> Dict[str, int]:
         """
         Migrer les URLs temporaires existantes vers le stockage local
@@ -209,48 +342,56 @@ async def migrate_existing_urls(self, db_service, campaign_id: int = None) -> Di
         stats = {'npcs_migrated': 0, 'locations_migrated': 0, 'characters_migrated': 0, 'errors': 0}
         
         try:
-            # Migrer les NPCs
+            # NPCs et locations de la campagne, chargés en même temps
             if campaign_id:
-                npcs = db_service.get_campaign_npcs(campaign_id)
+                npcs, locations = await asyncio.gather(
+                    db_call(db_service.get_campaign_npcs, campaign_id),
+                    db_call(db_service.get_campaign_locations, campaign_id)
+                )
             else:
-                # TODO: Méthode pour récupérer tous les NPCs
+                # TODO: Méthode pour récupérer tous les NPCs et toutes les locations
                 npcs = []
+                locations = []
             
-            for npc in npcs:
-                portrait_url = npc.get('PortraitUrl', '')
-                if portrait_url and portrait_url.startswith('http'):
-                    try:
-                        local_path = await self.download_and_store_image(
-                            portrait_url, 'npc', npc['Name'], npc['Id'], campaign_id
-                        )
-                        if local_path:
-                            db_service.update_npc(npc['Id'], portrait_url=local_path)
-                            stats['npcs_migrated'] += 1
-                            logger.info(f"✅ Migrated NPC {npc['Name']} image")
-                    except Exception as e:
-                        stats['errors'] += 1
-                        logger.error(f"Error migrating NPC {npc['Name']} image: {e}")
+            # Éléments dont l'image est encore une URL temporaire, avec la mise à jour de leur chemin local
+            jobs = [
+                ('npc', npc, npc.get('PortraitUrl', ''),
+                 lambda element_id, path: db_service.update_npc(element_id, portrait_url=path))
+                for npc in npcs
+            ] + [
+                ('location', location, location.get('ImageUrl', ''),
+                 lambda element_id, path: db_service.update_location(element_id, image_url=path))
+                for location in locations
+            ]
+            jobs = [job for job in jobs if job[2] and job[2].startswith('http')]
             
-            # Migrer les Locations
-            if campaign_id:
-                locations = db_service.get_campaign_locations(campaign_id)
-            else:
-                locations = []
-                
-            for location in locations:
-                image_url = location.get('ImageUrl', '')
-                if image_url and image_url.startswith('http'):
+            # Toutes les migrations sont lancées ensemble, MIGRATION_CONCURRENCY au plus à la fois :
+            # téléchargement et écriture disque d'un élément se font au fil de l'eau (streaming),
+            # son écriture en base part dans l'exécuteur dédié pendant que les suivants téléchargent
+            semaphore = asyncio.Semaphore(MIGRATION_CONCURRENCY)
+            results = await asyncio.gather(
+                *(self._migrate_one(semaphore, *job, campaign_id) for job in jobs),
+                return_exceptions=True
+            )
+            
+            for (element_type, element, _, _), result in zip(jobs, results):
+                label = 'NPC' if element_type == 'npc' else 'location'
+                if isinstance(result, asyncio.Future):
+                    # Attendre l'écriture en base (toutes avancent ensemble dans l'exécuteur dédié)
                     try:
-                        local_path = await self.download_and_store_image(
-                            image_url, 'location', location['Name'], location['Id'], campaign_id
-                        )
-                        if local_path:
-                            db_service.update_location(location['Id'], image_url=local_path)
-                            stats['locations_migrated'] += 1
-                            logger.info(f"✅ Migrated location {location['Name']} image")
+                        result = await result
                     except Exception as e:
-                        stats['errors'] += 1
-                        logger.error(f"Error migrating location {location['Name']} image: {e}")
+                        result = e
+                if isinstance(result, Exception):
+                    stats['errors'] += 1
+                    logger.error(f"Error migrating {label} {element['Name']} image: {result}")
+                elif result:
+                    stats[f"{element_type}s_migrated"] += 1
+                    logger.info(f"✅ Migrated {label} {element['Name']} image")
+                else:
+                    # Téléchargement échoué ou élément non mis à jour en base
+                    stats['errors'] += 1
+                    logger.error(f"Could not migrate {label} {element['Name']} image")
             
             logger.info(f"📦 Migration completed: {stats}")
             return stats
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 import json
 from typing import Dict, List, Any, Optional
@@ -161,9 +162,7 @@ def _generate_with_openai(self, prompt: str, system_prompt: Optional[str] = None
                 from app import db_service
                 import json
                 
-                if db_service.game_conn and not db_service.game_conn.closed:
-                    cursor = db_service.game_conn.cursor()
-                    
+                with db_service.game_connection() as conn, conn.cursor() as cursor:
                     # Log LLM response time
                     cursor.execute("""
                         INSERT INTO "AIMetrics" ("MetricName", "MetricValue", "MetricUnit", "ModelName", "Provider", "Timestamp", "Metadata")
@@ -188,8 +187,6 @@ def _generate_with_openai(self, prompt: str, system_prompt: Optional[str] = None
                         "INFO", f"OpenAI API call successful - {tokens_used} tokens", "llm_call",
                         OPENAI_MODEL, "openai", response_time, tokens_used, datetime.now()
                     ))
-                    
-                    cursor.close()
             except Exception as metrics_error:
                 logger.debug(f"Could not log LLM metrics: {metrics_error}")
             
@@ -202,8 +199,7 @@ def _generate_with_openai(self, prompt: str, system_prompt: Optional[str] = None
                 from datetime import datetime
                 from app import db_service
                 
-                if db_service.game_conn and not db_service.game_conn.closed:
-                    cursor = db_service.game_conn.cursor()
+                with db_service.game_connection() as conn, conn.cursor() as cursor:
                     cursor.execute("""
                         INSERT INTO "AILogs" ("LogLevel", "LogMessage", "LogCategory", "ModelName", "Provider", "ResponseTime", "Timestamp", "StackTrace")
                         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
@@ -211,7 +207,6 @@ def _generate_with_openai(self, prompt: str, system_prompt: Optional[str] = None
                         "ERROR", f"OpenAI API error: {str(e)}", "llm_error",
                         OPENAI_MODEL, "openai", error_response_time, datetime.now(), str(e)
                     ))
-                    cursor.close()
             except Exception as metrics_error:
                 logger.debug(f"Could not log error metrics: {metrics_error}")
             
@@ -445,8 +440,9 @@ async def generate_and_store_image(self, prompt: str, element_type: str,
             Chemin local de l'image stockée ou None si erreur
         """
         try:
-            # Générer l'image avec DALL-E (URL temporaire)
-            temp_url = self.generate_image(prompt)
+            # Générer l'image avec DALL-E (URL temporaire) : appel synchrone, exécuté dans un
+            # thread pour ne pas bloquer la boucle ni sérialiser les générations simultanées
+            temp_url = await asyncio.to_thread(self.generate_image, prompt)
             if not temp_url:
                 return None
             
@@ -251,6 +251,8 @@ async def main():
     finally:
         # Fermer les connexions
         migrator.db_service.close_connections()
+        migrator.db_service.close_pools()
+        await migrator.image_storage.close()
 
 
 if __name__ == "__main__":
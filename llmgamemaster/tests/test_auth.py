@@ -6,6 +6,7 @@
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import time
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -47,6 +48,44 @@ def test_verify_valid_jwt_token(self, mock_user):
         assert payload["email"] == mock_user["email"]
         assert payload["username"] == mock_user["username"]
     
+    def test_token_compatible_with_pyjwt(self, mock_user):
+        """Test que les tokens signés localement restent des JWT HS256 standards"""
+        import jwt
+        from config import settings
+        
+        token = JWTAuth.create_access_token(mock_user)
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=["HS256"])
+        assert payload["user_id"] == mock_user["id"]
+        
+        foreign_token = jwt.encode(
+            {"user_id": "foreign-user", "exp": payload["exp"]},
+            settings.jwt_secret_key, algorithm="HS256"
+        )
+        assert JWTAuth.verify_token(foreign_token)["user_id"] == "foreign-user"
+    
+    def test_verify_token_not_yet_valid(self):
+        """Test qu'un token dont le nbf est dans le futur est refusé (claims contrôlés par PyJWT)"""
+        import jwt
+        from config import settings
+        
+        now = int(time.time())
+        token = jwt.encode(
+            {"user_id": "future-user", "nbf": now + 3600, "exp": now + 7200},
+            settings.jwt_secret_key, algorithm="HS256"
+        )
+        
+        with pytest.raises(Exception):  # HTTPException attendue
+            JWTAuth.verify_token(token)
+    
+    def test_verify_tampered_jwt_token(self, mock_user):
+        """Test qu'un token dont la signature ne correspond pas est refusé"""
+        token = JWTAuth.create_access_token(mock_user)
+        header, payload, signature = token.split(".")
+        tampered = f"{header}.{payload}.{signature[::-1]}"
+        
+        with pytest.raises(Exception):  # HTTPException attendue
+            JWTAuth.verify_token(tampered)
+    
     def test_verify_invalid_jwt_token(self):
         """Test de vérification d'un token JWT invalide"""
         with pytest.raises(Exception):  # HTTPException attendue
@@ -56,20 +95,31 @@ def test_verify_expired_token(self, mock_user):
         """Test de vérification d'un token expiré"""
         # Mock datetime pour simuler un token expiré
         with patch('auth.datetime') as mock_datetime:
-            from datetime import datetime, timedelta
+            from datetime import datetime, timedelta, timezone
             
             # Créer un token avec une expiration dans le passé
-            past_time = datetime.utcnow() - timedelta(hours=25)
-            mock_datetime.utcnow.return_value = past_time
+            past_time = datetime.now(timezone.utc) - timedelta(hours=25)
+            mock_datetime.now.return_value = past_time
             
             token = JWTAuth.create_access_token(mock_user)
             
             # Restaurer le temps réel pour la vérification
-            mock_datetime.utcnow.return_value = datetime.utcnow()
+            mock_datetime.now.return_value = datetime.now(timezone.utc)
             
             with pytest.raises(Exception):  # HTTPException attendue
                 JWTAuth.verify_token(token)
     
+    def test_verify_token_uses_cache(self, mock_user):
+        """Test que la vérification d'un token déjà validé ne re-décode pas le JWT"""
+        token = JWTAuth.create_access_token(mock_user)
+        JWTAuth.verify_token(token)
+        
+        with patch('auth.jwt.decode') as mock_decode:
+            payload = JWTAuth.verify_token(token)
+        
+        mock_decode.assert_not_called()
+        assert payload["user_id"] == mock_user["id"]
+    
     @patch('auth.psycopg2.connect')
     def test_get_user_from_db_success(self, mock_connect, mock_user):
         """Test de récupération utilisateur depuis la DB avec succès"""
@@ -110,6 +160,22 @@ def test_get_user_from_db_not_found(self, mock_connect):
         
         assert result is None
     
+    @patch('auth.psycopg2.connect')
+    def test_validate_campaign_access_closes_connection(self, mock_connect, mock_user):
+        """Test que la connexion est fermée même quand l'accès est accordé"""
+        from auth import validate_campaign_access
+        
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connect.return_value = mock_conn
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = {"Id": 1}
+        
+        import asyncio
+        assert asyncio.run(validate_campaign_access(mock_user, 1)) is True
+        
+        mock_conn.close.assert_called_once()
+    
     @patch('auth.psycopg2.connect')
     def test_validate_campaign_access_owner(self, mock_connect, mock_user):
         """Test de validation d'accès pour le propriétaire d'une campagne"""
@@ -187,7 +253,7 @@ def client(self):
             test_app = FastAPI()
             return TestClient(test_app)
     
-    @patch('auth_routes.psycopg2.connect')
+    @patch('auth.psycopg2.connect')
     def test_login_success(self, mock_connect, client):
         """Test de connexion réussie"""
         # Mock de la connexion DB
@@ -203,7 +269,7 @@ def test_login_success(self, mock_connect, client):
             "Email": "test@example.com",
             "PasswordHash": "hashed-password",
             "EmailConfirmed": True,
-            "LockoutEnd": None
+            "NotLocked": True
         }
         
         # Mock de la vérification du mot de passe
@@ -219,7 +285,7 @@ def test_login_success(self, mock_connect, client):
         assert data["token_type"] == "bearer"
         assert "user" in data
     
-    @patch('auth_routes.psycopg2.connect')
+    @patch('auth.psycopg2.connect')
     def test_login_invalid_credentials(self, mock_connect, client):
         """Test de connexion avec identifiants invalides"""
         # Mock de la connexion DB
@@ -239,11 +305,73 @@ def test_login_invalid_credentials(self, mock_connect, client):
         assert response.status_code == 401
         assert "Invalid email or password" in response.json()["detail"]
     
+    @patch('auth.psycopg2.connect')
+    def test_login_locked_account_same_response(self, mock_connect, client):
+        """Test qu'un compte verrouillé reçoit la même réponse qu'un mauvais mot de passe"""
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connect.return_value = mock_conn
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        
+        mock_cursor.fetchone.return_value = {
+            "Id": "test-user-id",
+            "UserName": "testuser",
+            "Email": "test@example.com",
+            "PasswordHash": "hashed-password",
+            "EmailConfirmed": True,
+            "NotLocked": False
+        }
+        
+        with patch('auth_routes.verify_aspnet_password') as mock_verify:
+            response = client.post("/auth/login", json={
+                "email": "test@example.com",
+                "password": "testpassword"
+            })
+        
+        mock_verify.assert_not_called()
+        assert response.status_code == 401
+        assert "Invalid email or password" in response.json()["detail"]
+    
+    @patch('auth.psycopg2.connect')
+    def test_login_rate_limited_before_db(self, mock_connect, client):
+        """Test que les tentatives de login répétées sont rejetées avant la DB"""
+        from auth_routes import login_rate_limiter
+        
+        with patch.object(login_rate_limiter, 'is_allowed', return_value=False):
+            response = client.post("/auth/login", json={
+                "email": "spray@example.com",
+                "password": "testpassword"
+            })
+        
+        assert response.status_code == 429
+        mock_connect.assert_not_called()
+    
     def test_verify_token_without_auth(self, client):
         """Test de vérification de token sans authentification"""
         response = client.post("/auth/verify-token")
         
         assert response.status_code == 401
+    
+    @patch('auth.JWTAuth.get_user_from_db')
+    def test_verify_token_with_valid_token(self, mock_get_user, client):
+        """Test de vérification d'un token valide via l'en-tête Authorization"""
+        mock_get_user.return_value = {
+            "id": "test-user-id",
+            "email": "test@example.com",
+            "username": "testuser",
+            "email_confirmed": True
+        }
+        token = JWTAuth.create_access_token({
+            "id": "test-user-id",
+            "email": "test@example.com",
+            "username": "testuser"
+        })
+        
+        response = client.post("/auth/verify-token", headers={"Authorization": f"Bearer {token}"})
+        
+        assert response.status_code == 200
+        assert response.json()["valid"] is True
+        assert response.json()["user"]["id"] == "test-user-id"
 
 
 class TestProtectedRoutes:
@@ -311,5 +439,128 @@ def test_protected_route_access_denied(self, mock_access, client, valid_token):
             assert "don't have access" in response.json()["detail"]
 
 
+class TestPasswordVerification:
+    """Tests pour la vérification des mots de passe"""
+    
+    def test_bcrypt_hash_valid_password(self):
+        """Test d'un mot de passe correct contre un hash bcrypt"""
+        import bcrypt
+        from auth_routes import verify_aspnet_password
+        
+        password_hash = bcrypt.hashpw(b"secret-password", bcrypt.gensalt(rounds=4)).decode()
+        
+        assert verify_aspnet_password("secret-password", password_hash) is True
+        assert verify_aspnet_password("wrong-password", password_hash) is False
+    
+    def test_malformed_hash_skips_bcrypt(self):
+        """Test qu'un hash mal formé est rejeté sans appeler bcrypt"""
+        from auth_routes import verify_aspnet_password
+        
+        with patch('auth_routes.bcrypt.checkpw') as mock_checkpw:
+            assert verify_aspnet_password("password", "$2b$short") is False
+            assert verify_aspnet_password("", "$2b$" + "a" * 56) is False
+        
+        mock_checkpw.assert_not_called()
+    
+    def test_aspnet_identity_v3_hash(self):
+        """Test d'un hash ASP.NET Core Identity V3 (PBKDF2-HMAC-SHA256)"""
+        import base64
+        import hashlib
+        from auth_routes import verify_aspnet_password
+        
+        salt = b"0123456789abcdef"
+        subkey = hashlib.pbkdf2_hmac('sha256', b"P@ssw0rd!", salt, 10000, dklen=32)
+        raw = (b"\x01" + (1).to_bytes(4, 'big') + (10000).to_bytes(4, 'big')
+               + len(salt).to_bytes(4, 'big') + salt + subkey)
+        password_hash = base64.b64encode(raw).decode()
+        
+        assert verify_aspnet_password("P@ssw0rd!", password_hash) is True
+        assert verify_aspnet_password("wrong-password", password_hash) is False
+    
+    def test_aspnet_identity_v2_hash(self):
+        """Test d'un hash ASP.NET Identity V2 (PBKDF2-HMAC-SHA1)"""
+        import base64
+        import hashlib
+        from auth_routes import verify_aspnet_password
+        
+        salt = b"fedcba9876543210"
+        subkey = hashlib.pbkdf2_hmac('sha1', b"P@ssw0rd!", salt, 1000, dklen=32)
+        password_hash = base64.b64encode(b"\x00" + salt + subkey).decode()
+        
+        assert verify_aspnet_password("P@ssw0rd!", password_hash) is True
+        assert verify_aspnet_password("wrong-password", password_hash) is False
+    
+    def test_aspnet_identity_hash_uses_constant_time_compare(self):
+        """Test que la sous-clé est comparée en temps constant"""
+        import base64
+        from auth_routes import verify_aspnet_password
+        
+        password_hash = base64.b64encode(b"\x00" + b"s" * 16 + b"k" * 32).decode()
+        
+        with patch('auth_routes.hmac.compare_digest', return_value=False) as mock_compare:
+            assert verify_aspnet_password("password", password_hash) is False
+        
+        mock_compare.assert_called_once()
+    
+    def test_aspnet_identity_truncated_subkey_rejected(self):
+        """Test qu'un hash PBKDF2 sans sous-clé exploitable est refusé"""
+        import base64
+        from auth_routes import verify_aspnet_password
+        
+        password_hash = base64.b64encode(b"\x00" + b"s" * 16 + b"k" * 4).decode()
+        
+        assert verify_aspnet_password("password", password_hash) is False
+    
+    def test_unknown_hash_format_rejected(self):
+        """Test qu'un format de hash inconnu n'est jamais accepté"""
+        from auth_routes import verify_aspnet_password
+        
+        assert verify_aspnet_password("password", "not-a-real-hash") is False
+
+
+class TestLoginRateLimiter:
+    """Tests du limiteur dédié au login"""
+    
+    def test_login_threshold_below_global_limit(self):
+        """Test que le login a son propre seuil, plus bas que le middleware global"""
+        from auth_routes import login_rate_limiter
+        from config import settings
+        
+        assert login_rate_limiter.requests_limit == settings.login_rate_limit_requests
+        assert login_rate_limiter.requests_limit < settings.rate_limit_requests
+    
+    def test_login_attempts_rejected_after_threshold(self):
+        """Test que les tentatives au-delà du seuil sont refusées pour ce seul client"""
+        from utils import RateLimiter
+        
+        limiter = RateLimiter(3, 60)
+        
+        assert [limiter.is_allowed("1.2.3.4:a@b.c") for _ in range(4)] == [True, True, True, False]
+        assert limiter.is_allowed("1.2.3.4:other@b.c") is True
+    
+    def test_client_histories_are_bounded(self):
+        """Test que les historiques ne croissent pas sans limite"""
+        from utils import RateLimiter
+        
+        limiter = RateLimiter(5, 60, max_clients=10)
+        for i in range(100):
+            limiter.is_allowed(f"10.0.0.{i}:spray@example.com")
+        
+        assert len(limiter.requests) == 10
+    
+    def test_expired_histories_are_dropped(self):
+        """Test qu'un client inactif depuis une fenêtre ne garde pas d'historique"""
+        from utils import RateLimiter
+        
+        limiter = RateLimiter(1, 60)
+        with patch('utils.time.time', return_value=1000.0):
+            assert limiter.is_allowed("client") is True
+            assert limiter.is_allowed("client") is False
+        
+        limiter.requests.expire(time=limiter.requests.timer() + 61)
+        assert "client" not in limiter.requests
+        assert limiter.is_allowed("client") is True
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
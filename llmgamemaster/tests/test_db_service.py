@@ -0,0 +1,289 @@
+"""
+Tests pour le service de base de données (db_service.py)
+Test des lectures par curseur serveur nommé, sans base réelle
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import psycopg2.extensions
+from types import SimpleNamespace
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_service as db_service_module
+from db_service import DBService, CAMPAIGN_NPCS_SQL, CAMPAIGN_QUESTS_SQL
+
+class FakeNamedCursor:
+    """Curseur nommé qui rapatrie les lignes par paquets de itersize, comme psycopg2"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.itersize = 2000
+        self.fetches = 0
+    
+    def execute(self, query, params=None):
+        self.query = query
+        self.params = params
+    
+    def __iter__(self):
+        for start in range(0, len(self.rows), self.itersize):
+            self.fetches += 1
+            yield from self.rows[start:start + self.itersize]
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+class FakeConnection:
+    """Connexion du pool (autocommit) qui refuse les curseurs nommés hors transaction, comme psycopg2"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.autocommit = True
+        self.closed = 0
+        self.cursors = {}
+        self.named = []
+        self.commits = 0
+        self.rollbacks = 0
+    
+    def cursor(self, name=None, cursor_factory=None):
+        if name is None:
+            return MagicMock(closed=False)
+        if self.autocommit:
+            raise psycopg2.ProgrammingError("can't use a named cursor outside of transactions")
+        named = FakeNamedCursor(self.rows)
+        self.named.append(named)
+        return named
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        self.rollbacks += 1
+    
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+def service_with_connection(conn):
+    """Service dont les deux pools prêtent la connexion factice"""
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    db_service = DBService()
+    db_service.game_pool = pool
+    db_service.silver_pool = pool
+    db_service._get_game_pool = lambda: pool
+    db_service._get_silver_pool = lambda: pool
+    return db_service
+
+class TestStreamingReads:
+    """Tests des lectures par curseur serveur nommé"""
+    
+    @pytest.fixture
+    def rows(self):
+        """Plus de lignes que la taille d'un paquet"""
+        return [{'Id': i} for i in range(1200)]
+    
+    def test_stream_reads_more_than_itersize(self, rows):
+        """Test qu'un parcours de 1200 lignes par paquets de 500 les renvoie toutes"""
+        conn = FakeConnection(rows)
+        db_service = service_with_connection(conn)
+        
+        streamed = list(db_service._stream(db_service.game_pool, "SELECT 1", (), batch=500))
+        
+        assert streamed == rows
+        assert conn.named[0].itersize == 500
+        assert conn.named[0].fetches == 3
+        assert conn.commits == 1
+        # Connexion rendue au pool en autocommit
+        assert conn.autocommit is True
+        db_service.game_pool.putconn.assert_called_once_with(conn, close=False)
+    
+    def test_stream_closed_early_rolls_back(self, rows):
+        """Test qu'un parcours abandonné annule sa transaction et rend la connexion en autocommit"""
+        conn = FakeConnection(rows)
+        db_service = service_with_connection(conn)
+        
+        stream = db_service._stream(db_service.game_pool, "SELECT 1", (), batch=500)
+        assert next(stream) == rows[0]
+        stream.close()
+        
+        assert conn.rollbacks == 1
+        assert conn.commits == 0
+        assert conn.autocommit is True
+        db_service.game_pool.putconn.assert_called_once_with(conn, close=False)
+    
+    def test_unlimited_campaign_messages_are_streamed(self, rows):
+        """Test que get_campaign_messages(limit=None) passe par le curseur nommé"""
+        conn = FakeConnection(rows)
+        db_service = service_with_connection(conn)
+        db_service._get_campaign_messages_query = lambda full=False: "SELECT messages"
+        
+        assert db_service.get_campaign_messages(1, limit=None) == rows
+        assert conn.named[0].params == (1, None)
+
+class TestReferenceLookupCache:
+    """Tests du cache des recherches de référence par nom"""
+    
+    @pytest.fixture
+    def db_service(self):
+        """Service dont la requête préparée renvoie toujours la même ligne"""
+        db_service = service_with_connection(FakeConnection([]))
+        db_service._start_reference_listener = lambda: None
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'name': 'Goblin', 'cr': '1/4'}
+        db_service._get_cursor = lambda conn, cursor_factory=None: cursor
+        db_service._execute_prepared = MagicMock()
+        return db_service
+    
+    def test_lookup_queries_normalized_name(self, db_service):
+        """Test que la requête utilise le nom normalisé qui sert de clé au cache"""
+        db_service.get_monster_by_name("  GobLin ")
+        db_service.get_monster_by_name("goblin")
+        
+        db_service._execute_prepared.assert_called_once_with(
+            db_service._get_cursor(None), "monster_by_name", ("%goblin%",)
+        )
+    
+    def test_lookup_returns_copies(self, db_service):
+        """Test que modifier la ligne renvoyée, en miss comme en hit, n'altère pas le cache"""
+        miss = db_service.get_monster_by_name("goblin")
+        miss['cr'] = 'altered'
+        hit = db_service.get_monster_by_name("goblin")
+        hit['name'] = 'altered'
+        
+        assert db_service.get_monster_by_name("goblin") == {'name': 'Goblin', 'cr': '1/4'}
+
+class TestBackgroundWriter:
+    """Tests de la file d'écriture des messages de campagne"""
+    
+    @pytest.fixture
+    def db_service(self):
+        """Service dont les lots écrits sont mémorisés au lieu d'être insérés"""
+        db_service = DBService()
+        db_service.batches = []
+        return db_service
+    
+    def test_messages_keep_their_enqueue_time(self, db_service):
+        """Test que chaque message est horodaté à sa mise en file, pas à l'écriture du lot"""
+        def save(messages):
+            db_service.batches.append(list(messages))
+            return True
+        db_service.save_campaign_messages = save
+        
+        with patch.object(db_service, '_start_writer'), patch.object(db_service_module, 'datetime') as clock:
+            clock.now.side_effect = ["10:00:00", "10:00:05"]
+            first = db_service.save_campaign_message(1, "system", "first")
+            second = db_service.save_campaign_message(1, "system", "second")
+        db_service._start_writer()
+        
+        assert db_service.flush_writes(timeout=5)
+        assert first.result(timeout=1) is True and second.result(timeout=1) is True
+        (batch,) = db_service.batches
+        assert [message[2] for message in batch] == ["first", "second"]
+        assert [message[5] for message in batch] == ["10:00:00", "10:00:05"]
+    
+    def test_transient_failure_is_retried(self, db_service):
+        """Test qu'un lot est réessayé tant qu'aucune connexion n'a pu être obtenue"""
+        def save(messages):
+            db_service.batches.append(list(messages))
+            if len(db_service.batches) < 3:
+                raise psycopg2.OperationalError("server closed the connection unexpectedly")
+            return True
+        db_service.save_campaign_messages = save
+        
+        with patch.object(db_service_module, 'WRITE_RETRY_DELAY_SECONDS', 0):
+            written = db_service.save_campaign_message(1, "system", "retried")
+            assert written.result(timeout=5) is True
+        
+        assert len(db_service.batches) == 3
+    
+    def test_insert_lost_after_commit_is_not_replayed(self):
+        """Test qu'un INSERT validé puis coupé avant la réponse n'écrit pas de doublon"""
+        table = []
+        
+        def execute_values(cursor, query, rows, page_size=None):
+            table.extend(rows)
+            if len(table) == len(rows):
+                raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        
+        db_service = service_with_connection(FakeConnection([]))
+        with patch.object(db_service_module, 'execute_values', execute_values), \
+                patch.object(db_service_module, 'WRITE_RETRY_DELAY_SECONDS', 0):
+            written = db_service.save_campaign_message(1, "system", "once")
+            assert db_service.flush_writes(timeout=5)
+        
+        assert [row[2] for row in table] == ["once"]
+        assert written.result(timeout=1) is False
+    
+    def test_rejected_batch_keeps_valid_messages(self, db_service):
+        """Test qu'un lot refusé est réécrit message par message"""
+        def save(messages):
+            db_service.batches.append(list(messages))
+            return all(message[0] != 999 for message in messages)
+        db_service.save_campaign_messages = save
+        
+        assert db_service._write_batch([
+            (1, "system", "a", None, None, None),
+            (999, "system", "bad", None, None, None),
+            (1, "system", "b", None, None, None),
+        ]) == [True, False, True]
+
+class TestCampaignElementsSnapshot:
+    """Tests de la lecture des éléments de campagne dans une seule transaction"""
+    
+    def service_failing_on(self, query, error):
+        """Service dont la première exécution de query lève error"""
+        conn = FakeConnection([])
+        db_service = service_with_connection(conn)
+        executed = []
+        
+        def execute(sql, params=None):
+            executed.append(sql)
+            if sql == query and executed.count(sql) == 1:
+                raise error
+        
+        cursor = MagicMock(closed=False)
+        cursor.execute.side_effect = execute
+        cursor.description = [SimpleNamespace(name='Id')]
+        cursor.fetchall.return_value = [(1,)]
+        db_service._get_cursor = lambda conn, cursor_factory=None: cursor
+        return db_service, executed
+    
+    def test_dropped_connection_replays_the_whole_snapshot(self):
+        """Test qu'une coupure dans read_txn rejoue tout le bloc sur une nouvelle transaction"""
+        db_service, executed = self.service_failing_on(
+            CAMPAIGN_NPCS_SQL, psycopg2.OperationalError("server closed the connection unexpectedly")
+        )
+        
+        elements = db_service.get_campaign_elements(1)
+        
+        assert elements == {"npcs": [{'Id': 1}], "locations": [{'Id': 1}], "quests": [{'Id': 1}]}
+        assert executed.count(CAMPAIGN_NPCS_SQL) == 2
+        assert executed.count("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY") == 2
+        # Connexion coupée jetée, pas rendue au pool
+        assert db_service.game_pool.putconn.call_args_list[0].kwargs == {"close": True}
+    
+    def test_error_inside_snapshot_propagates(self):
+        """Test qu'une erreur SQL dans read_txn n'est pas masquée par des listes vides"""
+        db_service, executed = self.service_failing_on(CAMPAIGN_NPCS_SQL, psycopg2.ProgrammingError("boom"))
+        
+        with pytest.raises(psycopg2.ProgrammingError):
+            db_service.get_campaign_elements(1)
+        
+        assert CAMPAIGN_QUESTS_SQL not in executed
+        assert "ROLLBACK" in executed
+    
+    def test_snapshot_bypasses_campaign_cache(self):
+        """Test que les listes déjà en cache sont relues dans la transaction"""
+        db_service, _ = self.service_failing_on(None, None)
+        db_service._location_cache[1] = (('Id',), [(99,)])
+        
+        assert db_service.get_campaign_elements(1)["locations"] == [{'Id': 1}]
+        assert db_service.get_campaign_locations(1) == [{'Id': 1}]
@@ -0,0 +1,135 @@
+"""
+Tests pour le module Element Manager (element_manager.py)
+Test de la détection des déplacements dans la narration
+"""
+
+import pytest
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch, MagicMock
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from element_manager import ElementManager, IMAGE_GENERATION_CONCURRENCY, MOVEMENT_RE_EN, MOVEMENT_RE_FR
+
+def mentioned_locations(movement_re, narrative):
+    """Lieux capturés dans l'ordre du texte (le groupe qui suit le motif reconnu)"""
+    return [match.group(match.lastindex + 1).strip() for match in movement_re.finditer(narrative)]
+
+class TestMovementPatterns:
+    """Tests des motifs de déplacement du personnage"""
+    
+    @pytest.mark.parametrize("narrative, expected", [
+        ("You arrive at the Old Mill, tired and hungry.", ["the Old Mill"]),
+        ("Welcome to Port Royal. You head towards the Docks", ["Port Royal", "the Docks"]),
+        ("You are now in the Keep\nThe guards watch you.", ["the Keep"]),
+    ])
+    def test_english_location_stops_at_punctuation(self, narrative, expected):
+        """Test que le lieu s'arrête au premier point, virgule ou saut de ligne"""
+        assert mentioned_locations(MOVEMENT_RE_EN, narrative) == expected
+    
+    @pytest.mark.parametrize("narrative, expected", [
+        ("Vous entrez dans la Taverne du Dragon. Le feu crépite.", ["la Taverne du Dragon"]),
+        ("Tu te trouves maintenant dans la Forêt Noire, seul", ["la Forêt Noire"]),
+        ("Direction du Marché\nBienvenue à Port-Royal", ["Marché", "Port-Royal"]),
+    ])
+    def test_french_location_stops_at_punctuation(self, narrative, expected):
+        """Test des motifs français"""
+        assert mentioned_locations(MOVEMENT_RE_FR, narrative) == expected
+    
+    def test_no_movement(self):
+        """Test d'une narration sans déplacement"""
+        assert mentioned_locations(MOVEMENT_RE_EN, "The innkeeper smiles and pours an ale.") == []
+    
+    def test_long_narrative_without_punctuation(self):
+        """Test qu'une narration de 10 Ko sans ponctuation est parcourue en temps linéaire"""
+        narrative = "you are in you walk to welcome to entering " * 250
+        assert len(narrative) > 10000
+        
+        start_time = time.time()
+        locations = mentioned_locations(MOVEMENT_RE_EN, narrative)
+        elapsed = time.time() - start_time
+        
+        assert len(locations) == 1
+        assert elapsed < 0.1
+
+class TestLocationMatching:
+    """Tests du rapprochement d'un lieu mentionné avec les lieux de la campagne"""
+    
+    @pytest.fixture
+    def element_manager(self):
+        """Element Manager sans base ni LLM"""
+        with patch('element_manager.LLMService'):
+            return ElementManager(MagicMock())
+    
+    @pytest.fixture
+    def location_index(self, element_manager):
+        """Index des lieux existants"""
+        return element_manager._build_location_index(["The Golden Dragon Inn", "Riesling Vineyards", "Dark Forest", "Port Royal"])
+    
+    @pytest.mark.parametrize("mentioned, expected", [
+        ("the golden dragon inn", "The Golden Dragon Inn"),
+        ("Golden Dragon", "The Golden Dragon Inn"),
+        ("Rieslings Vineyard", "Riesling Vineyards"),
+        ("Forest Dark", "Dark Forest"),
+        ("Port Royale", "Port Royal"),
+    ])
+    def test_matches_existing_location(self, element_manager, location_index, mentioned, expected):
+        """Test des correspondances exactes, partielles et approchées"""
+        assert element_manager._find_best_location_match(mentioned, location_index) == expected
+    
+    @pytest.mark.parametrize("mentioned, expected", [
+        ("Old Mill Cellar", "Old Mill Cellar"),
+        ("The Old Mill Cellar Door", "Old Mill Cellar"),
+        ("Mill", "Old Mill"),
+    ])
+    def test_partial_match_prefers_closest_location(self, element_manager, mentioned, expected):
+        """Test que le lieu le plus long contenu dans la mention, puis le plus court la contenant, l'emporte"""
+        location_index = element_manager._build_location_index(["Old Mill", "Old Mill Cellar", "Mill Road Old Mill Square"])
+        assert element_manager._find_best_location_match(mentioned, location_index) == expected
+    
+    def test_empty_mention(self, element_manager, location_index):
+        """Test qu'une mention vide (réduite à un article) n'est rapprochée d'aucun lieu"""
+        assert element_manager._find_best_location_match("", location_index) is None
+    
+    def test_unknown_location(self, element_manager, location_index):
+        """Test qu'un lieu sans rapport n'est rapproché d'aucun lieu"""
+        assert element_manager._find_best_location_match("Castle", location_index) is None
+
+class TestMissingImageGeneration:
+    """Tests de la génération des images manquantes d'une campagne"""
+    
+    @pytest.mark.asyncio
+    async def test_generations_run_in_parallel_within_limit(self):
+        """Test que les générations avancent ensemble, IMAGE_GENERATION_CONCURRENCY au plus à la fois"""
+        db_service = MagicMock()
+        db_service.get_campaign_npcs.return_value = [{'Id': i, 'Name': f"NPC {i}", 'PortraitUrl': None} for i in range(3)]
+        db_service.get_campaign_locations.return_value = [{'Id': i, 'Name': f"Lieu {i}", 'ImageUrl': ''} for i in range(3)]
+        with patch('element_manager.LLMService'):
+            element_manager = ElementManager(db_service)
+        
+        in_flight = 0
+        peak = 0
+        
+        async def generate(element_data, campaign_id):
+            """Génération factice de 0,1 s"""
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.1)
+            in_flight -= 1
+            return f"/images/{element_data['name']}.png"
+        
+        element_manager._generate_npc_portrait = generate
+        element_manager._generate_location_image = generate
+        
+        start_time = time.perf_counter()
+        await element_manager.generate_missing_images_for_campaign(1)
+        elapsed = time.perf_counter() - start_time
+        
+        # Six images, trois à la fois : deux vagues de 0,1 s
+        assert peak == IMAGE_GENERATION_CONCURRENCY
+        assert elapsed < 0.35
@@ -7,6 +7,7 @@
 import asyncio
 import os
 import sys
+import time
 from unittest.mock import patch, MagicMock, AsyncMock
 
 # Ajouter le répertoire parent au path pour les imports
@@ -457,5 +458,43 @@ async def test_timeout_error(self, llm_service):
             assert not result.success
             assert "timeout" in result.text.lower()
 
+class TestImageGeneration:
+    """Tests de la génération d'images (appel DALL-E synchrone)"""
+    
+    @pytest.mark.asyncio
+    async def test_image_generation_keeps_event_loop_responsive(self):
+        """Test que les appels DALL-E bloquants tournent hors de la boucle, en parallèle"""
+        def slow_image_create(**kwargs):
+            time.sleep(0.3)
+            return {"data": [{"url": "https://example.com/image.png"}]}
+        
+        storage = MagicMock(store_generated_image=AsyncMock(return_value="/images/npcs/image.png"))
+        gaps = []
+        
+        async def heartbeat():
+            """Mesure les retards de la boucle pendant les générations"""
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+        
+        with patch("openai.Image.create", side_effect=slow_image_create), \
+             patch.dict(sys.modules, {"image_storage_service": storage}):
+            llm_service = LLMService()
+            ticker = asyncio.create_task(heartbeat())
+            start_time = time.perf_counter()
+            results = await asyncio.gather(*(
+                llm_service.generate_and_store_image("A tavern", "npc", f"NPC {i}", i, 1) for i in range(3)
+            ))
+            elapsed = time.perf_counter() - start_time
+            ticker.cancel()
+        
+        assert results == ["/images/npcs/image.png"] * 3
+        # Trois appels de 0,3 s en parallèle, la boucle jamais bloquée plus d'un appel
+        assert elapsed < 0.6
+        assert max(gaps) < 0.2
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
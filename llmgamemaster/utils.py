@@ -1,7 +1,9 @@
 import logging
 import json
+import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,37 @@ def setup_logging(log_file: str, log_level: str = "INFO"):
         ]
     )
 
+# Rate limiting
+class RateLimiter:
+    def __init__(self, requests_limit: int, window_seconds: int, max_clients: int = 10_000):
+        self.requests_limit = requests_limit
+        self.window_seconds = window_seconds
+        # Historiques bornés : un client inactif depuis une fenêtre expire,
+        # les plus anciens sont évincés au-delà de max_clients
+        self.requests: TTLCache = TTLCache(maxsize=max_clients, ttl=window_seconds)
+    
+    def is_allowed(self, client_id: str) -> bool:
+        now = time.time()
+        
+        # Remove requests older than the window
+        history = [
+            req_time for req_time in self.requests.get(client_id, ())
+            if now - req_time < self.window_seconds
+        ]
+        
+        # Check if client has exceeded the limit
+        if len(history) >= self.requests_limit:
+            if history:
+                self.requests[client_id] = history
+            else:
+                self.requests.pop(client_id, None)
+            return False
+        
+        # Add the current request
+        history.append(now)
+        self.requests[client_id] = history
+        return True
+
 def format_campaign_data(campaign: Dict) -> Dict:
     """Format campaign data for prompt templates"""
     # Check if campaign contains Settings field or Setting field
@@ -567,11 +567,11 @@ static void CreateGameTables(Microsoft.EntityFrameworkCore.Infrastructure.Databa
 CREATE INDEX IF NOT EXISTS ""IX_CampaignMessages_CampaignId"" ON ""CampaignMessages"" (""CampaignId"");
 CREATE INDEX IF NOT EXISTS ""IX_CampaignMessages_SessionId"" ON ""CampaignMessages"" (""SessionId"");
 CREATE INDEX IF NOT EXISTS ""IX_CampaignMessages_CharacterId"" ON ""CampaignMessages"" (""CharacterId"");
-CREATE INDEX IF NOT EXISTS ""IX_CampaignNPCs_CampaignId"" ON ""CampaignNPCs"" (""CampaignId"");
+CREATE INDEX IF NOT EXISTS ""IX_CampaignNPCs_CampaignId_CreatedAt"" ON ""CampaignNPCs"" (""CampaignId"", ""CreatedAt"" DESC);
 CREATE INDEX IF NOT EXISTS ""IX_CampaignNPCs_Status"" ON ""CampaignNPCs"" (""Status"");
-CREATE INDEX IF NOT EXISTS ""IX_CampaignLocations_CampaignId"" ON ""CampaignLocations"" (""CampaignId"");
+CREATE INDEX IF NOT EXISTS ""IX_CampaignLocations_CampaignId_CreatedAt"" ON ""CampaignLocations"" (""CampaignId"", ""CreatedAt"" DESC);
 CREATE INDEX IF NOT EXISTS ""IX_CampaignLocations_ParentLocationId"" ON ""CampaignLocations"" (""ParentLocationId"");
-CREATE INDEX IF NOT EXISTS ""IX_CampaignQuests_CampaignId"" ON ""CampaignQuests"" (""CampaignId"");
+CREATE INDEX IF NOT EXISTS ""IX_CampaignQuests_CampaignId_CreatedAt"" ON ""CampaignQuests"" (""CampaignId"", ""CreatedAt"" DESC);
 CREATE INDEX IF NOT EXISTS ""IX_CampaignQuests_LocationId"" ON ""CampaignQuests"" (""LocationId"");
 CREATE INDEX IF NOT EXISTS ""IX_CampaignQuests_Status"" ON ""CampaignQuests"" (""Status"");
 ";
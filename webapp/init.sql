@@ -322,20 +322,33 @@ ADD CONSTRAINT "FK_CharacterQuests_CampaignQuests_QuestId"
 FOREIGN KEY ("QuestId") REFERENCES "CampaignQuests" ("Id") ON DELETE CASCADE;
 
 -- Create indexes for new tables
-CREATE INDEX IF NOT EXISTS "IX_CampaignNPCs_CampaignId" ON "CampaignNPCs" ("CampaignId");
+-- Campaign lists are read newest first: (CampaignId, CreatedAt DESC) serves the filter and the ORDER BY without a sort
+CREATE INDEX IF NOT EXISTS "IX_CampaignNPCs_CampaignId_CreatedAt" ON "CampaignNPCs" ("CampaignId", "CreatedAt" DESC);
 CREATE INDEX IF NOT EXISTS "IX_CampaignNPCs_Status" ON "CampaignNPCs" ("Status");
 CREATE INDEX IF NOT EXISTS "IX_CampaignNPCs_CurrentLocationId" ON "CampaignNPCs" ("CurrentLocationId");
-CREATE INDEX IF NOT EXISTS "IX_CampaignLocations_CampaignId" ON "CampaignLocations" ("CampaignId");
+CREATE INDEX IF NOT EXISTS "IX_CampaignLocations_CampaignId_CreatedAt" ON "CampaignLocations" ("CampaignId", "CreatedAt" DESC);
 CREATE INDEX IF NOT EXISTS "IX_CampaignLocations_ParentLocationId" ON "CampaignLocations" ("ParentLocationId");
-CREATE INDEX IF NOT EXISTS "IX_CampaignQuests_CampaignId" ON "CampaignQuests" ("CampaignId");
+CREATE INDEX IF NOT EXISTS "IX_CampaignQuests_CampaignId_CreatedAt" ON "CampaignQuests" ("CampaignId", "CreatedAt" DESC);
 CREATE INDEX IF NOT EXISTS "IX_CampaignQuests_LocationId" ON "CampaignQuests" ("LocationId");
 CREATE INDEX IF NOT EXISTS "IX_CampaignQuests_Status" ON "CampaignQuests" ("Status");
 
+-- Trigram index for the substring name lookups (ILIKE '%name%') done by the game master
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS "IX_CampaignNPCs_Name_trgm" ON "CampaignNPCs" USING gin ("Name" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "IX_CampaignLocations_Name_trgm" ON "CampaignLocations" USING gin ("Name" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "IX_CampaignQuests_Title_trgm" ON "CampaignQuests" USING gin ("Title" gin_trgm_ops);
+
+-- Exact, case-insensitive lookups tried before the substring match
+CREATE INDEX IF NOT EXISTS "IX_CampaignLocations_CampaignId_LowerName" ON "CampaignLocations" ("CampaignId", lower("Name"));
+CREATE INDEX IF NOT EXISTS "IX_CampaignQuests_CampaignId_LowerTitle" ON "CampaignQuests" ("CampaignId", lower("Title"));
+
 -- Create indexes for CharacterQuests
-CREATE INDEX IF NOT EXISTS "IX_CharacterQuests_CampaignId" ON "CharacterQuests" ("CampaignId");
+CREATE INDEX IF NOT EXISTS "IX_CharacterQuests_CampaignId_CharacterId_AcceptedAt" ON "CharacterQuests" ("CampaignId", "CharacterId", "AcceptedAt" DESC);
 CREATE INDEX IF NOT EXISTS "IX_CharacterQuests_CharacterId" ON "CharacterQuests" ("CharacterId");
 CREATE INDEX IF NOT EXISTS "IX_CharacterQuests_QuestId" ON "CharacterQuests" ("QuestId");
 CREATE INDEX IF NOT EXISTS "IX_CharacterQuests_Status" ON "CharacterQuests" ("Status");
+-- A character accepts a given quest only once (target of accept_quest's ON CONFLICT)
+CREATE UNIQUE INDEX IF NOT EXISTS "IX_CharacterQuests_CampaignId_CharacterId_QuestId" ON "CharacterQuests" ("CampaignId", "CharacterId", "QuestId");
 
 -- Add constraints for CampaignNPCs statistics and hit points
 DO $$